@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+'''
+Micro-benchmark of :func:`flask_restplus.utils.merge` on realistic ``__apidoc__`` payloads.
+
+It compares the current structural-sharing implementation with the former deepcopy-based one.
+
+Usage::
+
+    $ python -m benchmarks.merge
+'''
+from __future__ import unicode_literals, print_function
+
+import timeit
+
+from copy import deepcopy
+
+from flask_restplus import fields, reqparse, utils
+from flask_restplus.model import ApiModel
+
+
+def deepcopy_merge(first, second):
+    '''The former deepcopy-based merge implementation'''
+    if not isinstance(second, dict):
+        return second
+    result = deepcopy(first)
+    for key, value in second.items():
+        if key in result and isinstance(result[key], dict):
+            result[key] = deepcopy_merge(result[key], value)
+        else:
+            result[key] = deepcopy(value)
+    return result
+
+
+def build_model(name, size=20):
+    model = ApiModel(dict(
+        ('field_{0}'.format(i), fields.String(description='Field {0}'.format(i), required=bool(i % 2)))
+        for i in range(size)
+    ))
+    model.__apidoc__ = {'name': name}
+    return model
+
+
+def build_apidocs():
+    '''Build a class-level and a method-level ``__apidoc__`` as ``Api.doc()`` and ``Api.marshal_with()`` do'''
+    parser = reqparse.RequestParser()
+    for i in range(10):
+        parser.add_argument('arg_{0}'.format(i), type=int, help='Argument {0}'.format(i))
+    model = build_model('Model')
+    class_doc = {
+        'description': 'A resource',
+        'params': dict(('param_{0}'.format(i), {'description': 'Param {0}'.format(i)}) for i in range(5)),
+        'responses': {'403': 'Not Authorized', '404': 'Not found'},
+        'get': {'description': 'Get a resource', 'params': {'q': {'description': 'A query'}}},
+        'post': {'body': model},
+    }
+    method_doc = {
+        'model': model,
+        'default_code': 200,
+        'parser': parser,
+        'params': {'param_0': {'type': 'integer'}},
+        'responses': {'404': 'Resource not found'},
+    }
+    return class_doc, method_doc
+
+
+def run(number=2000):
+    class_doc, method_doc = build_apidocs()
+    results = {}
+    for name, merge in (('deepcopy', deepcopy_merge), ('structural', utils.merge)):
+        duration = timeit.timeit(lambda: merge(class_doc, method_doc), number=number)
+        results[name] = duration / number
+    return results
+
+
+def main():
+    results = run()
+    for name, duration in sorted(results.items()):
+        print('{0:>12}: {1:8.2f} us/merge'.format(name, duration * 1e6))
+    print('     speedup: {0:8.1f}x'.format(results['deepcopy'] / results['structural']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmarks of the Swagger specifications generation on synthetic APIs.
+
+Each case is timed over several runs and its peak memory measured with :mod:`tracemalloc`
+(Python 3.4+ only). Results can be written as JSON and compared to a baseline:
+
+Usage::
+
+    $ python -m benchmarks.suite --size large -o baseline.json
+    $ python -m benchmarks.suite --size large --compare baseline.json
+
+The process exits with an error status if a case is slower than its baseline
+by more than the given threshold.
+'''
+from __future__ import unicode_literals, print_function
+
+import argparse
+import io
+import json
+import platform
+import sys
+
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+from flask.ext import restful
+
+from flask_restplus import Resource, Swagger, marshal, marshal_list, utils
+from flask_restplus.json_backends import get_backend, installed_backends
+from flask_restplus.marshalling import encode_list, iter_json_list
+from flask_restplus.mask import parse as parse_mask
+from flask_restplus.swagger import parser_to_params
+
+from . import merge
+from .synthetic import SIZES, build_api, build_models, build_parser
+
+
+def measure(func, setup=None, repeat=5):
+    '''
+    Time a function and measure its peak memory usage.
+
+    :param func: the benchmarked function receiving the ``setup`` result as arguments
+    :param setup: an optional untimed function called before each run and returning a tuple of arguments
+    :param repeat: the number of timed runs
+
+    :return: a dictionnary with the ``min``, ``mean`` and ``max`` durations in seconds
+        and the ``peak_memory`` in bytes (``None`` if ``tracemalloc`` is not available)
+    '''
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = default_timer()
+        func(*args)
+        timings.append(default_timer() - start)
+
+    peak = None
+    if tracemalloc is not None:
+        args = setup() if setup else ()
+        tracemalloc.start()
+        try:
+            func(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'min': min(timings),
+        'mean': sum(timings) / len(timings),
+        'max': max(timings),
+        'peak_memory': peak,
+    }
+
+
+def bench_specs(size):
+    '''Cold generation of the whole specifications'''
+    def setup():
+        app, api = build_api(**size)
+        return app, api
+
+    def run(app, api):
+        with app.test_request_context('/'):
+            Swagger(api).build()
+    return setup, run
+
+
+def bench_stream_specs(size):
+    '''Cold streaming of the whole specifications'''
+    def setup():
+        app, api = build_api(**size)
+        return app, api
+
+    def run(app, api):
+        with app.test_request_context('/'):
+            for chunk in Swagger(api).iter_json():
+                pass
+    return setup, run
+
+
+def bench_namespace_specs(size):
+    '''Cold generation of a single namespace specifications'''
+    def setup():
+        app, api = build_api(**size)
+        return app, api, api.namespaces[-1]
+
+    def run(app, api, ns):
+        with app.test_request_context('/'):
+            Swagger(api).build(ns)
+    return setup, run
+
+
+def bench_add_resource(size):
+    '''Specifications update after registering a resource on a warm API'''
+    def setup():
+        app, api = build_api(**size)
+        with app.test_request_context('/'):
+            api.specs
+
+        class AddedResource(Resource):
+            @api.doc(model=list(api.models)[0])
+            def get(self):
+                return {}
+        return app, api, AddedResource
+
+    def run(app, api, resource):
+        api.add_resource(resource, '/added')
+        with app.test_request_context('/'):
+            api.specs
+    return setup, run
+
+
+def bench_register_model(size):
+    '''Registration of a deep chain of nested models'''
+    depth = size['depth'] * 100
+
+    def setup():
+        app, api = build_api(namespaces=0)
+        head = build_models(api, 'Chain', depth, size['fields'])
+        return api, head.__apidoc__['name']
+
+    def run(api, name):
+        Swagger(api).register_model(name)
+    return setup, run
+
+
+def bench_models(size):
+    '''Declaration of the synthetic models and their definitions (the peak memory is the models footprint)'''
+    def setup():
+        app, api = build_api(namespaces=0)
+        return api,
+
+    def run(api):
+        for i in range(size['namespaces']):
+            build_models(api, 'Ns{0}'.format(i), size['depth'], size['fields'])
+        for name, model in api.models.items():
+            api.swagger.serialize_definition(name, model)
+    return setup, run
+
+
+def bench_parser_to_params(size):
+    '''Extraction of a big request parser parameters'''
+    parser = build_parser(size['arguments'] * 10)
+
+    def run():
+        parser_to_params(parser)
+    return None, run
+
+
+def bench_merge(size):
+    '''Merge of a realistic class-level and method-level documentation'''
+    class_doc, method_doc = merge.build_apidocs()
+
+    def run():
+        for _ in range(100):
+            utils.merge(class_doc, method_doc)
+    return None, run
+
+
+def build_rows(api, size, count=None):
+    '''Build a list of rows for the first namespace models and the model marshalling them'''
+    model = api.models['Ns0Level0']
+    rows = []
+    for i in range(count or size['resources'] * 50):
+        row = dict(('field_{0}'.format(j), j) for j in range(size['fields']))
+        row['child'] = dict(row)
+        rows.append(row)
+    return model, rows
+
+
+def bench_marshal(size):
+    '''Compiled marshalling of a list of rows'''
+    app, api = build_api(**dict(size, namespaces=1))
+    model, rows = build_rows(api, size)
+
+    def run():
+        marshal(rows, model)
+    return None, run
+
+
+def bench_generic_marshal(size):
+    '''Generic Flask-Restful marshalling of a list of rows (reference for the compiled one)'''
+    app, api = build_api(**dict(size, namespaces=1))
+    model, rows = build_rows(api, size)
+
+    def run():
+        restful.marshal(rows, model)
+    return None, run
+
+
+def bench_marshal_rows(size):
+    '''Compiled marshalling of 10k rows, one call by row'''
+    app, api = build_api(**dict(size, namespaces=1))
+    model, rows = build_rows(api, size, 10000)
+
+    def run():
+        [marshal(row, model) for row in rows]
+    return None, run
+
+
+def bench_marshal_list(size):
+    '''Batched marshalling of 10k rows from a generator'''
+    app, api = build_api(**dict(size, namespaces=1))
+    model, rows = build_rows(api, size, 10000)
+
+    def run():
+        marshal_list((row for row in rows), model)
+    return None, run
+
+
+def bench_generic_marshal_list(size):
+    '''Generic Flask-Restful marshalling of 10k rows (reference for the batched one)'''
+    app, api = build_api(**dict(size, namespaces=1))
+    model, rows = build_rows(api, size, 10000)
+
+    def run():
+        restful.marshal(rows, model)
+    return None, run
+
+
+def bench_marshal_mask(size):
+    '''Compiled marshalling of 10k rows restricted to a 3 fields mask (reference: marshal_list)'''
+    app, api = build_api(**dict(size, namespaces=1))
+    model, rows = build_rows(api, size, 10000)
+    mask = parse_mask('field_0,field_1,child{field_0}')
+
+    def run():
+        marshal_list((row for row in rows), model, mask=mask)
+    return None, run
+
+
+def build_wide_rows(api, size, count=10000):
+    '''Build a list of flat rows and a wide model marshalling them (5 times the size fields)'''
+    model = build_models(api, 'Wide', 1, size['fields'] * 5)
+    rows = [dict(('field_{0}'.format(j), j) for j in range(size['fields'] * 5)) for i in range(count)]
+    return model, rows
+
+
+def bench_marshal_wide(size):
+    '''Marshalling of 10k rows of a wide model into plain dictionnaries'''
+    app, api = build_api(namespaces=0)
+    model, rows = build_wide_rows(api, size)
+
+    def run():
+        marshal_list(rows, model)
+    return None, run
+
+
+def bench_marshal_wide_ordered(size):
+    '''Marshalling of 10k rows of a wide model into OrderedDict (reference: marshal_wide)'''
+    app, api = build_api(namespaces=0)
+    model, rows = build_wide_rows(api, size)
+
+    def run():
+        marshal_list(rows, model, ordered=True)
+    return None, run
+
+
+def bench_encode_list(size):
+    '''Marshalling and JSON encoding of 10k rows from a generator in a single string'''
+    app, api = build_api(**dict(size, namespaces=1))
+    model, rows = build_rows(api, size, 10000)
+
+    def run():
+        json.dumps(marshal_list((row for row in rows), model))
+    return None, run
+
+
+def bench_fused_encode_list(size):
+    '''Fused marshalling and JSON encoding of 10k rows from a generator (reference: encode_list)'''
+    app, api = build_api(**dict(size, namespaces=1))
+    model, rows = build_rows(api, size, 10000)
+
+    def run():
+        encode_list((row for row in rows), model)
+    return None, run
+
+
+def bench_stream_list(size):
+    '''Streamed marshalling and JSON encoding of 10k rows from a generator (reference: encode_list)'''
+    app, api = build_api(**dict(size, namespaces=1))
+    model, rows = build_rows(api, size, 10000)
+
+    def run():
+        with app.test_request_context('/'):
+            for chunk in iter_json_list((row for row in rows), model):
+                pass
+    return None, run
+
+
+def json_backend_cases(name):
+    '''Build the encoding and decoding cases of a JSON backend'''
+    backend = get_backend(name)
+
+    def bench_json_encode(size):
+        app, api = build_api(**dict(size, namespaces=1))
+        model, rows = build_rows(api, size, 10000)
+        data = marshal_list(rows, model)
+
+        def run():
+            backend.dumps(data)
+        return None, run
+
+    def bench_json_decode(size):
+        app, api = build_api(**dict(size, namespaces=1))
+        model, rows = build_rows(api, size, 10000)
+        text = backend.dumps(marshal_list(rows, model))
+
+        def run():
+            backend.loads(text)
+        return None, run
+
+    bench_json_encode.__doc__ = 'JSON encoding of 10k marshalled rows with the {0} backend'.format(name)
+    bench_json_decode.__doc__ = 'JSON decoding of 10k rows with the {0} backend'.format(name)
+    return {
+        'json_encode_{0}'.format(name): bench_json_encode,
+        'json_decode_{0}'.format(name): bench_json_decode,
+    }
+
+
+#: All the benchmarks cases by name
+CASES = {
+    'specs': bench_specs,
+    'stream_specs': bench_stream_specs,
+    'namespace_specs': bench_namespace_specs,
+    'add_resource': bench_add_resource,
+    'register_model': bench_register_model,
+    'models': bench_models,
+    'parser_to_params': bench_parser_to_params,
+    'merge': bench_merge,
+    'marshal': bench_marshal,
+    'generic_marshal': bench_generic_marshal,
+    'marshal_rows': bench_marshal_rows,
+    'marshal_list': bench_marshal_list,
+    'generic_marshal_list': bench_generic_marshal_list,
+    'marshal_mask': bench_marshal_mask,
+    'marshal_wide': bench_marshal_wide,
+    'marshal_wide_ordered': bench_marshal_wide_ordered,
+    'encode_list': bench_encode_list,
+    'fused_encode_list': bench_fused_encode_list,
+    'stream_list': bench_stream_list,
+}
+
+# Only the installed JSON backends are benchmarked
+for _name in installed_backends():
+    CASES.update(json_backend_cases(_name))
+
+
+def run(size='medium', cases=None, repeat=5):
+    '''
+    Run the benchmarks cases on a synthetic API size preset.
+
+    :return: the results as a JSON-serializable dictionnary
+    '''
+    results = {}
+    for name in cases or sorted(CASES):
+        setup, func = CASES[name](SIZES[size])
+        results[name] = measure(func, setup, repeat)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'size': size,
+        'parameters': SIZES[size],
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold=1.2):
+    '''
+    Compare results to a baseline.
+
+    :return: the names of the cases slower than their baseline by more than ``threshold`` times
+    '''
+    regressions = []
+    for name, result in sorted(results['results'].items()):
+        reference = baseline['results'].get(name)
+        if reference and result['min'] > reference['min'] * threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Swagger specifications generation')
+    parser.add_argument('cases', nargs='*', help='The cases to run among {0} (default to all)'.format(
+        ', '.join(sorted(CASES))))
+    parser.add_argument('-s', '--size', default='medium', choices=sorted(SIZES), help='The synthetic API size')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='The number of timed runs by case')
+    parser.add_argument('-o', '--output', help='Write the results as JSON into this file')
+    parser.add_argument('-c', '--compare', help='A JSON results file to compare with')
+    parser.add_argument('-t', '--threshold', type=float, default=1.2,
+        help='The slowdown ratio considered as a regression')
+    args = parser.parse_args(argv)
+    unknown = set(args.cases) - set(CASES)
+    if unknown:
+        parser.error('Unknown cases: {0}'.format(', '.join(sorted(unknown))))
+
+    results = run(args.size, args.cases, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with io.open(args.compare, encoding='utf8') as f:
+            baseline = json.load(f)
+
+    for name, result in sorted(results['results'].items()):
+        line = '{0:>20}: {1:10.2f} ms'.format(name, result['min'] * 1e3)
+        if result['peak_memory'] is not None:
+            line += ' {0:10.1f} KiB'.format(result['peak_memory'] / 1024.)
+        if baseline and name in baseline['results']:
+            line += ' {0:8.2f}x'.format(result['min'] / baseline['results'][name]['min'])
+        print(line)
+
+    if args.output:
+        with io.open(args.output, 'wb') as out:
+            out.write(json.dumps(results, indent=2, sort_keys=True).encode('utf8'))
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print('Regressions: {0}'.format(', '.join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
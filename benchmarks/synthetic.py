@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+'''
+Synthetic APIs builders for benchmarks.
+'''
+from __future__ import unicode_literals
+
+from flask import Flask
+
+from flask_restplus import Api, Resource, fields, reqparse
+
+
+#: Synthetic APIs sizes presets
+SIZES = {
+    'small': {'namespaces': 5, 'resources': 10, 'depth': 3, 'fields': 10, 'arguments': 10},
+    'medium': {'namespaces': 20, 'resources': 20, 'depth': 5, 'fields': 20, 'arguments': 20},
+    'large': {'namespaces': 50, 'resources': 40, 'depth': 10, 'fields': 30, 'arguments': 50},
+}
+
+
+def build_parser(arguments=20):
+    '''Build a request parser with arguments of various types and locations'''
+    parser = reqparse.RequestParser()
+    types = [int, str, bool, float]
+    locations = ['args', 'headers', 'values']
+    for i in range(arguments):
+        parser.add_argument('arg_{0}'.format(i),
+            type=types[i % len(types)],
+            location=locations[i % len(locations)],
+            required=not i % 3,
+            help='Argument {0}'.format(i),
+            choices=list(range(5)) if not i % 5 else (),
+        )
+    return parser
+
+
+def build_models(api, prefix, depth=5, size=10):
+    '''
+    Register a chain of ``depth`` models, each one nesting the next one.
+
+    :return: the head of the chain
+    '''
+    nested = None
+    for level in reversed(range(depth)):
+        specs = dict(
+            ('field_{0}'.format(i), fields.String(description='Field {0}'.format(i), required=bool(i % 2)))
+            for i in range(size)
+        )
+        if nested is not None:
+            specs['child'] = fields.Nested(nested)
+            specs['children'] = fields.List(fields.Nested(nested))
+        nested = api.model('{0}Level{1}'.format(prefix, level), specs)
+    return nested
+
+
+def build_resource(api, name, model, parser):
+    '''Build a documented resource class marshalling and expecting a given model'''
+    @api.doc(parser=parser)
+    @api.marshal_with(model)
+    def get(self, id):
+        '''Get an object'''
+        return {}
+
+    @api.doc(body=model, responses={404: 'Not found', 403: 'Forbidden'})
+    def put(self, id):
+        '''Update an object'''
+        return {}
+
+    @api.marshal_list_with(model)
+    def delete(self, id):
+        return {}
+
+    return api.doc(params={'id': 'The object identifier'})(type(str(name), (Resource,), {
+        'get': get,
+        'put': put,
+        'delete': delete,
+    }))
+
+
+def build_api(namespaces=10, resources=10, depth=5, fields=10, arguments=20, **kwargs):
+    '''
+    Build a Flask application exposing a synthetic API.
+
+    Each namespace has its own chain of ``depth`` nested models
+    and ``resources`` resources using it.
+
+    :return: a ``(app, api)`` tuple
+    '''
+    app = Flask(__name__)
+    api = Api(app, **kwargs)
+    parser = build_parser(arguments)
+    for i in range(namespaces):
+        ns = api.namespace('ns{0}'.format(i), 'Namespace {0}'.format(i))
+        model = build_models(api, 'Ns{0}'.format(i), depth, fields)
+        for j in range(resources):
+            resource = build_resource(api, 'Ns{0}Resource{1}'.format(i, j), model, parser)
+            ns.route('/resource{0}/<int:id>'.format(j), endpoint='ns{0}-resource{1}'.format(i, j))(resource)
+    return app, api
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
-from flask.ext.restful import marshal, marshal_with, abort  # noqa
+from flask.ext.restful import abort  # noqa
 
 from . import fields, reqparse, apidoc
 from .api import Api  # noqa
+from .marshalling import marshal, marshal_list, marshal_with  # noqa
 from .resource import Resource  # noqa
-from .exceptions import RestException, SpecsError, ValidationError
+from .exceptions import RestException, SpecsError, ValidationError, MaskError
 from .swagger import Swagger
 from .__about__ import __version__, __description__
 
@@ -15,9 +16,11 @@ __all__ = (
     'Resource',
     'apidoc',
     'marshal',
+    'marshal_list',
     'marshal_with',
     'abort',
     'fields',
+    'MaskError',
     'reqparse',
     'RestException',
     'SpecsError',
@@ -1,17 +1,29 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import io
+import os
+
 import six
 
-from flask import url_for
+from collections import OrderedDict
+from functools import partial
+from inspect import isclass, isfunction, ismethod
+
+from flask import url_for, request, current_app, stream_with_context
 from flask.ext import restful
 
 from . import apidoc
-from .model import ApiModel
+from .cache import CACHE_SIZE, CACHE_TTL, LRUCache, ResponseCache, SingleFlight
+from .marshalling import marshal, marshal_list, marshal_with, compile_model
+from .json_backends import get_backend
+from .mask import MASK_HEADER, MASK_PARAM
+from .model import ApiModel, model_dependencies
 from .namespace import ApiNamespace
+from .payload import Payload, canonical_json
+from .representations import NDJSON, output_json, output_ndjson
 from .resource import Resource
-from .swagger import Swagger
-from .utils import merge, default_id
+from .utils import merge, default_id, ReadOnlyDict
 from .reqparse import RequestParser
 
 
@@ -85,13 +97,35 @@ class Api(restful.Api):
     :param authorizations: A Swagger Authorizations declaration as dictionary
     :type authorizations: dict
 
+    :param spec_file: A prebuilt Swagger specifications file (see :mod:`flask_restplus.export`)
+        served as-is instead of the generated ones. Relative paths are resolved from the application root.
+    :type spec_file: str
+
+    :param stream_specs: Stream the generated Swagger specifications with a chunked response
+        instead of building and caching them in memory (meant for very large APIs)
+    :type stream_specs: bool
+
+    :param mask_header: The request header holding the fields mask of marshalled responses
+        (default to ``X-Fields``, ``None`` to disable it)
+    :type mask_header: str
+
+    :param mask_param: The query parameter holding the fields mask of marshalled responses
+        (disabled by default)
+    :type mask_param: str
+
+    :param json_backend: The JSON backend name or instance (see :mod:`flask_restplus.json_backends`)
+        encoding the JSON responses and the specifications and decoding the parsed request bodies
+        (default to the standard library, ``auto`` for the fastest installed one)
+    :type json_backend: str
+
     '''
 
     def __init__(self, app=None, version='1.0', title=None, description=None,
             terms_url=None, license=None, license_url=None,
             contact=None, contact_url=None, contact_email=None,
             authorizations=None, security=None, ui=True, default_id=default_id,
-            default='default', default_label='Default namespace', **kwargs):
+            default='default', default_label='Default namespace', spec_file=None, stream_specs=False,
+            mask_header=MASK_HEADER, mask_param=MASK_PARAM, json_backend=None, **kwargs):
         self.version = version
         self.title = title or 'API'
         self.description = description
@@ -105,15 +139,32 @@ class Api(restful.Api):
         self.security = security
         self.ui = ui
         self.default_id = default_id
+        self.spec_file = spec_file
+        self.stream_specs = stream_specs
+        self.mask_header = mask_header
+        self.mask_param = mask_param
+        self.json_backend = get_backend(json_backend)
 
         self.models = {}
+        self._dependencies = {}
         self.namespaces = []
+        self._specs = {}
+        self._swagger = None
+        self.frozen = False
         self.default_namespace = ApiNamespace(self, default, default_label,
             endpoint='{0}-declaration'.format(default),
             path='/'
         )
         self.add_namespace(self.default_namespace)
         super(Api, self).__init__(app, **kwargs)
+        # Keep JSON first: it is the one chosen for clients accepting anything
+        self.representations = OrderedDict(sorted(self.representations.items(),
+            key=lambda item: item[0] != 'application/json'))
+        # A dictionnary up to Flask-Restful 0.3.4, a list of pairs afterward
+        restful_json = dict(restful.DEFAULT_REPRESENTATIONS).get('application/json')
+        if self.representations.get('application/json') is restful_json:
+            self.representations['application/json'] = partial(output_json, backend=self.json_backend)
+        self.representations.setdefault(NDJSON, partial(output_ndjson, backend=self.json_backend))
 
     def init_app(self, app, **kwargs):
         self.title = kwargs.get('title', self.title)
@@ -124,8 +175,11 @@ class Api(restful.Api):
         self.contact_email = kwargs.get('contact_email', self.contact_email)
         self.license = kwargs.get('license', self.license)
         self.license_url = kwargs.get('license_url', self.license_url)
+        self._swagger = None
+        self.invalidate_specs()
 
-        self.add_resource(self.swagger_view(), '/swagger.json', endpoint='specs', doc=False)
+        self.add_resource(self.swagger_view(), '/swagger.json', '/swagger/<namespace>.json',
+            endpoint='specs', doc=False)
 
         super(Api, self).init_app(app)
 
@@ -148,8 +202,17 @@ class Api(restful.Api):
         class SwaggerView(Resource):
             api = self
 
-            def get(self):
-                return Swagger(self.api).as_dict()
+            def get(self, namespace=None):
+                ns = None
+                if namespace is not None:
+                    ns = self.api.get_namespace(namespace)
+                    if ns is None:
+                        self.api.abort(404)
+                if self.api.stream_specs and (ns or not self.api.spec_file):
+                    return current_app.response_class(
+                        stream_with_context(self.api.iter_specs(ns)), mimetype='application/json'
+                    )
+                return self.api.specs_payload_for(ns).make_response(conditional=True)
 
             def mediatypes(self):
                 return ['application/json']
@@ -163,15 +226,29 @@ class Api(restful.Api):
 
     def add_resource(self, resource, *urls, **kwargs):
         '''Register a Swagger API declaration for a given API Namespace'''
+        self._ensure_not_frozen()
         kwargs['endpoint'] = str(kwargs.pop('endpoint', None) or resource.__name__.lower())
-        if kwargs.pop('doc', True) and not kwargs.pop('namespace', None):
-            self.default_namespace.resources.append((resource, urls, kwargs))
+        documented = kwargs.pop('doc', True)
+        ns = kwargs.pop('namespace', None)
+        if documented and not ns:
+            ns = self.default_namespace
+            ns.resources.append((resource, urls, kwargs))
 
         super(Api, self).add_resource(resource, *urls, **kwargs)
+        if documented:
+            self.invalidate_specs(ns)
 
     def add_namespace(self, ns):
         if ns not in self.namespaces:
+            self._ensure_not_frozen()
             self.namespaces.append(ns)
+            self.invalidate_specs(ns)
+
+    def get_namespace(self, name):
+        '''Get a registered namespace given its name (``None`` if not found)'''
+        for ns in self.namespaces:
+            if ns.name == name:
+                return ns
 
     def namespace(self, *args, **kwargs):
         ns = ApiNamespace(self, *args, **kwargs)
@@ -190,6 +267,7 @@ class Api(restful.Api):
     def _handle_api_doc(self, cls, doc):
         if doc is False:
             cls.__apidoc__ = False
+            self._invalidate_specs_of(cls)
             return
         unshortcut_params_description(doc)
         for key in 'get', 'post', 'put', 'delete', 'options', 'head', 'patch':
@@ -198,6 +276,31 @@ class Api(restful.Api):
                     continue
                 unshortcut_params_description(doc[key])
         cls.__apidoc__ = merge(getattr(cls, '__apidoc__', {}), doc)
+        self._invalidate_specs_of(cls)
+
+    def _invalidate_specs_of(self, documented):
+        '''Drop the cached specifications exposing a documented resource or resource method'''
+        if isclass(documented) and issubclass(documented, restful.Resource):
+            resources = [documented]
+        elif isfunction(documented) or ismethod(documented):
+            func = getattr(documented, '__func__', documented)
+            resources = [
+                resource for ns in self.namespaces for resource, _, _ in ns.resources
+                if func in resource_methods(resource)
+            ]
+        else:
+            # Models documentation may appear anywhere
+            if self._swagger:
+                self._swagger.invalidate()
+            self.invalidate_specs()
+            return
+        # A resource not registered yet will invalidate its namespace on registration
+        for ns in self.namespaces:
+            for resource, _, _ in ns.resources:
+                if resource in resources:
+                    if self._swagger:
+                        self._swagger.invalidate_resource(resource)
+                    self.invalidate_specs(ns)
 
     def endpoint(self, name):
         if self.blueprint:
@@ -217,6 +320,162 @@ class Api(restful.Api):
     def base_path(self):
         return url_for(self.endpoint('root'))
 
+    @property
+    def specs(self):
+        '''The Swagger specifications as a dictionary'''
+        return self.specs_for()
+
+    @property
+    def specs_payload(self):
+        '''
+        The Swagger specifications as a canonical JSON :class:`~flask_restplus.payload.Payload`.
+
+        They are built once and cached by base path, host and representations.
+        If a ``spec_file`` has been given, it is loaded once and served as-is.
+        '''
+        return self.specs_payload_for()
+
+    def specs_for(self, namespace=None):
+        '''
+        The Swagger specifications of the whole API or of a single namespace as a dictionary
+
+        A new dictionnary is decoded from the cached payload on each call: it can be safely modified.
+
+        :param namespace: an optionnal namespace to restrict the specifications to
+        :type namespace: ApiNamespace
+        '''
+        return self.json_backend.loads(self.specs_payload_for(namespace).data.decode('utf8'))
+
+    def specs_payload_for(self, namespace=None):
+        '''
+        The Swagger specifications of the whole API or of a single namespace
+        as a canonical JSON :class:`~flask_restplus.payload.Payload`.
+
+        Each namespace specifications are built and cached separately.
+        The ``spec_file`` only replaces the whole API specifications.
+
+        :param namespace: an optionnal namespace to restrict the specifications to
+        :type namespace: ApiNamespace
+        '''
+        name = namespace.name if namespace else None
+        if self.spec_file and not namespace:
+            key = (name, self.spec_file)
+        else:
+            key = (name, self.base_path, request.host, tuple(self.representations))
+        generation = self._specs_generation(namespace)
+        cached = self._specs.get(key)
+        if cached is None or cached[0] != generation:
+            cached = self._specs[key] = generation, self._build_specs_payload(namespace)
+        return cached[1]
+
+    def _specs_generation(self, namespace=None):
+        # A static spec file never changes, generated specifications embed the models definitions
+        if self.spec_file and not namespace:
+            return None
+        from .swagger import definitions_generation
+        return definitions_generation()
+
+    def _build_specs_payload(self, namespace=None):
+        if self.spec_file and not namespace:
+            filename = os.path.join(current_app.root_path, self.spec_file)
+            with io.open(filename, 'rb') as specs:
+                return Payload(specs.read(), compress=True)
+        # Only keep the encoded specifications: the built ones share the cached fragments
+        specs = canonical_json(self.swagger.build(namespace), self.json_backend)
+        return Payload(specs, compress=True)
+
+    def iter_specs(self, namespace=None):
+        '''
+        Generate the Swagger specifications of the whole API or of a single namespace as JSON chunks.
+
+        Nothing is cached: the resources and models fragments already cached
+        by the buffered specifications are reused, the other ones are serialized on the fly.
+
+        :param namespace: an optionnal namespace to restrict the specifications to
+        :type namespace: ApiNamespace
+        '''
+        return self.swagger.iter_json(namespace)
+
+    @property
+    def swagger(self):
+        '''The :class:`~flask_restplus.swagger.Swagger` serializer keeping the specifications fragments'''
+        if self._swagger is None:
+            from .swagger import Swagger
+            self._swagger = Swagger(self)
+        return self._swagger
+
+    def invalidate_specs(self, namespace=None):
+        '''
+        Drop the cached Swagger specifications.
+
+        :param namespace: only drop the specifications of this namespace
+            (and the whole API ones which include it)
+        :type namespace: ApiNamespace
+        '''
+        if namespace is None:
+            self._specs.clear()
+            return
+        for key in list(self._specs):
+            if key[0] is None or key[0] == namespace.name:
+                del self._specs[key]
+
+    def warmup(self, app=None, base_url='/', freeze=True):
+        '''
+        Build everything computed lazily on first use: the models dependencies graph and marshallers,
+        the fields properties and the Swagger specifications of the API and each of its namespaces
+        (unless they are streamed).
+
+        Meant to be called from an application factory before a preforking server forks its workers,
+        so they share the warmed structures instead of each building its own copy.
+
+        :param app: the Flask application to build the specifications for
+            (default to the one given to the constructor)
+        :type app: flask.Flask
+
+        :param base_url: the URL used to build the request context
+            (use the public host so the cached specifications match the actual requests)
+        :type base_url: str
+
+        :param freeze: forbid any further registration (see :meth:`freeze`)
+        :type freeze: bool
+        '''
+        if app is None and not self.blueprint:
+            app = self.app
+        if app is None:
+            raise ValueError('An application is required to warm up an API registered on a blueprint')
+        for name, model in self.models.items():
+            self.model_dependencies(name)
+            if isinstance(model, ApiModel):
+                compile_model(model, link=True)
+        with app.test_request_context(base_url):
+            # Streamed specifications are never cached: only the fields properties are built for them
+            if not self.stream_specs:
+                self.specs_payload
+                for ns in self.namespaces:
+                    self.specs_payload_for(ns)
+            # Models not reachable from any resource may still be used for marshalling
+            for name, model in self.models.items():
+                self.swagger.serialize_definition(name, model, cache=not self.stream_specs)
+        if freeze:
+            self.freeze()
+
+    def freeze(self):
+        '''
+        Make the API registries read-only.
+
+        Registering a resource, a namespace or a model afterward raises a :class:`RuntimeError`.
+        '''
+        self.models = ReadOnlyDict(self.models)
+        self._dependencies = ReadOnlyDict(self._dependencies)
+        self.namespaces = tuple(self.namespaces)
+        for ns in self.namespaces:
+            ns.resources = tuple(ns.resources)
+        self.frozen = True
+
+    def _ensure_not_frozen(self):
+        if self.frozen:
+            raise RuntimeError('The API is frozen: nothing can be registered anymore')
+
     def doc(self, show=True, **kwargs):
         '''Add some api documentation to the decorated object'''
         def wrapper(documented):
@@ -227,6 +486,22 @@ class Api(restful.Api):
     def hide(self, func):
         return self.doc(False)(func)
 
+    def make_response(self, data, *args, **kwargs):
+        '''
+        Looks up the representation transformer for the requested mediatype.
+
+        A pre-encoded :class:`~flask_restplus.payload.Payload` is served untouched
+        when its media type is the negotiated one (otherwise, it is decoded and transformed as usual).
+        '''
+        if isinstance(data, Payload):
+            default = kwargs.get('fallback_mediatype') or self.default_mediatype
+            mediatype = request.accept_mimetypes.best_match(self.representations, default=default)
+            if mediatype == data.mimetype:
+                code = args[0] if args else kwargs.get('code', 200)
+                return data.make_response(code, kwargs.get('headers'))
+            data = data.decode()
+        return super(Api, self).make_response(data, *args, **kwargs)
+
     def abort(self, code=500, message=None, **kwargs):
         '''Properly abort the current request'''
         if message or kwargs and 'status' not in kwargs:
@@ -245,48 +520,169 @@ class Api(restful.Api):
             model = ApiModel(model)
             model.__apidoc__ = kwargs
             model.__apidoc__['name'] = name
-            self.models[name] = model
+            self._register_model(name, model)
             return model
         else:
             def wrapper(cls):
                 cls.__apidoc__ = merge(getattr(cls, '__apidoc__', {}), kwargs)
                 cls.__apidoc__['name'] = name or cls.__name__
-                self.models[name or cls.__name__] = kwargs.get('fields', cls)
+                self._register_model(name or cls.__name__, kwargs.get('fields', cls))
                 return cls
             return wrapper
 
+    def _register_model(self, name, specs):
+        self._ensure_not_frozen()
+        self.models[name] = specs
+        if isinstance(specs, ApiModel):
+            # An ApiModel maintains its own dependencies, even if modified after registration
+            specs.dependencies
+            self._dependencies.pop(name, None)
+        elif isinstance(specs, dict):
+            self._dependencies[name] = model_dependencies(specs)
+        else:
+            self._dependencies.pop(name, None)
+        if self._swagger:
+            self._swagger.invalidate_model(name)
+        self.invalidate_specs()
+
+    def model_dependencies(self, name):
+        '''The names of the models directly referenced by a registered model'''
+        specs = self.models[name]
+        if isinstance(specs, ApiModel):
+            return specs.dependencies
+        return self._dependencies.get(name, ())
+
     def parser(self):
-        '''Instanciate a RequestParser'''
-        return RequestParser()
+        '''Instanciate a RequestParser decoding the request body with the API JSON backend'''
+        return RequestParser(json_backend=self.json_backend)
 
     def as_list(self, field):
         '''Allow to specify nested lists for documentation'''
         field.__apidoc__ = merge(getattr(field, '__apidoc__', {}), {'as_list': True})
         return field
 
-    def marshal_with(self, fields, as_list=False, code=200, **kwargs):
+    def marshal_with(self, fields, as_list=False, code=200, stream=False, **kwargs):
         '''
         A decorator specifying the fields to use for serialization.
 
-        :param as_list: Indicate that the return type is a list (for the documentation)
+        :param as_list: Indicate that the return type is a list.
+            Any iterable is then accepted and marshalled in a single batch (see :func:`marshal_list`).
         :type as_list: bool
         :param code: Optionnaly give the expected HTTP response code if its different from 200
         :type code: integer
+        :param stream: Marshal the list lazily and send it as a chunked JSON array (implies ``as_list``)
+        :type stream: bool
+        :param encode: Encode the response straight into JSON without building intermediate dictionnaries
+        :type encode: bool
+        :param ordered: Marshal the response into ``OrderedDict`` instead of plain dictionnaries
+            (the default before Python 3.7)
+        :type ordered: bool
+        :param json_backend: The JSON backend of the encoded and streamed responses (default to the API one)
+        :type json_backend: str
+
+        Clients can restrict the marshalled fields with a mask (see :mod:`flask_restplus.mask`)
+        in the API ``mask_header`` or ``mask_param``, documented as operation parameters.
         '''
+        as_list = as_list or stream
+        kwargs.setdefault('json_backend', self.json_backend)
+        kwargs.setdefault('mask_header', self.mask_header)
+        kwargs.setdefault('mask_param', self.mask_param)
+
         def wrapper(func):
             doc = {'model': [fields]} if as_list else {'model': fields}
             doc['default_code'] = code
+            params = self.mask_params(kwargs['mask_header'], kwargs['mask_param'])
+            if params:
+                doc['params'] = params
+            func.__apidoc__ = merge(getattr(func, '__apidoc__', {}), doc)
+            return marshal_with(fields, as_list=as_list, stream=stream, **kwargs)(func)
+        return wrapper
+
+    def mask_params(self, header, param):
+        '''The Swagger parameters documenting a fields mask'''
+        params = {}
+        for name, location in ((header, 'header'), (param, 'query')):
+            if name:
+                params[name] = {
+                    'in': location,
+                    'type': 'string',
+                    'format': 'mask',
+                    'description': 'An optional fields mask',
+                }
+        return params
+
+    def cache(self, ttl=CACHE_TTL, max_entries=CACHE_SIZE, storage=None, vary=None, single_flight=False):
+        '''
+        A decorator caching the final encoded responses of a resource method.
+
+        Responses are cached by endpoint, view arguments, normalized query arguments,
+        negotiated media type and the values of the request headers they vary on
+        (see :class:`~flask_restplus.cache.ResponseCache`).
+        The cache policy is documented as an ``x-cache`` operation extension.
+
+        :param ttl: the time to live of a cached response in seconds
+        :type ttl: int
+        :param max_entries: the maximum number of entries of the default in-process LRU storage
+        :type max_entries: int
+        :param storage: an optional storage replacing the in-process one
+            (ie. a :class:`~flask_restplus.cache.SharedCache`)
+        :param vary: the request headers the responses vary on, besides the API fields mask header
+        :type vary: list
+        :param single_flight: Coalesce the concurrent cache misses into a single call (see :meth:`single_flight`)
+        :type single_flight: bool
+        '''
+        vary = self._vary_headers(vary)
+        if storage is None:
+            storage = LRUCache(max_entries)
+
+        def wrapper(func):
+            doc = {'cache': {'ttl': ttl, 'vary': sorted(set(vary))}}
             func.__apidoc__ = merge(getattr(func, '__apidoc__', {}), doc)
-            return restful.marshal_with(fields, **kwargs)(func)
+            if single_flight:
+                func = SingleFlight(vary)(func)
+            return ResponseCache(self, ttl, storage, vary)(func)
         return wrapper
 
-    def marshal_list_with(self, fields, code=200):
-        '''A shortcut decorator for ``marshal_with(as_list=True, code=code)``'''
-        return self.marshal_with(fields, True)
+    def single_flight(self, vary=None, timeout=None):
+        '''
+        A decorator coalescing the concurrent identical requests of a resource method:
+        they wait for a single call and share its result (see :class:`~flask_restplus.cache.SingleFlight`).
+
+        Requests are identical if they have the same endpoint, view arguments, normalized query arguments
+        and values of the request headers the results vary on.
+        Use it inside :meth:`cache` to coalesce the cache misses.
+
+        :param vary: the request headers the results vary on, besides the API fields mask header
+        :type vary: list
+        :param timeout: the maximum time a request waits for a call in flight in seconds
+        :type timeout: float
+        '''
+        return SingleFlight(self._vary_headers(vary), timeout)
+
+    def _vary_headers(self, vary=None):
+        vary = list(vary or [])
+        if self.mask_header:
+            vary.append(self.mask_header)
+        return vary
+
+    def marshal_list_with(self, fields, code=200, stream=False, **kwargs):
+        '''A shortcut decorator for ``marshal_with(as_list=True, code=code, stream=stream)``'''
+        return self.marshal_with(fields, True, code, stream, **kwargs)
+
+    def marshal(self, data, fields, *args, **kwargs):
+        '''A shortcut to the ``marshal`` helper (plain dictionnaries from Python 3.7 unless ``ordered=True``)'''
+        return marshal(data, fields, *args, **kwargs)
+
+    def marshal_list(self, data, fields, *args, **kwargs):
+        '''A shortcut to the ``marshal_list`` helper (plain dictionnaries from Python 3.7 unless ``ordered=True``)'''
+        return marshal_list(data, fields, *args, **kwargs)
+
 
-    def marshal(self, data, fields):
-        '''A shortcut to the ``marshal`` helper'''
-        return restful.marshal(data, fields)
+def resource_methods(resource):
+    '''The functions implementing a resource HTTP methods'''
+    for method in resource.methods or []:
+        impl = getattr(resource, method.lower(), None)
+        yield getattr(impl, '__func__', impl)
 
 
 def unshortcut_params_description(data):
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+'''
+Response caching and requests coalescing for resources methods
+(see :meth:`Api.cache <flask_restplus.Api.cache>` and :meth:`Api.single_flight <flask_restplus.Api.single_flight>`).
+
+The final encoded response is cached, keyed by endpoint, view arguments,
+normalized query arguments and negotiated media type.
+Responses varying on some request headers (their ``Vary`` header or the declared ones)
+are cached once by value of these headers.
+
+The storage is pluggable: an in-process :class:`LRUCache` by default
+or a :class:`SharedCache` wrapping a werkzeug/cachelib cache (Memcached, Redis...) shared by the workers.
+A storage only needs ``get(key)`` and ``set(key, value, ttl)`` methods.
+
+Concurrent identical requests can also be coalesced (:class:`SingleFlight`):
+only one of them runs the resource method while the others wait for its result.
+'''
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import sys
+import threading
+import time
+
+import six
+
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+from flask.ext.restful import unpack
+from werkzeug.wrappers import BaseResponse
+
+__all__ = ('LRUCache', 'SharedCache', 'ResponseCache', 'SingleFlight', 'request_key', 'CACHE_SIZE', 'CACHE_TTL')
+
+#: The default maximum number of entries of an in-process cache
+CACHE_SIZE = 1024
+
+#: The default time to live of a cached response in seconds
+CACHE_TTL = 60
+
+#: The cached requests methods
+CACHED_METHODS = ('GET', 'HEAD')
+
+
+class LRUCache(object):
+    '''
+    An in-process and thread-safe cache evicting the least recently used entries first.
+
+    :param max_entries: the maximum number of entries
+    :type max_entries: int
+
+    :param timer: the function giving the current time in seconds
+    '''
+    def __init__(self, max_entries=CACHE_SIZE, timer=time.time):
+        self.max_entries = max_entries
+        self.timer = timer
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        '''Get a value or ``None`` if missing or expired'''
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= self.timer():
+                return None
+            self._entries[key] = entry
+            return value
+
+    def set(self, key, value, ttl):
+        '''Store a value for ``ttl`` seconds'''
+        with self._lock:
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+            self._entries[key] = self.timer() + ttl, value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedCache(object):
+    '''
+    A storage shared by processes wrapping a werkzeug (``werkzeug.contrib.cache``)
+    or `cachelib <https://github.com/pallets/cachelib>`_ cache.
+
+    :param cache: the wrapped cache (ie. ``RedisCache`` or ``MemcachedCache``)
+    :param prefix: the prefix of the keys in the wrapped cache
+    :type prefix: str
+    '''
+    def __init__(self, cache, prefix='restplus:'):
+        self.cache = cache
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.cache.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.cache.set(self.prefix + key, value, timeout=ttl)
+
+    def clear(self):
+        '''Clear the whole wrapped cache'''
+        self.cache.clear()
+
+
+def _hash(parts):
+    text = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=six.text_type)
+    return hashlib.sha1(text.encode('utf8')).hexdigest()
+
+
+def request_key(*parts):
+    '''
+    Hash the current request endpoint, view arguments and normalized query arguments
+    (sorted by name, the values of a same argument keep their order) with some extra parts.
+    '''
+    return _hash([
+        request.endpoint,
+        sorted((request.view_args or {}).items()),
+        sorted(request.args.items(multi=True), key=lambda item: item[0]),
+        list(parts),
+    ])
+
+
+class ResponseCache(object):
+    '''
+    A decorator caching the encoded responses of a resource method.
+
+    Only successful (``2xx``), not streamed and cookie-free responses
+    to ``GET`` and ``HEAD`` requests are cached.
+    Cached responses are tagged with an ``ETag`` and served with the conditional requests support.
+
+    :param api: the API making the responses
+    :type api: flask_restplus.Api
+
+    :param ttl: the time to live of a cached response in seconds
+    :type ttl: int
+
+    :param storage: the cache storage (see :class:`LRUCache` and :class:`SharedCache`)
+
+    :param vary: the request headers the responses always vary on
+    :type vary: list
+    '''
+    def __init__(self, api, ttl=CACHE_TTL, storage=None, vary=None):
+        self.api = api
+        self.ttl = ttl
+        self.storage = LRUCache() if storage is None else storage
+        self.vary = tuple(sorted(set(header.lower() for header in vary or ())))
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if request.method not in CACHED_METHODS:
+                return func(*args, **kwargs)
+            key = self.key()
+            response = self.get(key)
+            if response is None:
+                response = func(*args, **kwargs)
+                if not isinstance(response, BaseResponse):
+                    data, code, headers = unpack(response)
+                    response = self.api.make_response(data, code, headers=headers)
+                self.set(key, response)
+            return response
+        wrapper.cache = self
+        return wrapper
+
+    def key(self):
+        '''The cache key of the current request (not including the varying headers)'''
+        mediatype = request.accept_mimetypes.best_match(self.api.representations,
+                                                        default=self.api.default_mediatype)
+        return request_key(mediatype)
+
+    def varying_key(self, key, headers):
+        '''The cache key of the current request variant given the headers it varies on'''
+        return _hash([key, [(header, request.headers.get(header)) for header in headers]])
+
+    def get(self, key):
+        '''Get the cached response of the current request or ``None``'''
+        varying = self.storage.get(key) or self.vary
+        cached = self.storage.get(self.varying_key(key, varying))
+        if cached is None:
+            return None
+        status, headers, data = cached
+        response = current_app.response_class(data, status, headers)
+        return response.make_conditional(request.environ)
+
+    def set(self, key, response):
+        '''Cache the response of the current request if cacheable'''
+        if not 200 <= response.status_code < 300 or response.is_streamed:
+            return
+        if 'Set-Cookie' in response.headers or '*' in response.vary:
+            return
+        if 'ETag' not in response.headers:
+            # Hashed once when cached so the cached response answers conditional requests
+            response.add_etag()
+        headers = tuple(sorted(set(self.vary).union(header.lower() for header in response.vary)))
+        if headers != self.vary:
+            self.storage.set(key, headers, self.ttl)
+        cached = response.status_code, list(response.headers.items()), response.get_data()
+        self.storage.set(self.varying_key(key, headers), cached, self.ttl)
+
+    def clear(self):
+        '''Drop all the cached responses (if the storage supports it)'''
+        self.storage.clear()
+
+
+class _Flight(object):
+    '''An in-flight computation'''
+    def __init__(self):
+        self.done = threading.Event()
+        self.followers = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    '''
+    A decorator coalescing the concurrent identical requests of a resource method.
+
+    Concurrent ``GET`` and ``HEAD`` requests with the same endpoint, view arguments,
+    normalized query arguments and ``vary`` request headers values wait for a single call
+    and share its result (or its exception).
+    The result is shared as-is: marshalled data must not be modified by the other decorators.
+    A response object is copied for each request, but a streamed one can't be shared:
+    its followers call the method themselves.
+
+    Requests are coalesced by process: each worker still makes its own call.
+
+    :param vary: the request headers the results vary on
+    :type vary: list
+
+    :param timeout: the maximum time a request waits for a call in flight in seconds
+        before calling the method itself (default to waiting until it ends)
+    :type timeout: float
+    '''
+    def __init__(self, vary=None, timeout=None):
+        self.vary = tuple(sorted(set(header.lower() for header in vary or ())))
+        self.timeout = timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if request.method not in CACHED_METHODS:
+                return func(*args, **kwargs)
+            key = self.key()
+            with self._lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight()
+                    leader = True
+                else:
+                    flight.followers += 1
+                    leader = False
+            if leader:
+                return self.lead(key, flight, func, args, kwargs)
+            if not flight.done.wait(self.timeout):
+                return func(*args, **kwargs)
+            if flight.error is not None:
+                raise flight.error
+            result = flight.result
+            if isinstance(result, BaseResponse):
+                if result.is_streamed:
+                    return func(*args, **kwargs)
+                result = current_app.response_class(result.get_data(), result.status_code,
+                                                    list(result.headers.items()))
+            return result
+        wrapper.single_flight = self
+        return wrapper
+
+    def key(self):
+        '''The key of the current request computation'''
+        return request_key([(header, request.headers.get(header)) for header in self.vary])
+
+    def lead(self, key, flight, func, args, kwargs):
+        '''Call the method for all the requests waiting on the flight'''
+        try:
+            flight.result = func(*args, **kwargs)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            six.reraise(*sys.exc_info())
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
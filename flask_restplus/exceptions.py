@@ -6,6 +6,7 @@ __all__ = (
     'RestException',
     'ValidationError',
     'SpecsError',
+    'MaskError',
 )
 
 
@@ -23,3 +24,8 @@ class ValidationError(RestException):
 class SpecsError(RestException):
     '''An helper class for incoherent specifications.'''
     pass
+
+
+class MaskError(RestException):
+    '''An helper class for malformed fields masks.'''
+    pass
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+'''
+Export the Swagger specifications of an API into a static file.
+
+Usage::
+
+    $ python -m flask_restplus.export myproject.wsgi:app myproject.api:api -o swagger.json
+
+The resulting file can be served as-is with ``Api(spec_file='swagger.json')``.
+'''
+from __future__ import unicode_literals, print_function
+
+import argparse
+import io
+
+from werkzeug.utils import import_string
+
+from .payload import canonical_json
+from .swagger import Swagger
+
+
+def export_specs(app, api, filename, base_url='/'):
+    '''
+    Generate the Swagger specifications of an API and write them into a file as canonical JSON
+    (encoded with the API JSON backend, so the file is the same than the served specifications).
+
+    :param app: the Flask application the API is registered on
+    :type app: flask.Flask
+
+    :param api: the API to export
+    :type api: flask_restplus.Api
+
+    :param filename: the output file path
+    :type filename: str
+
+    :param base_url: the URL used to build the test request context
+    :type base_url: str
+    '''
+    with app.test_request_context(base_url):
+        specs = Swagger(api).as_dict()
+    with io.open(filename, 'wb') as out:
+        out.write(canonical_json(specs, api.json_backend).encode('utf8'))
+    return specs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export the Swagger specifications of an API')
+    parser.add_argument('app', help='The Flask application import path (ie. myproject.wsgi:app)')
+    parser.add_argument('api', help='The API import path (ie. myproject.api:api)')
+    parser.add_argument('-o', '--output', default='swagger.json', help='The output file')
+    parser.add_argument('-u', '--base-url', default='/', help='The base URL of the request context')
+    args = parser.parse_args(argv)
+
+    app = import_string(args.app)
+    api = import_string(args.api)
+    export_specs(app, api, args.output, args.base_url)
+    print('Swagger specifications written into {0}'.format(args.output))
+
+
+if __name__ == '__main__':
+    main()
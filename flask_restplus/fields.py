@@ -4,11 +4,44 @@ from __future__ import unicode_literals
 from flask.ext.restful import fields as base_fields
 
 
+#: Field attributes used to build the Swagger property declaration
+DOCUMENTED_ATTRIBUTES = frozenset((
+    'description', 'required', 'readonly', 'minimum', 'maximum', 'enum', 'default',
+    'container', 'nested', 'allow_null', '__apidoc__',
+))
+
+#: Field attributes embedded into the compiled marshallers
+MARSHALLING_ATTRIBUTES = frozenset((
+    'attribute', 'default', 'nested', 'allow_null', 'container', 'dt_format',
+))
+
+
 class DescriptionMixin(object):
+    #: Set to ``True`` on fields whose documented attributes are computed on the fly
+    #: to disable the Swagger property caching
+    dynamic = False
+
+    #: The cached Swagger property declaration
+    _swagger_property = None
+
     def __init__(self, *args, **kwargs):
         self.description = kwargs.pop('description', None)
         super(DescriptionMixin, self).__init__(*args, **kwargs)
 
+    def __setattr__(self, name, value):
+        existing = hasattr(self, name)
+        super(DescriptionMixin, self).__setattr__(name, value)
+        if name in DOCUMENTED_ATTRIBUTES:
+            if self._swagger_property is not None:
+                del self._swagger_property
+            if existing:
+                # The definitions of the models holding this field are stale
+                from .swagger import invalidate_definitions
+                invalidate_definitions()
+        if existing and name in MARSHALLING_ATTRIBUTES:
+            from .marshalling import invalidate_marshallers
+            invalidate_marshallers()
+
 
 class DetailsMixin(DescriptionMixin):
     def __init__(self, *args, **kwargs):
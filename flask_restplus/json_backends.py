@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+'''
+Pluggable JSON backends.
+
+A backend encodes and decodes JSON with the same interface whatever the underlying library::
+
+    backend = get_backend('orjson')
+    text = backend.dumps(data, sort_keys=True, separators=(',', ':'))
+    data = backend.loads(text)
+
+The built-in backends are ``json`` (the standard library, always available),
+``simplejson``, ``ujson`` and ``orjson``.
+``auto`` selects the fastest installed one.
+A missing library falls back to ``json`` with a warning.
+
+``dumps`` accepts the ``json.dumps`` keyword arguments.
+Fast backends delegate to the standard library the settings (ie. ``cls`` or ``default``)
+and the data (ie. ``Decimal`` or huge integers) they do not support,
+so they never fail where the standard library would not.
+Their output may differ in whitespaces and escaping though
+(ie. ``orjson`` only indents by 2 spaces, ignores ``separators`` and never escapes non-ASCII characters).
+'''
+from __future__ import unicode_literals
+
+import json
+import warnings
+
+from collections import OrderedDict
+
+__all__ = ('JSONBackend', 'register_backend', 'get_backend', 'installed_backends', 'DEFAULT_BACKEND', 'AUTO_BACKEND')
+
+#: The standard library backend name, used by default
+DEFAULT_BACKEND = 'json'
+
+#: The name selecting the fastest installed backend
+AUTO_BACKEND = 'auto'
+
+
+class JSONBackend(object):
+    '''
+    A JSON encoder and decoder.
+
+    :param name: the backend name
+    :type name: str
+
+    :param dumps: a function encoding some data into JSON text given ``json.dumps`` keyword arguments
+    :type dumps: callable
+
+    :param loads: a function decoding some JSON text (or UTF-8 bytes)
+        and raising a ``ValueError`` on invalid input
+    :type loads: callable
+    '''
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        return '<JSONBackend {0}>'.format(self.name)
+
+
+def _with_fallback(dumps, supported, errors):
+    '''Wrap a fast ``dumps`` to use the standard library for the settings or the data it does not support'''
+    supported = frozenset(supported)
+
+    def wrapper(data, **settings):
+        if supported.issuperset(settings):
+            try:
+                return dumps(data, **settings)
+            except errors:
+                pass
+        return json.dumps(data, **settings)
+    return wrapper
+
+
+def _load_simplejson():
+    import simplejson
+    return JSONBackend('simplejson', simplejson.dumps, simplejson.loads)
+
+
+def _load_ujson():
+    import ujson
+
+    def dumps(data, ensure_ascii=True, sort_keys=False, indent=None, separators=None):
+        return ujson.dumps(data, ensure_ascii=ensure_ascii, sort_keys=sort_keys, indent=indent or 0,
+                           escape_forward_slashes=False)
+
+    dumps = _with_fallback(dumps, ('ensure_ascii', 'sort_keys', 'indent', 'separators'),
+                           (TypeError, OverflowError))
+    return JSONBackend('ujson', dumps, ujson.loads)
+
+
+def _load_orjson():
+    import orjson
+
+    def dumps(data, sort_keys=False, indent=None, ensure_ascii=True, separators=None):
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option).decode('utf8')
+
+    dumps = _with_fallback(dumps, ('ensure_ascii', 'sort_keys', 'indent', 'separators'), TypeError)
+    return JSONBackend('orjson', dumps, orjson.loads)
+
+
+_backends = {
+    DEFAULT_BACKEND: JSONBackend(DEFAULT_BACKEND, json.dumps, json.loads),
+}
+
+#: The optional backends loaders, the fastest first
+LOADERS = OrderedDict((
+    ('orjson', _load_orjson),
+    ('ujson', _load_ujson),
+    ('simplejson', _load_simplejson),
+))
+
+
+def register_backend(name, dumps, loads):
+    '''
+    Register a custom JSON backend (replacing any backend with the same name).
+
+    :param name: the backend name given to :func:`get_backend` or ``Api(json_backend=...)``
+    :type name: str
+
+    :param dumps: a function encoding some data into JSON text given ``json.dumps`` keyword arguments
+    :param loads: a function decoding some JSON text (or UTF-8 bytes)
+
+    :rtype: JSONBackend
+    '''
+    backend = _backends[name] = JSONBackend(name, dumps, loads)
+    return backend
+
+
+def _load(name):
+    backend = _backends.get(name)
+    if backend is None and name in LOADERS:
+        try:
+            backend = _backends[name] = LOADERS[name]()
+        except ImportError:
+            return None
+    return backend
+
+
+def get_backend(name=None):
+    '''
+    Get a JSON backend by name.
+
+    :param name: the backend name, ``auto`` for the fastest installed one
+        or ``None`` for the standard library. A backend instance is returned as-is.
+    :type name: str
+
+    :rtype: JSONBackend
+    :raises ValueError: if the backend is unknown
+    '''
+    if isinstance(name, JSONBackend):
+        return name
+    if name is None:
+        return _backends[DEFAULT_BACKEND]
+    if name == AUTO_BACKEND:
+        for candidate in LOADERS:
+            backend = _load(candidate)
+            if backend is not None:
+                return backend
+        return _backends[DEFAULT_BACKEND]
+    if name not in _backends and name not in LOADERS:
+        raise ValueError('Unknown JSON backend "{0}"'.format(name))
+    backend = _load(name)
+    if backend is None:
+        warnings.warn('The "{0}" JSON backend is not installed, falling back to "{1}"'.format(
+            name, DEFAULT_BACKEND))
+        backend = _backends[DEFAULT_BACKEND]
+    return backend
+
+
+def installed_backends():
+    '''The names of the registered and installed backends, the standard library first'''
+    names = [DEFAULT_BACKEND]
+    names.extend(name for name in LOADERS if _load(name) is not None)
+    names.extend(sorted(name for name in _backends if name not in names))
+    return names
@@ -0,0 +1,765 @@
+# -*- coding: utf-8 -*-
+'''
+Compiled marshalling of :class:`~flask_restplus.model.ApiModel` models.
+
+Each model is compiled once into a specialized function:
+field getters are flattened, the common formatters are inlined
+and there is no per-field dynamic dispatch anymore.
+The output is the same as the Flask-Restful generic ``marshal``
+(which is still used for any other fields dictionnary)
+except it is made of plain dictionnaries, faster to build and smaller than ``OrderedDict``.
+Plain dictionnaries only keep the fields order from Python 3.7:
+before, ``OrderedDict`` are built by default (see :data:`ORDERED`).
+'''
+from __future__ import unicode_literals
+
+import json
+import six
+import sys
+
+from collections import OrderedDict
+from functools import partial, wraps
+from itertools import islice
+from json.encoder import encode_basestring_ascii
+
+from flask import current_app, request, stream_with_context
+from flask.ext.restful import marshal as generic_marshal, unpack
+from flask.ext.restful import fields as base_fields
+
+from .json_backends import get_backend
+from .mask import request_mask
+from .model import ApiModel
+from .payload import Payload
+from .representations import NDJSON, json_settings
+
+__all__ = (
+    'marshal', 'marshal_list', 'marshal_with', 'encode', 'encode_list', 'iter_json_list', 'iter_ndjson_list',
+    'compile_model', 'compile_encoder', 'invalidate_marshallers',
+)
+
+#: The number of items marshalled and encoded together when streaming a list
+STREAM_CHUNK_SIZE = 100
+
+#: The maximum number of masked marshallers kept by model
+MASKED_MARSHALLERS_SIZE = 64
+
+
+#: Marshal into ``OrderedDict`` by default: plain dictionnaries only keep their insertion order from Python 3.7
+ORDERED = sys.version_info < (3, 7)
+
+#: The compiled encoders write the standard library JSON
+_dumps = json.dumps
+_STDLIB_BACKEND = get_backend()
+
+#: Incremented each time a model or a field changes to invalidate the compiled marshallers
+_generation = 0
+
+
+def invalidate_marshallers():
+    '''Force all the compiled marshallers to be compiled again on their next use'''
+    global _generation
+    _generation += 1
+
+
+def marshal(data, fields, envelope=None, mask=None, ordered=ORDERED):
+    '''
+    Same as the Flask-Restful ``marshal`` but using a compiled marshaller for :class:`ApiModel`.
+
+    :param data: the actual object(s) from which the fields are taken from
+    :param fields: a dict of whose keys will make up the final serialized response output
+    :param envelope: optional key that will be used to envelop the serialized response
+    :param mask: optionally only marshal the fields of this mask
+    :type mask: Mask
+    :param ordered: marshal :class:`ApiModel` into ``OrderedDict`` instead of plain dictionnaries
+        (default to :data:`ORDERED`)
+        (other fields dictionnaries are always marshalled into ``OrderedDict`` by Flask-Restful)
+    :type ordered: bool
+    '''
+    if not isinstance(fields, ApiModel):
+        return generic_marshal(data, mask.apply(fields) if mask else fields, envelope)
+    result = compile_model(fields, mask=mask, ordered=ordered)(data)
+    return _envelop(envelope, result, ordered) if envelope else result
+
+
+def _envelop(envelope, result, ordered=ORDERED):
+    return OrderedDict([(envelope, result)]) if ordered else {envelope: result}
+
+
+def marshal_list(data, fields, envelope=None, mask=None, ordered=ORDERED):
+    '''
+    Marshal a list of objects in a single batch.
+
+    Any iterable is accepted (generators, database cursors...) and consumed once.
+    With an :class:`ApiModel`, the rows are processed in a single loop by its compiled marshaller.
+    Dictionnaries, strings and non-iterable objects are marshalled as a single object by :func:`marshal`.
+
+    :param data: the objects from which the fields are taken from
+    :param fields: a dict of whose keys will make up the final serialized response output
+    :param envelope: optional key that will be used to envelop the serialized response
+    :param mask: optionally only marshal the fields of this mask
+    :type mask: Mask
+    :param ordered: marshal :class:`ApiModel` into ``OrderedDict`` instead of plain dictionnaries
+        (default to :data:`ORDERED`)
+    :type ordered: bool
+    '''
+    if isinstance(data, dict) or hasattr(data, 'strip') or not hasattr(data, '__iter__'):
+        return marshal(data, fields, envelope, mask, ordered)
+    if isinstance(fields, ApiModel):
+        result = compile_model(fields, mask=mask, ordered=ordered).many(data)
+    else:
+        fields = mask.apply(fields) if mask else fields
+        result = [generic_marshal(row, fields) for row in data]
+    return _envelop(envelope, result, ordered) if envelope else result
+
+
+def encode(data, fields, envelope=None, mask=None, backend=None):
+    '''
+    Marshal some data straight into JSON text, without building the intermediate dictionnaries.
+
+    The text is exactly what ``json.dumps`` gives for the :func:`marshal` output.
+    Only :class:`ApiModel` are encoded by a compiled encoder (see :func:`compile_encoder`)
+    and only with the standard library backend and the default Flask-Restful JSON settings:
+    otherwise, the data is marshalled then encoded by the JSON backend with these settings.
+
+    :param data: the actual object(s) from which the fields are taken from
+    :param fields: a dict of whose keys will make up the final serialized response output
+    :param envelope: optional key that will be used to envelop the serialized response
+    :param mask: optionally only encode the fields of this mask
+    :type mask: Mask
+    :param backend: the JSON backend name or instance (default to the standard library)
+    :rtype: str
+    '''
+    settings = json_settings()
+    backend = get_backend(backend)
+    if not isinstance(fields, ApiModel) or settings or backend is not _STDLIB_BACKEND:
+        return backend.dumps(marshal(data, fields, envelope, mask), **settings)
+    text = compile_encoder(fields, mask=mask)(data)
+    return '{{{0}: {1}}}'.format(_encode_key(envelope), text) if envelope else text
+
+
+def encode_list(data, fields, envelope=None, mask=None, backend=None):
+    '''
+    Same as :func:`encode` for a list of objects given as any iterable (see :func:`marshal_list`).
+    '''
+    if isinstance(data, dict) or hasattr(data, 'strip') or not hasattr(data, '__iter__'):
+        return encode(data, fields, envelope, mask, backend)
+    settings = json_settings()
+    backend = get_backend(backend)
+    if not isinstance(fields, ApiModel) or settings or backend is not _STDLIB_BACKEND:
+        return backend.dumps(marshal_list(data, fields, envelope, mask), **settings)
+    text = '[' + ', '.join(compile_encoder(fields, mask=mask).many(data)) + ']'
+    return '{{{0}: {1}}}'.format(_encode_key(envelope), text) if envelope else text
+
+
+def iter_json_list(data, fields, envelope=None, chunk_size=STREAM_CHUNK_SIZE, mask=None, ordered=ORDERED,
+                   backend=None):
+    '''
+    Lazily marshal an iterable into the chunks of a JSON array.
+
+    Only ``chunk_size`` items are held in memory at once: each chunk is marshalled
+    in a single batch (see :func:`marshal_list`) then encoded.
+    The Flask-Restful JSON settings are honored except ``indent``: the array is always compact.
+
+    :param data: the objects from which the fields are taken from
+    :param fields: a dict of whose keys will make up the final serialized response output
+    :param envelope: optional key that will be used to envelop the serialized response
+    :param chunk_size: the number of items by chunk
+    :type chunk_size: int
+    :param mask: optionally only marshal the fields of this mask
+    :type mask: Mask
+    :param ordered: marshal the items into ``OrderedDict`` (see :func:`marshal_list`)
+    :type ordered: bool
+    :param backend: the JSON backend name or instance encoding the items (default to the standard library)
+    '''
+    settings = json_settings()
+    dumps = get_backend(backend).dumps
+    item_separator, key_separator = settings.get('separators') or (', ', ': ')
+
+    yield '{{{0}{1}['.format(dumps(envelope), key_separator) if envelope else '['
+    rows = iter(data)
+    separator = ''
+    while True:
+        chunk = marshal_list(list(islice(rows, chunk_size)), fields, mask=mask, ordered=ordered)
+        if not chunk:
+            break
+        yield separator + item_separator.join(dumps(item, **settings) for item in chunk)
+        separator = item_separator
+    yield ']}' if envelope else ']'
+
+
+def iter_ndjson_list(data, fields, envelope=None, chunk_size=STREAM_CHUNK_SIZE, mask=None, ordered=ORDERED,
+                     backend=None):
+    '''
+    Lazily marshal an iterable into newline delimited JSON, one line by item.
+
+    Items are marshalled by chunks like :func:`iter_json_list` but each one is yielded on its own.
+    There is nothing to envelop: ``envelope`` is ignored.
+    '''
+    settings = json_settings()
+    dumps = get_backend(backend).dumps
+    rows = iter(data)
+    while True:
+        chunk = marshal_list(list(islice(rows, chunk_size)), fields, mask=mask, ordered=ordered)
+        if not chunk:
+            break
+        for item in chunk:
+            yield dumps(item, **settings) + '\n'
+
+
+#: Streamed lists encoders by media type, by order of preference
+STREAMED_FORMATS = OrderedDict([
+    ('application/json', iter_json_list),
+    (NDJSON, iter_ndjson_list),
+])
+
+
+def _encoder(as_list=False, backend=None):
+    '''Get a :func:`marshal` like function encoding into a JSON payload'''
+    encoder = encode_list if as_list else encode
+
+    def marshal(data, fields, envelope=None, mask=None):
+        return Payload(encoder(data, fields, envelope, mask, backend), backend=backend)
+    return marshal
+
+
+class marshal_with(object):
+    '''
+    Same as the Flask-Restful ``marshal_with`` decorator but using :func:`marshal`
+    or :func:`marshal_list` if ``as_list`` is ``True``.
+
+    With ``stream=True``, the list is marshalled lazily and sent as a chunked response
+    so the decorated function can return a generator: a JSON array (see :func:`iter_json_list`)
+    or JSON lines if the client accepts ``application/x-ndjson`` (see :func:`iter_ndjson_list`).
+
+    Clients can ask for a partial response with a fields mask (see :mod:`flask_restplus.mask`)
+    in the ``mask_header`` request header or the ``mask_param`` query parameter.
+    Both are disabled by default.
+
+    With ``encode=True``, the response is directly encoded into a JSON :class:`~flask_restplus.payload.Payload`
+    (see :func:`encode`), served as-is by the :class:`~flask_restplus.Api`.
+
+    With ``ordered=True``, the response is marshalled into ``OrderedDict`` instead of plain dictionnaries
+    (the default before Python 3.7, see :data:`ORDERED`).
+
+    The encoded and streamed responses are encoded by the ``json_backend``
+    (see :mod:`flask_restplus.json_backends`, default to the standard library).
+    '''
+    def __init__(self, fields, envelope=None, as_list=False, stream=False, mask_header=None, mask_param=None,
+                 encode=False, ordered=ORDERED, json_backend=None):
+        self.fields = fields
+        self.envelope = envelope
+        self.json_backend = get_backend(json_backend)
+        if encode:
+            self.marshal = _encoder(as_list or stream, self.json_backend)
+        else:
+            self.marshal = partial(marshal_list if as_list or stream else marshal, ordered=ordered)
+        self.stream = stream
+        self.ordered = ordered
+        self.mask_header = mask_header
+        self.mask_param = mask_param
+
+    def __call__(self, f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            resp = f(*args, **kwargs)
+            if isinstance(resp, tuple):
+                data, code, headers = unpack(resp)
+            else:
+                data, code, headers = resp, None, None
+            mask = request_mask(self.mask_header, self.mask_param) if self.mask_header or self.mask_param else None
+            if self.stream and not isinstance(data, dict) and not hasattr(data, 'strip') and hasattr(data, '__iter__'):
+                mediatype = request.accept_mimetypes.best_match(STREAMED_FORMATS, default='application/json')
+                chunks = STREAMED_FORMATS[mediatype](data, self.fields, self.envelope, mask=mask, ordered=self.ordered,
+                                                     backend=self.json_backend)
+                response = current_app.response_class(stream_with_context(chunks), mimetype=mediatype)
+                response.status_code = code or 200
+                response.headers.extend(headers or {})
+                return response
+            result = self.marshal(data, self.fields, self.envelope, mask)
+            return (result, code, headers) if isinstance(resp, tuple) else result
+        return wrapper
+
+
+def compile_model(model, link=False, mask=None, ordered=ORDERED):
+    '''
+    Get the compiled marshaller of a model, compiling it if needed.
+
+    The marshaller is cached on the model until it or any field changes.
+    The last used masked marshallers are cached too.
+
+    :param model: the model to compile
+    :type model: ApiModel
+
+    :param link: also compile the nested models marshallers and bind them directly
+        instead of on their first use
+    :type link: bool
+
+    :param mask: only marshal the fields of this mask
+    :type mask: Mask
+
+    :param ordered: marshal into ``OrderedDict`` instead of plain dictionnaries (default to :data:`ORDERED`)
+    :type ordered: bool
+
+    :return: a function marshalling an object or a list of objects
+    '''
+    compiler = _OrderedCompiler if ordered else None
+    if mask:
+        return _compile_masked(model, mask, compiler)
+    generation = _generation
+    cached = model._ordered_marshaller if ordered else model._marshaller
+    if cached is None or cached[0] != generation:
+        cached = generation, _compile(model, compiler=compiler)
+        if ordered:
+            model._ordered_marshaller = cached
+        else:
+            model._marshaller = cached
+    if link:
+        _link(cached[1], ordered)
+    return cached[1]
+
+
+def compile_encoder(model, mask=None):
+    '''
+    Get the compiled JSON encoder of a model, compiling it if needed.
+
+    The encoder follows the same plan as the compiled marshaller
+    but writes the JSON text straight from the source objects.
+    It is cached on the model until it or any field changes.
+
+    :param model: the model to compile
+    :type model: ApiModel
+
+    :param mask: only encode the fields of this mask
+    :type mask: Mask
+
+    :return: a function encoding an object or a list of objects
+    '''
+    if mask:
+        return _compile_masked(model, mask, _EncoderCompiler)
+    generation = _generation
+    cached = model._encoder
+    if cached is None or cached[0] != generation:
+        cached = model._encoder = generation, _compile(model, compiler=_EncoderCompiler)
+    return cached[1]
+
+
+def _compile_masked(model, mask, compiler=None):
+    generation = _generation
+    if model._masked is None or model._masked[0] != generation:
+        model._masked = generation, OrderedDict()
+    marshallers = model._masked[1]
+    key = str(mask) if compiler is None else '{0}:{1}'.format(compiler.prefix, mask)
+    func = marshallers.get(key)
+    if func is None:
+        func = _compile(model, mask, compiler)
+        if len(marshallers) >= MASKED_MARSHALLERS_SIZE:
+            try:
+                marshallers.popitem(last=False)
+            except KeyError:  # pragma: no cover
+                pass  # Already emptied by another thread
+        marshallers[key] = func
+    return func
+
+
+def _link(func, ordered=ORDERED):
+    # The nested marshallers are walked iteratively (models chains can be thousands deep)
+    # and only once: a compiled marshaller is dropped as a whole when anything changes
+    pending = [func]
+    while pending:
+        func = pending.pop()
+        if func.__linked__:
+            continue
+        func.__linked__ = True
+        namespace = six.get_function_globals(func)
+        for name, (nested, mask) in func.__stubs__.items():
+            nested_func = namespace[name] = compile_model(nested, mask=mask, ordered=ordered)
+            if not nested_func.__linked__:
+                pending.append(nested_func)
+
+
+def _get_key(key, obj):
+    '''Get an item or an attribute of an object like the Flask-Restful ``get_value`` (``None`` if missing)'''
+    if not hasattr(obj, 'strip') and hasattr(obj, '__iter__'):
+        try:
+            return obj[key]
+        except (IndexError, TypeError, KeyError):
+            pass
+    return getattr(obj, key, None)
+
+
+def _get_keys(keys, obj):
+    '''Follow a dotted path of items or attributes'''
+    for key in keys:
+        obj = _get_key(key, obj)
+    return obj
+
+
+def _unwrap(method):
+    return getattr(method, '__func__', method)
+
+
+def _inherits(field, method, base_method):
+    '''Wether a field class method is the base one (not overridden)'''
+    return _unwrap(getattr(type(field), method, None)) is _unwrap(base_method)
+
+
+#: Inlined expressions by base ``format`` method
+INLINED_FORMATS = (
+    (base_fields.Raw.format, '{value}'),
+    (base_fields.String.format, '_text({value})'),
+    (base_fields.Integer.format, 'int({value})'),
+    (base_fields.Boolean.format, 'bool({value})'),
+    (base_fields.Float.format, 'float({value})'),
+)
+
+
+#: Inlined JSON encoding expressions by base ``format`` method
+ENCODED_FORMATS = (
+    (base_fields.Raw.format, '_dumps({value})'),
+    (base_fields.String.format, '_str(_text({value}))'),
+    (base_fields.Integer.format, '_text(int({value}))'),
+    (base_fields.Boolean.format, '("true" if {value} else "false")'),
+    (base_fields.Float.format, '_float({value})'),
+)
+
+
+class _Compiler(object):
+    '''Generate the source code of a model marshaller (optionally restricted to a mask)'''
+    #: The generated functions names prefix
+    prefix = 'marshal'
+
+    #: The expression of a null value
+    null = 'None'
+
+    #: The expression marshalling ``obj`` when the compiled plan fails
+    fallback = '_generic_marshal(obj, _model)'
+
+    def __init__(self, model, mask=None):
+        self.model = model
+        self.mask = mask
+        self.name = '{0}_{1}'.format(self.prefix, id(model))
+        self.namespace = {
+            'OrderedDict': OrderedDict,
+            '_zip': six.moves.zip,
+            '_seq': (list, tuple),
+            '_text': six.text_type,
+            '_get_keys': _get_keys,
+            '_get_key': _get_key,
+            '_generic_marshal': generic_marshal,
+            '_model': mask.apply(model) if mask else model,
+            'getattr': getattr,
+            'hasattr': hasattr,
+            'isinstance': isinstance,
+            'int': int,
+            'float': float,
+            'bool': bool,
+            'dict': dict,
+        }
+        self.namespace['_namespace'] = self.namespace
+        self.stubs = {}
+        self.indexable_getters = []
+        self.object_getters = []
+        self.formatters = []
+        self.results = []
+
+    def constant(self, prefix, idx, value):
+        name = '{0}_{1}'.format(prefix, idx)
+        self.namespace[name] = value
+        return name
+
+    def default(self, prefix, idx, value):
+        '''Get the expression of a constant output value'''
+        return self.constant(prefix, idx, value)
+
+    def encode(self, expression):
+        '''Get the output expression of an already formatted value expression'''
+        return expression
+
+    def sequence(self, expression):
+        '''Get the output expression of a list of outputs expression'''
+        return expression
+
+    def compile_nested(self, nested, mask):
+        return compile_model(nested, mask=mask, ordered=False)
+
+    def generic(self, fields):
+        '''Get a function marshalling with the generic marshalling'''
+        return lambda data: generic_marshal(data, fields)
+
+    def nested(self, idx, nested, mask=None):
+        '''Get the name of a function marshalling a nested model (optionally restricted to a mask)'''
+        name = 'nested_{0}'.format(idx)
+        if not isinstance(nested, ApiModel):
+            return self.constant('nested', idx, self.generic(mask.apply(nested) if mask else nested))
+        namespace = self.namespace
+        compile_nested = self.compile_nested
+
+        def stub(data):
+            # Bind the nested marshaller on first use to support cyclic models
+            func = namespace[name] = compile_nested(nested, mask)
+            return func(data)
+
+        self.stubs[name] = nested, mask
+        namespace[name] = stub
+        return name
+
+    def compile(self):
+        mask = self.mask
+        fields = [(key, field) for key, field in self.model.items() if not mask or key in mask]
+        for idx, (key, field) in enumerate(fields):
+            nested_mask = mask[key] if mask and mask[key] is not True else None
+            self.add_field(idx, key, field, nested_mask)
+
+        body = []
+        if self.indexable_getters:
+            # Dictionnaries are by far the most common indexable objects: skip the slow attributes checks
+            body.append('if obj.__class__ is dict or not hasattr(obj, "strip") and hasattr(obj, "__iter__"):')
+            body.extend('    ' + line for line in self.indexable_getters)
+            body.append('else:')
+            body.extend('    ' + line for line in self.object_getters)
+        body.extend(self.formatters)
+        if not body:
+            body.append('pass')
+        result = self.result_expression([key for key, field in fields])
+        many = self.sequence('{0}_many(obj)'.format(self.name))
+
+        lines = ['def {0}(obj):'.format(self.name)]
+        lines.append('    if isinstance(obj, _seq):')
+        lines.append('        return {0}'.format(many))
+        lines.append('    try:')
+        lines.extend('        ' + line for line in body)
+        lines.append('    except Exception:')
+        lines.append('        # Let the generic marshalling raise the exact same error')
+        lines.append('        return {0}'.format(self.fallback))
+        lines.append('    return {0}'.format(result))
+        lines.append('')
+        # The same body unrolled in a single loop for lists of objects
+        lines.append('def {0}_many(rows):'.format(self.name))
+        # Resolve the fields plan once into local variables
+        lines.extend(
+            '    {0} = _namespace[{0!r}]'.format(str(name))
+            for name in sorted(self.namespace) if name != '_namespace'
+        )
+        lines.append('    results = []')
+        lines.append('    append = results.append')
+        lines.append('    for obj in rows:')
+        lines.append('        if isinstance(obj, _seq):')
+        lines.append('            append({0})'.format(many))
+        lines.append('            continue')
+        lines.append('        try:')
+        lines.extend('            ' + line for line in body)
+        lines.append('        except Exception:')
+        lines.append('            append({0})'.format(self.fallback))
+        lines.append('            continue')
+        lines.append('        append({0})'.format(result))
+        lines.append('    return results')
+        source = '\n'.join(lines)
+
+        label = self.model.__apidoc__.get('name')
+        if mask:
+            label = '{0} {{{1}}}'.format(label, mask)
+        code = compile(source, '<{0} {1}>'.format(self.prefix, label), 'exec')
+        six.exec_(code, self.namespace)
+        func = self.namespace[self.name]
+        func.many = self.namespace['{0}_many'.format(self.name)]
+        func.__source__ = source
+        func.__stubs__ = self.stubs
+        func.__linked__ = False
+        return func
+
+    def result_expression(self, keys):
+        '''Get the expression building the output from the ``result_<idx>`` variables'''
+        return '{{{0}}}'.format(', '.join(
+            '{0}: {1}'.format(self.key_expression(idx, key), result)
+            for idx, (key, result) in enumerate(zip(keys, self.results))
+        ))
+
+    def key_expression(self, idx, key):
+        '''Get the expression of an output key (a literal when possible)'''
+        return repr(key) if isinstance(key, six.string_types) else self.constant('key', idx, key)
+
+    def add_getter(self, idx, key, field):
+        '''Generate the code extracting the raw value of a field into ``value_<idx>``'''
+        key = key if field.attribute is None else field.attribute
+        var = 'value_{0}'.format(idx)
+        if callable(key):
+            line = '{0} = {1}(obj)'.format(var, self.constant('attribute', idx, key))
+        elif type(key) is int:
+            line = '{0} = _get_key({1}, obj)'.format(var, self.constant('attribute', idx, key))
+        elif '.' in key:
+            line = '{0} = _get_keys({1}, obj)'.format(var, self.constant('attribute', idx, key.split('.')))
+        else:
+            name = self.constant('attribute', idx, key)
+            self.indexable_getters.extend([
+                'try:',
+                '    {0} = obj[{1}]'.format(var, name),
+                'except (IndexError, TypeError, KeyError):',
+                '    {0} = getattr(obj, {1}, None)'.format(var, name),
+            ])
+            self.object_getters.append('{0} = getattr(obj, {1}, None)'.format(var, name))
+            return var
+        self.indexable_getters.append(line)
+        self.object_getters.append(line)
+        return var
+
+    def add_field(self, idx, key, field, mask=None):
+        result = 'result_{0}'.format(idx)
+        self.results.append(result)
+
+        if isinstance(field, dict):
+            self.formatters.append('{0} = {1}(obj)'.format(result, self.nested(idx, field, mask)))
+            return
+
+        if isinstance(field, type):
+            field = field()
+
+        if _inherits(field, 'output', base_fields.Raw.output):
+            expression = self.format_expression(idx, field)
+            if expression is not None:
+                value = self.add_getter(idx, key, field)
+                self.formatters.append('{0} = {1} if {2} is None else {3}'.format(
+                    result, self.default('default', idx, field.default), value, expression.format(value=value)
+                ))
+                return
+
+        elif _inherits(field, 'output', base_fields.Nested.output):
+            value = self.add_getter(idx, key, field)
+            nested = self.nested(idx, field.nested, mask)
+            self.formatters.append('{0} = {1} if {2} is None else {3}({2})'.format(
+                result, self.none_expression(idx, field, nested), value, nested
+            ))
+            return
+
+        elif all(_inherits(field, name, getattr(base_fields.List, name)) for name in ('output', 'format')):
+            value = self.add_getter(idx, key, field)
+            self.formatters.extend([
+                'if {0}.__class__ in _seq:'.format(value),
+                '    {0} = {1}'.format(result, self.items_expression(idx, field, value, mask)),
+                'elif {0} is None:'.format(value),
+                '    {0} = {1}'.format(result, self.default('default', idx, field.default)),
+                'else:',
+                '    {0} = {1}'.format(result, self.output_expression(idx, key, field)),
+            ])
+            return
+
+        # Fallback on the field own implementation
+        self.formatters.append('{0} = {1}'.format(result, self.output_expression(idx, key, field)))
+
+    def output_expression(self, idx, key, field):
+        '''Get the expression of a field output by its own implementation'''
+        return self.encode('{0}.output({1}, obj)'.format(
+            self.constant('field', idx, field), self.constant('key', idx, key)
+        ))
+
+    def format_expression(self, idx, field):
+        '''
+        Get an expression template formatting a non-null ``{value}``
+
+        :return: the template or ``None`` if the field format can't be inlined
+        '''
+        for method, expression in INLINED_FORMATS:
+            if _inherits(field, 'format', method):
+                return expression
+        return '{0}({{value}})'.format(self.constant('format', idx, field.format))
+
+    def none_expression(self, idx, field, nested):
+        '''Get the expression of a nested field output when its value is ``None``'''
+        if field.allow_null:
+            return self.null
+        elif field.default is not None:
+            return self.default('none', idx, field.default)
+        return '{0}(None)'.format(nested)
+
+    def items_expression(self, idx, field, value, mask=None):
+        '''Get an expression marshalling the items of a list or a tuple'''
+        container = field.container
+        if _inherits(container, 'output', base_fields.Nested.output) and container.attribute is None:
+            item_idx = 'item_{0}'.format(idx)
+            nested = self.nested(item_idx, container.nested, mask)
+            return self.sequence('[{0} if item is None else {1}(item) for item in {2}]'.format(
+                self.none_expression(item_idx, container, nested), nested, value
+            ))
+        return self.encode('{0}.format({1})'.format(self.constant('field', idx, field), value))
+
+
+class _OrderedCompiler(_Compiler):
+    '''Generate the source code of a model marshaller building ``OrderedDict``'''
+    prefix = 'ordered'
+
+    def compile_nested(self, nested, mask):
+        return compile_model(nested, mask=mask, ordered=True)
+
+    def result_expression(self, keys):
+        if not keys:
+            return 'OrderedDict()'
+        self.namespace['_keys'] = tuple(keys)
+        return 'OrderedDict(_zip(_keys, ({0},)))'.format(', '.join(self.results))
+
+
+def _encode_float(value):
+    value = float(value)
+    # NaN and infinites are not representable as is
+    return repr(value) if value - value == 0 else _dumps(value)
+
+
+def _encode_key(key):
+    '''Encode a dictionnary key the way ``json.dumps`` does (keys are always strings)'''
+    return _dumps({key: None})[1:-len(': null}')]
+
+
+class _EncoderCompiler(_Compiler):
+    '''Generate the source code of a model JSON encoder: the marshaller plan writing JSON text'''
+    prefix = 'encode'
+    null = "'null'"
+    fallback = '_dumps(_marshal(obj))'
+
+    def __init__(self, model, mask=None):
+        super(_EncoderCompiler, self).__init__(model, mask)
+        self.namespace.update({
+            '_dumps': _dumps,
+            '_str': encode_basestring_ascii,
+            '_float': _encode_float,
+            '_join': ''.join,
+            '_marshal': compile_model(model, mask=mask),
+        })
+
+    def default(self, prefix, idx, value):
+        try:
+            return self.constant(prefix, idx, _dumps(value))
+        except (TypeError, ValueError):
+            # Let the encoding raise on use like the marshalling path does
+            return '_dumps({0})'.format(self.constant(prefix, idx, value))
+
+    def encode(self, expression):
+        return '_dumps({0})'.format(expression)
+
+    def sequence(self, expression):
+        return '"[" + ", ".join({0}) + "]"'.format(expression)
+
+    def compile_nested(self, nested, mask):
+        return compile_encoder(nested, mask=mask)
+
+    def generic(self, fields):
+        return lambda data: _dumps(generic_marshal(data, fields))
+
+    def result_expression(self, keys):
+        if not keys:
+            return "'{}'"
+        parts = []
+        for idx, key in enumerate(keys):
+            prefix = ('{' if idx == 0 else ', ') + _encode_key(key) + ': '
+            parts.extend([self.constant('prefix', idx, prefix), self.results[idx]])
+        return '_join(({0}, "}}"))'.format(', '.join(parts))
+
+    def format_expression(self, idx, field):
+        if _inherits(field, 'format', base_fields.DateTime.format):
+            # The formatted dates are always strings
+            return '_str({0}({{value}}))'.format(self.constant('format', idx, field.format))
+        for method, expression in ENCODED_FORMATS:
+            if _inherits(field, 'format', method):
+                return expression
+        return '_dumps({0}({{value}}))'.format(self.constant('format', idx, field.format))
+
+
+def _compile(model, mask=None, compiler=None):
+    return (compiler or _Compiler)(model, mask).compile()
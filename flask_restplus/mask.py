@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+'''
+Fields masks for partial responses.
+
+A mask lists the wanted fields separated by commas,
+nested fields between brackets and the whole mask optionally enclosed in brackets::
+
+    name,age,owner{name,id}
+    {name,pets{name}}
+'''
+from __future__ import unicode_literals
+
+import re
+
+from collections import OrderedDict
+
+from flask import request
+from flask.ext.restful import abort
+
+from .exceptions import MaskError
+
+__all__ = ('Mask', 'parse', 'request_mask', 'MASK_HEADER', 'MASK_PARAM')
+
+#: The default request header holding the fields mask
+MASK_HEADER = 'X-Fields'
+
+#: The default query parameter holding the fields mask (disabled by default)
+MASK_PARAM = None
+
+#: The maximum number of parsed masks kept in cache
+PARSED_MASKS_SIZE = 256
+
+LEXER = re.compile(r'[{},]|[^{},]+')
+
+_parsed = OrderedDict()
+
+
+class Mask(OrderedDict):
+    '''
+    A parsed fields mask: every wanted field name is bound to ``True``
+    or to the :class:`Mask` of its own nested fields.
+    '''
+    def __str__(self):
+        '''The canonical mask: the same fields always give the same string'''
+        return ','.join(
+            '{0}{{{1}}}'.format(name, value) if isinstance(value, Mask) else name
+            for name, value in sorted(self.items())
+        )
+
+    def apply(self, fields):
+        '''
+        Project a fields dictionnary on this mask.
+
+        Nested masks are only applied to nested dictionnaries.
+        '''
+        projected = OrderedDict()
+        for name, field in fields.items():
+            if name not in self:
+                continue
+            mask = self[name]
+            projected[name] = mask.apply(field) if isinstance(mask, Mask) and isinstance(field, dict) else field
+        return projected
+
+
+def parse(value):
+    '''
+    Parse a fields mask (cached).
+
+    :param value: the mask to parse
+    :type value: str
+
+    :return: the parsed mask
+    :rtype: Mask
+    :raises MaskError: if the mask is malformed
+    '''
+    mask = _parsed.get(value)
+    if mask is None:
+        mask = _parse(value)
+        if len(_parsed) >= PARSED_MASKS_SIZE:
+            try:
+                _parsed.popitem(last=False)
+            except KeyError:  # pragma: no cover
+                pass  # Already emptied by another thread
+        _parsed[value] = mask
+    return mask
+
+
+def _parse(value):
+    tokens = [token.strip() for token in LEXER.findall(value)]
+    tokens = [token for token in tokens if token]
+    if tokens and tokens[0] == '{':
+        if tokens[-1] != '}':
+            raise MaskError('Missing closing bracket')
+        tokens = tokens[1:-1]
+
+    stack = [Mask()]
+    previous = None
+    for token in tokens:
+        if token == '{':
+            if previous in (None, '{', '}', ','):
+                raise MaskError('Unexpected opening bracket')
+            current = stack[-1]
+            if not isinstance(current[previous], Mask):
+                current[previous] = Mask()
+            stack.append(current[previous])
+        elif token == '}':
+            if len(stack) == 1:
+                raise MaskError('Unexpected closing bracket')
+            if not stack.pop():
+                raise MaskError('Empty nested mask')
+        elif token == ',':
+            if previous in (None, '{', ','):
+                raise MaskError('Unexpected comma')
+        else:
+            if re.search(r'\s', token):
+                raise MaskError('Missing comma in "{0}"'.format(token))
+            if previous == '}':
+                raise MaskError('Missing comma before "{0}"'.format(token))
+            stack[-1].setdefault(token, True)
+        previous = token
+
+    if len(stack) > 1:
+        raise MaskError('Missing closing bracket')
+    if previous == ',':
+        raise MaskError('Unexpected comma')
+    return stack[0]
+
+
+def request_mask(header=MASK_HEADER, param=MASK_PARAM):
+    '''
+    Get the fields mask of the current request if any.
+
+    The header has precedence over the query parameter.
+    A malformed mask aborts the request with a ``400 Bad Request``.
+
+    :param header: the request header holding the mask (``None`` to ignore headers)
+    :param param: the query parameter holding the mask (``None`` to ignore query parameters)
+    :rtype: Mask or None
+    '''
+    value = (header and request.headers.get(header)) or (param and request.args.get(param))
+    if not value:
+        return None
+    try:
+        return parse(value)
+    except MaskError as e:
+        abort(400, message='Invalid fields mask: {0}'.format(e.msg))
@@ -2,10 +2,86 @@
 from __future__ import unicode_literals
 
 from collections import MutableMapping
+from inspect import isclass
+
+from . import fields
+
+
+def referenced_model(field):
+    '''Get the name of the model referenced by a field if any'''
+    if isinstance(field, fields.Nested):
+        field = field.nested
+    elif isinstance(field, fields.List):
+        return referenced_model(field.container)
+    elif not (isinstance(field, fields.Raw) or (isclass(field) and issubclass(field, fields.Raw))):
+        return
+    apidoc = getattr(field, '__apidoc__', None)
+    if apidoc and not apidoc.get('type'):
+        return apidoc.get('name')
+
+
+def model_dependencies(specs):
+    '''Extract the names of the models directly referenced by a fields dictionnary'''
+    dependencies = []
+    for field in specs.values():
+        name = referenced_model(field)
+        if name and name not in dependencies:
+            dependencies.append(name)
+    return tuple(dependencies)
 
 
 class ApiModel(dict, MutableMapping):
     '''A thin wrapper on dict to store API doc metadata'''
     def __init__(self, *args, **kwargs):
         self.__apidoc__ = {}
+        self._dependencies = None
+        self._marshaller = None
+        self._ordered_marshaller = None
+        self._encoder = None
+        self._masked = None
         super(ApiModel, self).__init__(*args, **kwargs)
+
+    @property
+    def dependencies(self):
+        '''The names of the models directly referenced by this model (cached until it is modified)'''
+        if self._dependencies is None:
+            self._dependencies = model_dependencies(self)
+        return self._dependencies
+
+    def _changed(self):
+        from .swagger import invalidate_definitions
+        invalidate_definitions()
+        self._dependencies = None
+        compiled = (self._marshaller, self._ordered_marshaller, self._encoder)
+        if any(func is not None for func in compiled) or self._masked:
+            # Models nesting this one embed its compiled marshaller too
+            from .marshalling import invalidate_marshallers
+            invalidate_marshallers()
+
+    def __setitem__(self, key, value):
+        self._changed()
+        super(ApiModel, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._changed()
+        super(ApiModel, self).__delitem__(key)
+
+    def clear(self):
+        self._changed()
+        super(ApiModel, self).clear()
+
+    def pop(self, *args):
+        self._changed()
+        return super(ApiModel, self).pop(*args)
+
+    def popitem(self):
+        self._changed()
+        return super(ApiModel, self).popitem()
+
+    def setdefault(self, key, default=None):
+        self._changed()
+        return super(ApiModel, self).setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self._changed()
+        super(ApiModel, self).update(*args, **kwargs)
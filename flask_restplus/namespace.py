@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+from flask import url_for
+
 
 class ApiNamespace(object):
     def __init__(self, api, name, description=None, endpoint=None, path=None, **kwargs):
@@ -11,7 +13,13 @@ class ApiNamespace(object):
         self.resources = []
         self.models = []
 
+    @property
+    def specs_url(self):
+        '''The URL of this namespace own Swagger specifications'''
+        return url_for(self.api.endpoint('specs'), namespace=self.name, _external=True)
+
     def add_resource(self, resource, *urls, **kwargs):
+        self.api._ensure_not_frozen()
         self.resources.append((resource, urls, kwargs))
         self.api.add_resource(resource, *urls, namespace=self, **kwargs)
 
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import gzip
+import hashlib
+import io
+import json
+
+import six
+
+from collections import OrderedDict
+
+from flask import current_app, request
+
+from .json_backends import get_backend
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+def gzip_compress(data):
+    '''Compress some bytes with gzip in a reproducible way (no timestamp)'''
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(data)
+    return buf.getvalue()
+
+
+#: Supported content encodings by order of preference
+COMPRESSORS = [('gzip', gzip_compress)]
+if brotli is not None:
+    COMPRESSORS.insert(0, ('br', brotli.compress))
+
+
+def canonical_json(data, backend=None):
+    '''
+    Serialize some data into JSON with a stable key ordering and no extra whitespace.
+
+    The same data always gives the same output with the same JSON backend,
+    whatever the process or the interpreter.
+
+    :param backend: the JSON backend name or instance (default to the standard library)
+    '''
+    return get_backend(backend).dumps(data, sort_keys=True, separators=(',', ':'))
+
+
+class Payload(object):
+    '''
+    A pre-encoded response body identified by a content hash.
+
+    :param data: the encoded body
+    :type data: bytes
+
+    :param mimetype: the body media type
+    :type mimetype: str
+
+    :param value: the optional python value the body has been encoded from
+
+    :param compress: Precompress the body with every available encoding
+        (gzip and brotli if installed)
+    :type compress: bool
+
+    :param backend: the JSON backend name or instance decoding the body
+        (default to the standard library)
+    '''
+    def __init__(self, data, mimetype='application/json', value=None, compress=False, backend=None):
+        if isinstance(data, six.text_type):
+            data = data.encode('utf8')
+        self.data = data
+        self.mimetype = mimetype
+        self.value = value
+        self.backend = backend
+        self._etag = None
+        self.encodings = {'identity': data}
+        if compress:
+            for encoding, compressor in COMPRESSORS:
+                self.encodings[encoding] = compressor(data)
+
+    @classmethod
+    def from_json(cls, value, backend=None, **kwargs):
+        '''Build a JSON payload from some serializable data encoded with the given JSON backend'''
+        return cls(canonical_json(value, backend), value=value, backend=backend, **kwargs)
+
+    @property
+    def etag(self):
+        '''The body content hash (computed on first use)'''
+        if self._etag is None:
+            self._etag = hashlib.sha1(self.data).hexdigest()
+        return self._etag
+
+    def decode(self):
+        '''
+        Get the python value of a JSON payload, decoding its body with its JSON backend if it has not been given.
+
+        The standard library keeps the keys order (``OrderedDict``).
+        '''
+        if self.value is None:
+            text = self.data.decode('utf8')
+            backend = get_backend(self.backend)
+            if backend is get_backend():
+                self.value = json.loads(text, object_pairs_hook=OrderedDict)
+            else:
+                self.value = backend.loads(text)
+        return self.value
+
+    def negotiate(self):
+        '''Select the best available encoding given the request ``Accept-Encoding`` header'''
+        if len(self.encodings) == 1:
+            return 'identity'
+        candidates = [encoding for encoding, _ in COMPRESSORS if encoding in self.encodings]
+        candidates.append('identity')
+        return request.accept_encodings.best_match(candidates, default='identity')
+
+    def make_response(self, code=200, headers=None, conditional=False):
+        '''
+        Build a response serving this payload in the best accepted encoding.
+
+        :param conditional: Tag the response with the served variant ETag
+            and answer a matching ``If-None-Match`` with a ``304 Not Modified`` without body
+            (only for ``GET`` and ``HEAD`` requests with a ``200`` status)
+        :type conditional: bool
+        '''
+        encoding = self.negotiate()
+        etag = None
+        if conditional and code == 200 and request.method in ('GET', 'HEAD'):
+            etag = self.etag if encoding == 'identity' else '{0}-{1}'.format(self.etag, encoding)
+        if etag and request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304, headers=headers)
+        else:
+            response = current_app.response_class(self.encodings[encoding], code, headers,
+                                                  mimetype=self.mimetype)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        if len(self.encodings) > 1:
+            response.vary.add('Accept-Encoding')
+        if etag:
+            response.set_etag(etag)
+        return response
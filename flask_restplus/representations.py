@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+'''
+Response representations encoded by a pluggable JSON backend (see :mod:`flask_restplus.json_backends`).
+
+Besides JSON, newline delimited JSON (`NDJSON <http://ndjson.org/>`_, also known as JSON Lines)
+encodes each item of a list on its own line and sends it as soon as it is encoded.
+'''
+from __future__ import unicode_literals
+
+from flask import current_app, make_response, stream_with_context
+from flask.ext.restful.representations import json as json_representation
+
+from .json_backends import get_backend
+
+__all__ = ('NDJSON', 'restful_settings', 'json_settings', 'output_json', 'iter_ndjson', 'output_ndjson')
+
+#: The newline delimited JSON media type
+NDJSON = 'application/x-ndjson'
+
+
+def restful_settings():
+    '''
+    Get a copy of the Flask-Restful JSON encoding settings.
+
+    They are read from the ``RESTFUL_JSON`` application configuration (Flask-Restful 0.3.4+)
+    over the ``settings`` module attribute of older Flask-Restful versions.
+    '''
+    settings = dict(getattr(json_representation, 'settings', {}))
+    if current_app:
+        settings.update(current_app.config.get('RESTFUL_JSON', {}))
+    return settings
+
+
+def json_settings():
+    '''
+    Get the Flask-Restful JSON encoding settings for items encoded one by one.
+
+    ``indent`` is dropped: a streamed item is always encoded on a single line.
+    '''
+    settings = restful_settings()
+    settings.pop('indent', None)
+    if current_app and current_app.debug:
+        settings.setdefault('sort_keys', True)
+    return settings
+
+
+def output_json(data, code, headers=None, backend=None):
+    '''
+    Makes a Flask response with a JSON encoded body.
+
+    Same as the Flask-Restful one (settings, indented and sorted in debug, trailing newline when indented)
+    but encoded with the given JSON backend (default to the standard library).
+    '''
+    settings = restful_settings()
+    if current_app.debug:
+        settings.setdefault('indent', 4)
+        settings.setdefault('sort_keys', True)
+    dumped = get_backend(backend).dumps(data, **settings)
+    if 'indent' in settings:
+        dumped += '\n'
+    resp = make_response(dumped, code)
+    resp.headers.extend(headers or {})
+    return resp
+
+
+def iter_ndjson(data, backend=None):
+    '''
+    Encode some already marshalled data into JSON lines, one by item.
+
+    Anything but a list or a tuple is encoded as a single line.
+    '''
+    dumps = get_backend(backend).dumps
+    settings = json_settings()
+    if not isinstance(data, (list, tuple)):
+        data = [data]
+    for item in data:
+        yield dumps(item, **settings) + '\n'
+
+
+def output_ndjson(data, code, headers=None, backend=None):
+    '''Makes a Flask response streaming newline delimited JSON, one line by item'''
+    chunks = iter_ndjson(data, backend)
+    resp = current_app.response_class(stream_with_context(chunks), mimetype=NDJSON)
+    resp.status_code = code
+    resp.headers.extend(headers or {})
+    return resp
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+from flask import request
 from flask.ext.restful import marshal, reqparse
 
+from .json_backends import get_backend
 from .model import ApiModel
 
+_missing = object()
+
 
 class Argument(reqparse.Argument):
     def convert(self, value, op):
@@ -13,6 +17,47 @@ class Argument(reqparse.Argument):
         return super(Argument, self).convert(value, op)
 
 
+class JSONRequest(object):
+    '''
+    A request proxy decoding its JSON body with a JSON backend.
+
+    Like ``flask.Request.json``, the body is only decoded for the ``application/json`` mimetype
+    and a malformed body is handled by ``on_json_loading_failed`` (``400 Bad Request``).
+    Every other attribute is the proxied request one.
+    '''
+    def __init__(self, request, backend):
+        self._request = request
+        self._backend = backend
+        self._json = _missing
+
+    def __getattr__(self, name):
+        return getattr(self._request, name)
+
+    @property
+    def json(self):
+        if self._json is _missing:
+            if self._request.mimetype != 'application/json':
+                return None
+            charset = self._request.mimetype_params.get('charset') or 'utf-8'
+            try:
+                self._json = self._backend.loads(self._request.get_data().decode(charset))
+            except ValueError as e:
+                self._json = self._request.on_json_loading_failed(e)
+        return self._json
+
+
 class RequestParser(reqparse.RequestParser):
-    def __init__(self, argument_class=Argument, **kwargs):
+    '''
+    :param json_backend: the JSON backend name or instance decoding the request body
+        (see :mod:`flask_restplus.json_backends`, default to the Flask decoding)
+    '''
+    def __init__(self, argument_class=Argument, json_backend=None, **kwargs):
         super(RequestParser, self).__init__(argument_class, **kwargs)
+        self.json_backend = get_backend(json_backend) if json_backend else None
+
+    def parse_args(self, req=None, strict=False):
+        if req is None:
+            req = request
+        if self.json_backend is not None:
+            req = JSONRequest(req, self.json_backend)
+        return super(RequestParser, self).parse_args(req, strict)
@@ -3,8 +3,11 @@ from __future__ import unicode_literals, absolute_import
 
 import re
 import six
+import threading
+import weakref
 
-from inspect import isclass
+from copy import deepcopy
+from inspect import isclass, getmro
 from collections import Hashable
 from six import string_types
 
@@ -13,6 +16,7 @@ from flask import current_app
 
 from . import fields
 from .exceptions import SpecsError
+from .payload import canonical_json
 from .utils import merge
 
 
@@ -103,41 +107,185 @@ def extract_path_params(path):
     return params
 
 
+#: Registered field converters by field class (see :func:`register_field`)
+CONVERTERS = {}
+
+#: Field classes resolved to their (registered class, converter) through their MRO
+_RESOLVED_CONVERTERS = {}
+
+#: Incremented on each registration to invalidate the fields cached properties
+_converters_generation = 0
+
+#: Incremented when a model or a field documented attribute changes to invalidate the cached definitions
+_definitions_generation = 0
+
+#: The fields cached properties by representation: identical properties are shared by all their fields.
+#: Entries are weakly referenced and released with the last field holding them.
+_SHARED_PROPERTIES = weakref.WeakValueDictionary()
+
+#: Tracks whether the property being converted embeds other fields properties
+_conversion = threading.local()
+
+
+def register_field(cls, converter=None):
+    '''
+    Register how a field class (and its subclasses) is converted into a Swagger property.
+
+    The converter is either a static property declaration as a dictionnary
+    or a callable receiving the field instance and returning its property.
+    Documented attributes (description, required, min/max...) are handled afterward.
+
+    A field class explicitly registered takes precedence over its ``Api.model()`` documentation
+    which itself takes precedence over the converters inherited from parent classes.
+
+    Can be used as a decorator on a converter function::
+
+        @register_field(MyField)
+        def my_field_to_property(field):
+            return {'type': 'string', 'format': field.format_name}
+
+    :param cls: the field class
+    :type cls: type
+
+    :param converter: the Swagger property or a callable building it
+    :type converter: dict|callable
+    '''
+    global _converters_generation, _definitions_generation
+    if converter is None:
+        def wrapper(func):
+            register_field(cls, func)
+            return func
+        return wrapper
+    CONVERTERS[cls] = converter
+    _RESOLVED_CONVERTERS.clear()
+    _SHARED_PROPERTIES.clear()
+    _converters_generation += 1
+    _definitions_generation += 1
+    return converter
+
+
+def invalidate_definitions():
+    '''
+    Drop the cached models definitions and the specifications built from them.
+
+    Called whenever a model or a field documented attribute is modified.
+    '''
+    global _definitions_generation
+    _definitions_generation += 1
+
+
+def definitions_generation():
+    '''The current models definitions generation (see :func:`invalidate_definitions`)'''
+    return _definitions_generation
+
+
+def resolve_converter(cls):
+    '''
+    Find the converter of a field class by walking its MRO.
+
+    The resolution is done once per class and cached.
+
+    :return: a ``(registered class, converter)`` tuple, ``(None, None)`` if there is no converter
+    '''
+    try:
+        return _RESOLVED_CONVERTERS[cls]
+    except KeyError:
+        pass
+    resolved = None, None
+    for base in getmro(cls):
+        if base in CONVERTERS:
+            resolved = base, CONVERTERS[base]
+            break
+    _RESOLVED_CONVERTERS[cls] = resolved
+    return resolved
+
+
+@register_field(fields.List)
+def list_to_property(field):
+    return {'type': 'array', 'items': field_to_property(field.container)}
+
+
+@register_field(fields.Nested)
+def nested_to_property(field):
+    prop = ref(field.nested.__apidoc__['name'])
+    if getattr(field, '__apidoc__', {}).get('as_list'):
+        prop = {'type': 'array', 'items': prop}
+    elif not field.allow_null:
+        prop['required'] = True
+    return prop
+
+
+for _cls, _prop in FIELDS.items():
+    register_field(_cls, _prop)
+
+
 def field_to_property(field):
-    '''Convert a restful.Field into a Swagger property declaration'''
-    prop = {'type': 'string'}
-
-    if isinstance(field, fields.List):
-        nested_field = field.container
-        prop = {'type': 'array', 'items': field_to_property(nested_field)}
-
-    elif isinstance(field, fields.Nested):
-        nested_field = field.nested
-        prop = ref(nested_field.__apidoc__['name'])
-        if getattr(field, '__apidoc__', {}).get('as_list'):
-            prop = {'type': 'array', 'items': prop}
-        elif not field.allow_null:
-            prop['required'] = True
-
-    elif field in FIELDS:
-        prop = FIELDS[field].copy()
-
-    elif field.__class__ in FIELDS:
-        prop = FIELDS[field.__class__].copy()
-
-    elif hasattr(field, '__apidoc__'):
-        if 'type' in field.__apidoc__:
-            prop = {'type': field.__apidoc__['type']}
-            if 'format' in field.__apidoc__:
-                prop['format'] = field.__apidoc__['format']
-        elif 'fields' in field.__apidoc__:
-            prop = ref(field.__apidoc__.get('name', field.__class__.__name__))
+    '''
+    Convert a restful.Field into a Swagger property declaration
+
+    The property of a Flask-Restplus field instance is computed once and cached on the field
+    until one of its documented attributes changes (unless the field is ``dynamic``).
+    Fields with the same property share a single cached instance.
+
+    Properties embedding other fields properties (ie. a ``List`` items) are not cached
+    as they would not follow the changes of the embedded fields.
+    '''
+    # Let the enclosing conversion know it embeds another field property
+    _conversion.composite = True
+    if not isinstance(field, fields.DescriptionMixin) or field.dynamic:
+        return _field_to_property(field)
+    generation = _converters_generation
+    cached = field._swagger_property
+    if cached is not None and cached.generation == generation:
+        return dict(cached)
+    _conversion.composite = False
+    try:
+        prop = _field_to_property(field)
+        composite = _conversion.composite
+    finally:
+        _conversion.composite = True
+    if not composite:
+        field._swagger_property = _shared_property(generation, prop)
+    return prop
+
+
+class _SharedProperty(dict):
+    '''A cached field property shared by identical fields'''
+    __slots__ = ('generation', '__weakref__')
+
+
+def _shared_property(generation, prop):
+    # Converters always build the same properties in the same order: their representation is a cheap key
+    key = repr(prop)
+    cached = _SHARED_PROPERTIES.get(key)
+    if cached is None or cached.generation != generation:
+        cached = _SharedProperty(prop)
+        cached.generation = generation
+        _SHARED_PROPERTIES[key] = cached
+    return cached
+
+
+def _field_to_property(field):
+    cls = field if isclass(field) else field.__class__
+    owner, converter = resolve_converter(cls)
+    apidoc = getattr(field, '__apidoc__', None) or {}
+
+    if owner is not cls and ('type' in apidoc or 'fields' in apidoc):
+        if 'type' in apidoc:
+            prop = {'type': apidoc['type']}
+            if 'format' in apidoc:
+                prop['format'] = apidoc['format']
+        else:
+            prop = ref(apidoc.get('name', field.__class__.__name__))
+
+    elif isinstance(converter, dict):
+        prop = converter.copy()
+
+    elif converter is not None and not isclass(field):
+        prop = converter(field)
 
     else:
-        for cls in FIELDS:
-            if isinstance(field, cls) or (isclass(field) and issubclass(field, cls)):
-                prop = FIELDS[cls].copy()
-                break
+        prop = {'type': 'string'}
 
     if getattr(field, 'description', None):
         prop['description'] = field.description
@@ -199,11 +347,124 @@ def _handle_arg_type(arg, param):
 
 
 class Swagger(object):
+    '''
+    Build the Swagger specifications of an API.
+
+    Each resource paths and each model definition are serialized once and cached,
+    so a long-lived instance only computes what has been registered or invalidated
+    since the previous build (see :meth:`invalidate_resource` and :meth:`invalidate_model`).
+    Streamed specifications (see :meth:`iter_json`) only read this cache and never fill it.
+    '''
     def __init__(self, api):
         self.api = api
         self._registered_models = {}
+        self._paths = {}
+        self._definitions = {}
+        self._lock = threading.RLock()
+
+    def as_dict(self, namespace=None):
+        '''
+        Build the specifications of the whole API or of a single namespace.
+
+        A namespace specifications only contain its resources and the models they reach.
+        The returned dictionnary is detached from the cached fragments and can be safely modified.
+        '''
+        return deepcopy(self.build(namespace))
+
+    def build(self, namespace=None):
+        '''
+        Assemble the specifications of the whole API or of a single namespace from the cached fragments.
+
+        The result shares its paths and definitions with the cache: it must not be modified
+        (see :meth:`as_dict`).
+        '''
+        namespaces = [namespace] if namespace else self.api.namespaces
+        with self._lock:
+            self._registered_models = {}
+            try:
+                paths = {}
+                for ns in namespaces:
+                    for resource, urls, kwargs in ns.resources:
+                        for url in urls:
+                            operations, models = self.serialize_path(ns, resource, url)
+                            paths[extract_path(url)] = operations
+                            for model in models:
+                                self.register_model(model)
+                specs = self.serialize_header(namespaces)
+                specs['paths'] = not_none(paths)
+                specs['definitions'] = self.serialize_definitions() or None
+            finally:
+                self._registered_models = {}
+        return not_none(specs)
 
-    def as_dict(self):
+    def iter_json(self, namespace=None):
+        '''
+        Serialize the specifications of the whole API or of a single namespace as JSON chunks.
+
+        Paths are emitted one resource at a time, then definitions one model at a time,
+        so the whole specifications are never held in memory:
+        fragments already cached by :meth:`build` (or :meth:`~flask_restplus.Api.warmup`) are reused
+        but the other ones are serialized on the fly and dropped once emitted.
+        Only the paths entries and the names of the models reached by the emitted paths
+        are kept during the generation.
+        The output is the same canonical JSON than the one built from :meth:`as_dict`
+        (encoded with the API JSON backend) except that the ``definitions`` come last.
+        '''
+        dumps = self._canonical_json
+        namespaces = [namespace] if namespace else self.api.namespaces
+        entries = {}
+        for ns in namespaces:
+            for resource, urls, kwargs in ns.resources:
+                for url in urls:
+                    entries[extract_path(url)] = ns, resource, url
+
+        specs = self.serialize_header(namespaces)
+        specs['paths'] = None
+        models = {}
+        yield '{'
+        for idx, key in enumerate(sorted(specs)):
+            yield '{0}{1}:'.format(',' if idx else '', dumps(key))
+            if key == 'paths':
+                for chunk in self._iter_paths(entries, models):
+                    yield chunk
+            else:
+                yield dumps(specs[key])
+        # The reached models are only known once the paths are emitted
+        if models:
+            yield ',{0}:'.format(dumps('definitions'))
+            for chunk in self._iter_definitions(models):
+                yield chunk
+        yield '}'
+
+    def _canonical_json(self, data):
+        return canonical_json(data, self.api.json_backend)
+
+    def _iter_paths(self, entries, models):
+        '''Emit the paths and collect the models they reach into ``models``'''
+        dumps = self._canonical_json
+        yield '{'
+        separator = ''
+        for path in sorted(entries):
+            with self._lock:
+                operations, reached = self.serialize_path(*entries[path], cache=False)
+            self.collect_models(reached, models)
+            if operations is None:
+                continue
+            yield '{0}{1}:{2}'.format(separator, dumps(path), dumps(operations))
+            separator = ','
+        yield '}'
+
+    def _iter_definitions(self, models):
+        dumps = self._canonical_json
+        yield '{'
+        for idx, name in enumerate(sorted(models)):
+            with self._lock:
+                definition = self.serialize_definition(name, models[name], cache=False)
+            yield '{0}{1}:{2}'.format(',' if idx else '', dumps(name), dumps(definition))
+        yield '}'
+
+    def serialize_header(self, namespaces):
+        '''Serialize the specifications root properties except ``paths`` and ``definitions``'''
         basepath = self.api.base_path
         if len(basepath) > 1 and basepath.endswith('/'):
             basepath = basepath[:-1]
@@ -226,35 +487,29 @@ class Swagger(object):
             if self.api.license_url:
                 infos['license']['url'] = self.api.license_url
 
-        paths = {}
-        tags = []
-        for ns in self.api.namespaces:
-            tags.append({
-                'name': ns.name,
-                'description': ns.description
-            })
-            for resource, urls, kwargs in ns.resources:
-                for url in urls:
-                    paths[extract_path(url)] = self.serialize_resource(ns, resource, url)
+        tags = [{'name': ns.name, 'description': ns.description} for ns in namespaces]
 
-        specs = {
+        return not_none({
             'swagger': '2.0',
             'basePath': basepath,
-            'paths': not_none(paths),
             'info': infos,
             'produces': list(self.api.representations.keys()),
             'consumes': ['application/json'],
             'securityDefinitions': self.api.authorizations or None,
             'security': self.security_requirements(self.api.security) or None,
             'tags': tags,
-            'definitions': self.serialize_definitions() or None,
-        }
-        return not_none(specs)
+        })
 
     def extract_resource_doc(self, resource, url):
+        '''
+        Extract the documentation of a resource for a given URL.
+
+        This never alters the resource ``__apidoc__``: a new structure is built on each call.
+        '''
         doc = getattr(resource, '__apidoc__', {})
         if doc is False:
             return False
+        doc = dict(doc)
         doc['name'] = resource.__name__
         doc['params'] = self.merge_params(extract_path_params(url), doc)
         for method in [m.lower() for m in resource.methods or []]:
@@ -295,6 +550,44 @@ class Swagger(object):
 
         return params
 
+    def serialize_path(self, ns, resource, url, cache=True):
+        '''
+        Serialize a resource for a given URL (cached until the resource is invalidated).
+
+        :param cache: store the serialized paths (otherwise an already cached one is still used)
+        :type cache: bool
+
+        :return: a ``(operations, models)`` tuple where ``models`` are the names of the models it reaches
+        '''
+        key = ns, url
+        fragments = self._paths.get(resource)
+        if fragments is not None and key in fragments:
+            return fragments[key]
+        registered, self._registered_models = self._registered_models, {}
+        try:
+            fragment = self.serialize_resource(ns, resource, url), tuple(self._registered_models)
+        finally:
+            self._registered_models = registered
+        if cache:
+            self._paths.setdefault(resource, {})[key] = fragment
+        return fragment
+
+    def invalidate_resource(self, resource):
+        '''Drop the cached paths of a resource'''
+        with self._lock:
+            self._paths.pop(resource, None)
+
+    def invalidate_model(self, name):
+        '''Drop the cached definition of a model'''
+        with self._lock:
+            self._definitions.pop(name, None)
+
+    def invalidate(self):
+        '''Drop all the cached paths and definitions'''
+        with self._lock:
+            self._paths.clear()
+            self._definitions.clear()
+
     def serialize_resource(self, ns, resource, url):
         doc = self.extract_resource_doc(resource, url)
         if doc is False:
@@ -315,6 +608,7 @@ class Swagger(object):
             'operationId': self.operation_id_for(doc, method),
             'parameters': self.parameters_for(doc, method) or None,
             'security': self.security_for(doc, method),
+            'x-cache': doc[method].get('cache'),
         }
         # Handle form exceptions:
         if operation['parameters'] and any(p['in'] == 'formData' for p in operation['parameters']):
@@ -352,11 +646,9 @@ class Swagger(object):
     def parameters_for(self, doc, method):
         params = []
         for name, param in merge(doc['params'], doc[method]['params']).items():
-            param['name'] = name
-            if 'type' not in param:
-                param['type'] = 'string'
-            if 'in' not in param:
-                param['in'] = 'query'
+            param = dict(param, name=name)
+            param.setdefault('type', 'string')
+            param.setdefault('in', 'query')
             params.append(param)
         return params
 
@@ -401,10 +693,28 @@ class Swagger(object):
 
     def serialize_definitions(self):
         return dict(
-            (name, self.serialize_model(name, model))
+            (name, self.serialize_definition(name, model))
             for name, model in self._registered_models.items()
         )
 
+    def serialize_definition(self, name, model, cache=True):
+        '''
+        Serialize a registered model.
+
+        Cached until the model, one of its fields documented attributes or the fields converters change.
+
+        :param cache: store the serialized definition (otherwise an already cached one is still used)
+        :type cache: bool
+        '''
+        generation = _definitions_generation
+        cached = self._definitions.get(name)
+        if cached is not None and cached[0] is model and cached[1] == generation:
+            return cached[2]
+        definition = self.serialize_model(name, model)
+        if cache:
+            self._definitions[name] = model, generation, definition
+        return definition
+
     def serialize_field(self, field):
         return field_to_property(field)
 
@@ -443,20 +753,24 @@ class Swagger(object):
         raise ValueError('Model {0} not registered'.format(model))
 
     def register_model(self, model):
-        if model not in self.api.models:
-            raise ValueError('Model {0} not registered'.format(model))
-        specs = self.api.models[model]
-        self._registered_models[model] = specs
-        if isinstance(specs, dict):
-            for name, field in specs.items():
-                if isinstance(field, fields.Nested) and hasattr(field.nested, '__apidoc__'):
-                    self.register_model(field.nested.__apidoc__['name'])
-                elif isinstance(field, fields.List) and hasattr(field.container, '__apidoc__'):
-                    self.register_model(field.container.__apidoc__['name'])
-                elif (isinstance(field, fields.Raw)
-                        or (isclass(field) and issubclass(field, fields.Raw))
-                        ) and hasattr(field, '__apidoc__') and not field.__apidoc__.get('type'):
-                    self.register_model(field.__apidoc__['name'])
+        '''
+        Register a model and all the models it depends on, directly or not.
+
+        The dependency graph is walked iteratively so cyclic models are supported.
+        '''
+        self.collect_models([model], self._registered_models)
+
+    def collect_models(self, names, models):
+        '''Add some models and all the models they depend on into a ``{name: model}`` dictionnary'''
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name in models:
+                continue
+            if name not in self.api.models:
+                raise ValueError('Model {0} not registered'.format(name))
+            models[name] = self.api.models[name]
+            pending.extend(self.api.model_dependencies(name))
 
     def security_for(self, doc, method):
         security = None
@@ -3,28 +3,54 @@ from __future__ import unicode_literals
 
 import re
 
-from copy import deepcopy
+from copy import copy
 
 FIRST_CAP_RE = re.compile('(.)([A-Z][a-z]+)')
 ALL_CAP_RE = re.compile('([a-z0-9])([A-Z])')
 
 
-def merge(first, second):
+class ReadOnlyDict(dict):
+    '''A dictionnary raising a ``TypeError`` on any mutation attempt'''
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('{0} is read-only'.format(self.__class__.__name__))
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+
+def merge(first, second, readonly=False):
     '''
     Recursively merges two dictionnaries.
 
     Second dictionnary values will take precedance over those from the first one.
     Nested dictionnaries are merged too.
+
+    Only the merged levels are copied: unchanged values and subtrees are shared
+    with the inputs, so they should be considered as immutable.
+
+    :param readonly: return the merged levels as :class:`ReadOnlyDict`
+    :type readonly: bool
     '''
     if not isinstance(second, dict):
         return second
-    result = deepcopy(first)
+    if not isinstance(first, dict):
+        if not second:
+            return first
+        first = {}
+    if readonly or type(first) in (dict, ReadOnlyDict):
+        result = dict(first)
+    else:
+        # Preserve dict subclasses like ApiModel
+        result = copy(first)
     for key, value in second.items():
         if key in result and isinstance(result[key], dict):
-                result[key] = merge(result[key], value)
+            result[key] = merge(result[key], value, readonly)
         else:
-            result[key] = deepcopy(value)
-    return result
+            result[key] = value
+    return ReadOnlyDict(result) if readonly else result
 
 
 def camel_to_dash(value):
@@ -49,12 +49,13 @@ setup(
     url='https://github.com/noirbizarre/flask-restplus',
     author='Axel Haustant',
     author_email='axel@data.gouv.fr',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     include_package_data=True,
     install_requires=['flask-restful >= 0.3'],
     tests_require=tests_require,
     extras_require={
         'test': tests_require,
+        'brotli': ['brotli'],
     },
     license='MIT',
     use_2to3=True,
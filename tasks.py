@@ -36,6 +36,23 @@ def cover():
         --with-coverage --cover-html --cover-package=flask_restplus'.format(ROOT), pty=True)
 
 
+@task
+def specs(app, api, output='swagger.json'):
+    '''Export an API Swagger specifications (ie. invoke specs myproject.wsgi:app myproject.api:api)'''
+    run('python -m flask_restplus.export {0} {1} -o {2}'.format(app, api, output))
+
+
+@task
+def bench(size='medium', output=None, compare=None):
+    '''Run the specifications generation benchmarks (ie. invoke bench --output=baseline.json)'''
+    cmd = 'cd {0} && python -m benchmarks.suite --size {1}'.format(ROOT, size)
+    if output:
+        cmd += ' --output {0}'.format(output)
+    if compare:
+        cmd += ' --compare {0}'.format(compare)
+    run(cmd, pty=True)
+
+
 @task
 def tox():
     '''Run test in all Python versions'''
@@ -3,6 +3,8 @@ from __future__ import unicode_literals
 
 import json
 
+from collections import OrderedDict
+
 from flask import url_for, Blueprint
 from flask.ext import restplus
 
@@ -164,3 +166,267 @@ class APITestCase(TestCase):
             },
             'other': {'description': 'another param'},
         }})
+
+    def test_warmup(self):
+        api = restplus.Api(self.app)
+        ns = api.namespace('ns', 'Test namespace')
+        person = api.model('Person', {'name': restplus.fields.String})
+        api.model('Unreachable', {'name': restplus.fields.String})
+
+        @ns.route('/test/', endpoint='test')
+        class TestResource(restplus.Resource):
+            @api.marshal_with(person)
+            def get(self):
+                return {}
+
+        api.warmup(freeze=False)
+
+        self.assertEqual(len(api._specs), 3)
+        self.assertIn('Unreachable', api.swagger._definitions)
+        self.assertIsNotNone(person.dependencies)
+        with self.context():
+            specs = api.specs
+            self.assertEqual(len(api._specs), 3)
+            self.assertIn('Person', specs['definitions'])
+
+    def test_warmup_deep_models_chain(self):
+        api = restplus.Api(self.app)
+        model = api.model('Model0', {'name': restplus.fields.String})
+        for i in range(1, 1500):
+            model = api.model('Model{0}'.format(i), {'nested': restplus.fields.Nested(model)})
+
+        api.warmup()
+
+        self.assertEqual(len(api.swagger._definitions), 1500)
+
+    def test_warmup_with_blueprint(self):
+        blueprint = Blueprint('api', __name__, url_prefix='/api')
+        api = restplus.Api(blueprint)
+        self.app.register_blueprint(blueprint)
+
+        with self.assertRaises(ValueError):
+            api.warmup()
+
+        api.warmup(self.app, base_url='http://api.example.com/')
+        self.assertEqual(list(api._specs)[0][2], 'api.example.com')
+
+    def test_warmup_with_streamed_specs(self):
+        api = restplus.Api(self.app, stream_specs=True)
+        person = api.model('Person', {'name': restplus.fields.String()})
+
+        @api.route('/test/', endpoint='test')
+        class TestResource(restplus.Resource):
+            @api.doc(model='Person')
+            def get(self):
+                return {}
+
+        api.warmup()
+
+        self.assertEqual(api._specs, {})
+        self.assertEqual(api.swagger._paths, {})
+        self.assertEqual(api.swagger._definitions, {})
+        self.assertIsNotNone(person['name']._swagger_property)
+
+    def test_marshal_list_with_stream(self):
+        api = restplus.Api(self.app, prefix='/api')
+        person = api.model('Person', {'name': restplus.fields.String})
+
+        @api.route('/people/', endpoint='people')
+        class People(restplus.Resource):
+            @api.marshal_list_with(person, stream=True)
+            def get(self):
+                return ({'name': 'Person {0}'.format(i)} for i in range(1000))
+
+        with self.app.test_client() as client:
+            response = client.get('/api/people/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content_type, 'application/json')
+            self.assertEqual(json.loads(response.data.decode('utf8')),
+                             [{'name': 'Person {0}'.format(i)} for i in range(1000)])
+
+        specs = self.get_specs()
+        schema = specs['paths']['/people/']['get']['responses']['200']['schema']
+        self.assertEqual(schema, {'type': 'array', 'items': {'$ref': '#/definitions/Person'}})
+
+    def test_ndjson_representation(self):
+        api = restplus.Api(self.app, prefix='/api')
+        person = api.model('Person', {'name': restplus.fields.String})
+        people = [{'name': 'Person {0}'.format(i)} for i in range(3)]
+
+        @api.route('/people/', endpoint='people')
+        class People(restplus.Resource):
+            @api.marshal_list_with(person)
+            def get(self):
+                return people
+
+        @api.route('/streamed/', endpoint='streamed')
+        class StreamedPeople(restplus.Resource):
+            @api.marshal_list_with(person, stream=True)
+            def get(self):
+                return (row for row in people)
+
+        @api.route('/missing/', endpoint='missing')
+        class Missing(restplus.Resource):
+            @api.marshal_list_with(person)
+            def get(self):
+                restplus.abort(404)
+
+        with self.app.test_client() as client:
+            for url in '/api/people/', '/api/streamed/':
+                response = client.get(url, headers={'Accept': 'application/x-ndjson'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content_type, 'application/x-ndjson')
+                self.assertTrue(response.is_streamed)
+                lines = response.data.decode('utf8').split('\n')
+                self.assertEqual(lines[-1], '')
+                self.assertEqual([json.loads(line) for line in lines[:-1]], people)
+
+                response = client.get(url, headers={'Accept': '*/*'})
+                self.assertEqual(response.content_type, 'application/json')
+                self.assertEqual(json.loads(response.data.decode('utf8')), people)
+
+            response = client.get('/api/missing/', headers={'Accept': 'application/x-ndjson'})
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.content_type, 'application/x-ndjson')
+            self.assertEqual(len(response.data.decode('utf8').splitlines()), 1)
+
+    def test_fields_mask(self):
+        api = restplus.Api(self.app, prefix='/api', mask_param='fields')
+        owner = api.model('Owner', {'name': restplus.fields.String, 'id': restplus.fields.Integer})
+        pet = api.model('Pet', {
+            'name': restplus.fields.String,
+            'age': restplus.fields.Integer,
+            'owner': restplus.fields.Nested(owner),
+        })
+        data = {'name': 'Rex', 'age': 3, 'owner': {'name': 'John', 'id': 1}}
+
+        @api.route('/pet/', endpoint='pet')
+        class Pet(restplus.Resource):
+            @api.marshal_with(pet)
+            def get(self):
+                return data
+
+        @api.route('/pets/', endpoint='pets')
+        class Pets(restplus.Resource):
+            @api.marshal_list_with(pet, stream=True)
+            def get(self):
+                return (row for row in [data, data])
+
+        with self.app.test_client() as client:
+            response = client.get('/api/pet/', headers={'X-Fields': 'name,owner{id}'})
+            self.assertEqual(json.loads(response.data.decode('utf8')), {'name': 'Rex', 'owner': {'id': 1}})
+
+            response = client.get('/api/pet/?fields=age')
+            self.assertEqual(json.loads(response.data.decode('utf8')), {'age': 3})
+
+            response = client.get('/api/pets/', headers={'X-Fields': 'name'})
+            self.assertEqual(json.loads(response.data.decode('utf8')), [{'name': 'Rex'}, {'name': 'Rex'}])
+
+            response = client.get('/api/pet/', headers={'X-Fields': 'name,owner{id'})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid fields mask', json.loads(response.data.decode('utf8'))['message'])
+
+        specs = self.get_specs()
+        params = dict((p['name'], p) for p in specs['paths']['/pet/']['get']['parameters'])
+        self.assertEqual(params['X-Fields'], {
+            'name': 'X-Fields',
+            'in': 'header',
+            'type': 'string',
+            'format': 'mask',
+            'description': 'An optional fields mask',
+        })
+        self.assertEqual(params['fields']['in'], 'query')
+
+    def test_fields_mask_disabled(self):
+        api = restplus.Api(self.app, prefix='/api', mask_header=None)
+        pet = api.model('Pet', {'name': restplus.fields.String, 'age': restplus.fields.Integer})
+
+        @api.route('/pet/', endpoint='pet')
+        class Pet(restplus.Resource):
+            @api.marshal_with(pet)
+            def get(self):
+                return {'name': 'Rex', 'age': 3}
+
+        with self.app.test_client() as client:
+            response = client.get('/api/pet/', headers={'X-Fields': 'name'})
+            self.assertEqual(json.loads(response.data.decode('utf8')), {'name': 'Rex', 'age': 3})
+
+        specs = self.get_specs()
+        self.assertNotIn('parameters', specs['paths']['/pet/']['get'])
+
+    def test_marshal_with_encode(self):
+        api = restplus.Api(self.app, prefix='/api')
+        person = api.model('Person', {'name': restplus.fields.String, 'age': restplus.fields.Integer})
+
+        @api.route('/person/', endpoint='person')
+        class Person(restplus.Resource):
+            @api.marshal_with(person, encode=True, code=201)
+            def get(self):
+                return {'name': 'John', 'age': '42'}, 201, {'X-Header': 'value'}
+
+            @api.marshal_with(person, encode=True, code=201)
+            def post(self):
+                return {'name': 'John', 'age': 42}, 201
+
+        @api.route('/people/', endpoint='people')
+        class People(restplus.Resource):
+            @api.marshal_list_with(person, encode=True)
+            def get(self):
+                return ({'name': 'Person {0}'.format(i), 'age': i} for i in range(3))
+
+        with self.app.test_client() as client:
+            response = client.get('/api/person/')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.content_type, 'application/json')
+            self.assertEqual(response.headers['X-Header'], 'value')
+            self.assertEqual(json.loads(response.data.decode('utf8')), {'name': 'John', 'age': 42})
+
+            self.assertNotIn('ETag', response.headers)
+
+            response = client.post('/api/person/', headers={'If-None-Match': '*'})
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(json.loads(response.data.decode('utf8')), {'name': 'John', 'age': 42})
+
+            response = client.get('/api/person/', headers={'X-Fields': 'age'})
+            self.assertEqual(response.data, b'{"age": 42}')
+
+            response = client.get('/api/people/')
+            self.assertEqual(json.loads(response.data.decode('utf8')),
+                             [{'name': 'Person {0}'.format(i), 'age': i} for i in range(3)])
+
+            response = client.get('/api/people/', headers={'Accept': 'application/x-ndjson'})
+            self.assertEqual(response.content_type, 'application/x-ndjson')
+            self.assertEqual(len(response.data.decode('utf8').splitlines()), 3)
+
+    def test_marshal_ordered(self):
+        api = restplus.Api(self.app)
+        person = api.model('Person', {'name': restplus.fields.String, 'age': restplus.fields.Integer})
+        data = {'name': 'John', 'age': 42}
+
+        self.assertIs(type(api.marshal(data, person, ordered=False)), dict)
+        self.assertIs(type(api.marshal(data, person, ordered=True)), OrderedDict)
+        self.assertIs(type(api.marshal_list([data], person, ordered=False)[0]), dict)
+        self.assertIs(type(api.marshal_list([data], person, ordered=True)[0]), OrderedDict)
+
+    def test_freeze(self):
+        api = restplus.Api(self.app)
+        ns = api.namespace('ns', 'Test namespace')
+        api.freeze()
+
+        class TestResource(restplus.Resource):
+            def get(self):
+                return {}
+
+        with self.assertRaises(RuntimeError):
+            api.add_resource(TestResource, '/test/')
+        with self.assertRaises(RuntimeError):
+            ns.add_resource(TestResource, '/test/')
+        with self.assertRaises(RuntimeError):
+            api.namespace('other', 'Other namespace')
+        with self.assertRaises(RuntimeError):
+            api.model('Person', {'name': restplus.fields.String})
+        with self.assertRaises(TypeError):
+            api.models['Person'] = {}
+
+        self.assertEqual(ns.resources, ())
+        self.assertEqual(self.get_specs('')['paths'], {})
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import threading
+import time
+import unittest
+import warnings
+
+from flask import request
+from flask.ext import restplus
+
+from flask_restplus.cache import LRUCache, SharedCache, SingleFlight
+
+from . import TestCase
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')
+    from werkzeug.contrib.cache import SimpleCache
+
+
+class Timer(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class LRUCacheTestCase(unittest.TestCase):
+    def test_get_set(self):
+        cache = LRUCache()
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', 'value', 10)
+        self.assertEqual(cache.get('key'), 'value')
+
+    def test_ttl(self):
+        timer = Timer()
+        cache = LRUCache(timer=timer)
+        cache.set('key', 'value', 10)
+        timer.now = 9
+        self.assertEqual(cache.get('key'), 'value')
+        timer.now = 10
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(len(cache), 0)
+
+    def test_eviction(self):
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1, 10)
+        cache.set('b', 2, 10)
+        cache.get('a')
+        cache.set('c', 3, 10)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_clear(self):
+        cache = LRUCache()
+        cache.set('key', 'value', 10)
+        cache.clear()
+        self.assertIsNone(cache.get('key'))
+
+
+class SharedCacheTestCase(unittest.TestCase):
+    def test_get_set(self):
+        wrapped = SimpleCache()
+        cache = SharedCache(wrapped, prefix='test:')
+        cache.set('key', 'value', 10)
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual(wrapped.get('test:key'), 'value')
+        cache.clear()
+        self.assertIsNone(cache.get('key'))
+
+
+class ResponseCacheTestCase(TestCase):
+    def setUp(self):
+        super(ResponseCacheTestCase, self).setUp()
+        self.api = restplus.Api(self.app, prefix='/api')
+        self.calls = 0
+
+    def get(self, url, status=200, **kwargs):
+        with self.app.test_client() as client:
+            response = client.get(url, **kwargs)
+            self.assertEqual(response.status_code, status)
+            return response
+
+    def counting_resource(self, *args, **kwargs):
+        api = self.api
+        test = self
+
+        @api.route('/people/', '/people/<int:id>', endpoint='people')
+        class People(restplus.Resource):
+            @api.cache(*args, **kwargs)
+            def get(self, id=None):
+                test.calls += 1
+                return {'id': id, 'calls': test.calls}
+
+            @api.cache(*args, **kwargs)
+            def post(self, id=None):
+                test.calls += 1
+                return {'calls': test.calls}
+        return People
+
+    def test_cached(self):
+        self.counting_resource(ttl=10)
+        first = self.get('/api/people/')
+        self.assertEqual(json.loads(first.data.decode('utf8')), {'id': None, 'calls': 1})
+        second = self.get('/api/people/')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.content_type, 'application/json')
+        self.assertEqual(self.calls, 1)
+
+    def test_key(self):
+        self.counting_resource(ttl=10)
+        self.get('/api/people/?a=1&b=2&a=3')
+        self.get('/api/people/?b=2&a=1&a=3')
+        self.assertEqual(self.calls, 1)
+        self.get('/api/people/?a=3&b=2&a=1')
+        self.assertEqual(self.calls, 2)
+        self.get('/api/people/1')
+        self.get('/api/people/1')
+        self.assertEqual(self.calls, 3)
+
+    def test_mediatype(self):
+        @self.api.representation('text/plain')
+        def output_text(data, code, headers=None):
+            return self.app.response_class(repr(data), code, headers)
+
+        self.counting_resource(ttl=10)
+        self.get('/api/people/')
+        response = self.get('/api/people/', headers={'Accept': 'text/plain'})
+        self.assertEqual(response.content_type, 'text/plain')
+        self.get('/api/people/', headers={'Accept': 'text/plain'})
+        self.assertEqual(self.calls, 2)
+
+    def test_mask_header_vary(self):
+        self.counting_resource(ttl=10)
+        self.get('/api/people/')
+        self.get('/api/people/', headers={'X-Fields': 'id'})
+        self.get('/api/people/', headers={'X-Fields': 'id'})
+        self.assertEqual(self.calls, 2)
+
+    def test_declared_vary(self):
+        self.counting_resource(ttl=10, vary=['Accept-Language'])
+        self.get('/api/people/', headers={'Accept-Language': 'fr'})
+        self.get('/api/people/', headers={'Accept-Language': 'en'})
+        self.get('/api/people/', headers={'Accept-Language': 'fr'})
+        self.assertEqual(self.calls, 2)
+
+    def test_response_vary(self):
+        test = self
+
+        @self.api.route('/greeting/', endpoint='greeting')
+        class Greeting(restplus.Resource):
+            @self.api.cache(ttl=10)
+            def get(self):
+                test.calls += 1
+                greeting = 'Bonjour' if request.headers.get('Accept-Language') == 'fr' else 'Hello'
+                return test.app.response_class(greeting, headers={'Vary': 'Accept-Language'})
+
+        self.assertEqual(self.get('/api/greeting/', headers={'Accept-Language': 'fr'}).data, b'Bonjour')
+        self.assertEqual(self.get('/api/greeting/').data, b'Hello')
+        self.assertEqual(self.get('/api/greeting/', headers={'Accept-Language': 'fr'}).data, b'Bonjour')
+        self.assertEqual(self.get('/api/greeting/').data, b'Hello')
+        self.assertEqual(self.calls, 2)
+
+    def test_conditional(self):
+        person = self.api.model('Person', {'calls': restplus.fields.Integer})
+        test = self
+
+        @self.api.route('/person/', endpoint='person')
+        class Person(restplus.Resource):
+            @self.api.cache(ttl=10)
+            @self.api.marshal_with(person, encode=True)
+            def get(self):
+                test.calls += 1
+                return {'calls': test.calls}
+
+        etag = self.get('/api/person/').headers['ETag']
+        response = self.get('/api/person/', status=304, headers={'If-None-Match': etag})
+        self.assertEqual(response.data, b'')
+        self.assertEqual(self.calls, 1)
+
+    def test_ttl(self):
+        timer = Timer()
+        self.counting_resource(storage=LRUCache(timer=timer), ttl=10)
+        self.get('/api/people/')
+        timer.now = 10
+        self.get('/api/people/')
+        self.assertEqual(self.calls, 2)
+
+    def test_shared_storage(self):
+        self.counting_resource(storage=SharedCache(SimpleCache()), ttl=10)
+        self.get('/api/people/')
+        self.get('/api/people/')
+        self.assertEqual(self.calls, 1)
+
+    def test_not_cached(self):
+        self.counting_resource(ttl=10)
+        with self.app.test_client() as client:
+            client.post('/api/people/')
+            client.post('/api/people/')
+        self.assertEqual(self.calls, 2)
+
+        test = self
+
+        @self.api.route('/missing/', endpoint='missing')
+        class Missing(restplus.Resource):
+            @self.api.cache(ttl=10)
+            def get(self):
+                test.calls += 1
+                return {}, 404
+
+        self.get('/api/missing/', status=404)
+        self.get('/api/missing/', status=404)
+        self.assertEqual(self.calls, 4)
+
+    def test_documented(self):
+        self.counting_resource(ttl=10, vary=['Accept-Language'])
+        specs = self.get_specs()
+        operation = specs['paths']['/people/']['get']
+        self.assertEqual(operation['x-cache'], {'ttl': 10, 'vary': ['Accept-Language', 'X-Fields']})
+
+
+class SingleFlightTestCase(TestCase):
+    def setUp(self):
+        super(SingleFlightTestCase, self).setUp()
+        self.api = restplus.Api(self.app, prefix='/api')
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def slow_resource(self, decorator, status=200):
+        test = self
+
+        @self.api.route('/slow/', endpoint='slow')
+        class Slow(restplus.Resource):
+            @decorator
+            def get(self):
+                with test.lock:
+                    test.calls += 1
+                    calls = test.calls
+                test.entered.set()
+                test.release.wait(5)
+                if status != 200:
+                    restplus.abort(status)
+                return {'calls': calls}
+        return Slow.get.single_flight
+
+    def wait_for(self, condition):
+        deadline = time.time() + 5
+        while not condition() and time.time() < deadline:
+            time.sleep(0.001)
+        self.assertTrue(condition())
+
+    def followers(self, single_flight):
+        return sum(flight.followers for flight in single_flight._flights.values())
+
+    def run_concurrently(self, single_flight, urls):
+        responses = []
+
+        def get(url):
+            with self.app.test_client() as client:
+                responses.append(client.get(url))
+
+        threads = [threading.Thread(target=get, args=(url,)) for url in urls]
+        threads[0].start()
+        self.assertTrue(self.entered.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+        self.wait_for(lambda: self.followers(single_flight) == len(urls) - 1)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return responses
+
+    def test_coalesced(self):
+        single_flight = self.slow_resource(self.api.single_flight())
+        responses = self.run_concurrently(single_flight, ['/api/slow/?a=1&b=2'] * 4 + ['/api/slow/?b=2&a=1'])
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(responses), 5)
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.data.decode('utf8')), {'calls': 1})
+        self.assertEqual(single_flight._flights, {})
+
+    def test_different_requests(self):
+        single_flight = self.slow_resource(self.api.single_flight())
+
+        def get(url):
+            with self.app.test_client() as client:
+                client.get(url)
+
+        threads = [threading.Thread(target=get, args=(url,)) for url in ('/api/slow/?page=1', '/api/slow/?page=2')]
+        for thread in threads:
+            thread.start()
+        self.wait_for(lambda: self.calls == 2)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(self.followers(single_flight), 0)
+
+    def test_mask_header(self):
+        single_flight = self.slow_resource(self.api.single_flight())
+        self.assertEqual(single_flight.vary, ('x-fields',))
+
+    def test_errors_shared(self):
+        single_flight = self.slow_resource(self.api.single_flight(), status=404)
+        responses = self.run_concurrently(single_flight, ['/api/slow/'] * 3)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual([response.status_code for response in responses], [404] * 3)
+
+    def test_timeout(self):
+        single_flight = self.slow_resource(self.api.single_flight(timeout=0.01))
+
+        def get():
+            with self.app.test_client() as client:
+                client.get('/api/slow/')
+
+        threads = [threading.Thread(target=get) for _ in range(2)]
+        threads[0].start()
+        self.assertTrue(self.entered.wait(5))
+        threads[1].start()
+        self.wait_for(lambda: self.calls == 2)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(single_flight._flights, {})
+
+    def test_with_cache(self):
+        single_flight = self.slow_resource(self.api.cache(ttl=10, single_flight=True))
+        responses = self.run_concurrently(single_flight, ['/api/slow/'] * 4)
+        self.assertEqual([response.status_code for response in responses], [200] * 4)
+        with self.app.test_client() as client:
+            self.assertEqual(json.loads(client.get('/api/slow/').data.decode('utf8')), {'calls': 1})
+        self.assertEqual(self.calls, 1)
+
+    def test_responses_copied(self):
+        single_flight = SingleFlight()
+        test = self
+
+        @self.api.route('/response/', endpoint='response')
+        class Response(restplus.Resource):
+            @single_flight
+            def get(self):
+                with test.lock:
+                    test.calls += 1
+                test.entered.set()
+                test.release.wait(5)
+                return test.app.response_class('body', headers={'X-Header': 'value'})
+
+        responses = self.run_concurrently(single_flight, ['/api/response/'] * 3)
+        self.assertEqual(self.calls, 1)
+        for response in responses:
+            self.assertEqual(response.data, b'body')
+            self.assertEqual(response.headers['X-Header'], 'value')
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import os
+import shutil
+import tempfile
+
+from flask import Flask
+from flask.ext import restplus
+from flask_restplus.export import export_specs
+
+from . import TestCase
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        super(ExportTestCase, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'swagger.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def build_api(self, app, **kwargs):
+        api = restplus.Api(app, **kwargs)
+
+        @api.route('/test/', endpoint='test')
+        class TestResource(restplus.Resource):
+            def get(self):
+                return {}
+
+        return api
+
+    def test_export_specs(self):
+        api = self.build_api(self.app)
+
+        specs = export_specs(self.app, api, self.filename)
+
+        with open(self.filename, 'rb') as f:
+            content = f.read()
+        self.assertEqual(json.loads(content.decode('utf8')), specs)
+        self.assertIn('/test/', specs['paths'])
+
+        with self.app.test_client() as client:
+            response = client.get('/swagger.json')
+            self.assertEqual(response.data, content)
+
+    def test_serve_spec_file(self):
+        export_specs(self.app, self.build_api(self.app), self.filename)
+        with open(self.filename, 'rb') as f:
+            content = f.read()
+
+        app = Flask(__name__)
+        api = restplus.Api(app, spec_file=self.filename)
+
+        with app.test_client() as client:
+            response = client.get('/swagger.json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content_type, 'application/json')
+            self.assertEqual(response.data, content)
+
+            response = client.get('/swagger.json', headers={'If-None-Match': response.headers['ETag']})
+            self.assertEqual(response.status_code, 304)
+
+        with app.test_request_context('/'):
+            self.assertIn('/test/', api.specs['paths'])
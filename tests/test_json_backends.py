@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import unittest
+import warnings
+
+from decimal import Decimal
+
+from flask.ext import restplus
+from flask.ext.restful.representations import json as json_representation
+
+from flask_restplus import json_backends
+
+from . import TestCase
+
+
+def missing_loader():
+    import not_a_json_library  # noqa
+
+
+class CountingBackend(object):
+    '''A standard library backend counting its calls'''
+    def __init__(self):
+        self.dumped = 0
+        self.loaded = 0
+
+    def dumps(self, data, **settings):
+        self.dumped += 1
+        return json.dumps(data, **settings)
+
+    def loads(self, text):
+        self.loaded += 1
+        return json.loads(text)
+
+
+class RegistryTestCase(unittest.TestCase):
+    def tearDown(self):
+        json_backends._backends.pop('counting', None)
+        json_backends.LOADERS.pop('missing', None)
+
+    def test_default(self):
+        backend = json_backends.get_backend()
+        self.assertEqual(backend.name, 'json')
+        self.assertIs(json_backends.get_backend('json'), backend)
+        self.assertEqual(backend.dumps({'a': 1}), '{"a": 1}')
+        self.assertEqual(backend.loads('{"a": 1}'), {'a': 1})
+
+    def test_instance(self):
+        backend = json_backends.JSONBackend('custom', json.dumps, json.loads)
+        self.assertIs(json_backends.get_backend(backend), backend)
+
+    def test_register(self):
+        counting = CountingBackend()
+        backend = json_backends.register_backend('counting', counting.dumps, counting.loads)
+        self.assertIs(json_backends.get_backend('counting'), backend)
+        backend.dumps({})
+        self.assertEqual(counting.dumped, 1)
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            json_backends.get_backend('unknown')
+
+    def test_missing_fallback(self):
+        json_backends.LOADERS['missing'] = missing_loader
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            backend = json_backends.get_backend('missing')
+        self.assertEqual(backend.name, 'json')
+        self.assertTrue(any('"missing" JSON backend is not installed' in str(w.message) for w in caught))
+
+    def test_auto(self):
+        backend = json_backends.get_backend('auto')
+        self.assertIn(backend.name, ['json'] + list(json_backends.LOADERS))
+
+    def test_installed(self):
+        json_backends.LOADERS['missing'] = missing_loader
+        json_backends.register_backend('counting', json.dumps, json.loads)
+        names = json_backends.installed_backends()
+        self.assertEqual(names[0], 'json')
+        self.assertIn('counting', names)
+        self.assertNotIn('missing', names)
+
+    def test_builtin_backends(self):
+        data = {'b': [1, 2.5, None, True], 'a': 'é', '1': {'c': 'd'}}
+        for name in json_backends.installed_backends():
+            backend = json_backends.get_backend(name)
+            text = backend.dumps(data, sort_keys=True, separators=(',', ':'))
+            self.assertEqual(backend.loads(text), data)
+            self.assertEqual(json.loads(text), data)
+            self.assertEqual(json.loads(backend.dumps(data, indent=4)), data)
+            # Unsupported data and settings are delegated to the standard library
+            self.assertEqual(backend.dumps(2 ** 70), str(2 ** 70))
+            self.assertEqual(backend.dumps(Decimal('1.5'), default=str), '"1.5"')
+
+
+class ApiJSONBackendTestCase(TestCase):
+    def setUp(self):
+        super(ApiJSONBackendTestCase, self).setUp()
+        self.counting = CountingBackend()
+        self.backend = json_backends.JSONBackend('counting', self.counting.dumps, self.counting.loads)
+
+    def test_default(self):
+        api = restplus.Api(self.app)
+        self.assertIs(api.json_backend, json_backends.get_backend())
+
+    def test_representations(self):
+        api = restplus.Api(self.app, prefix='/api', json_backend=self.backend)
+
+        @api.route('/people/', endpoint='people')
+        class People(restplus.Resource):
+            def get(self):
+                return [{'name': 'John'}, {'name': 'Jane'}]
+
+        with self.app.test_client() as client:
+            response = client.get('/api/people/')
+            self.assertEqual(json.loads(response.data.decode('utf8')), [{'name': 'John'}, {'name': 'Jane'}])
+            self.assertEqual(self.counting.dumped, 1)
+
+            response = client.get('/api/people/', headers={'Accept': 'application/x-ndjson'})
+            self.assertEqual(len(response.data.decode('utf8').splitlines()), 2)
+            self.assertEqual(self.counting.dumped, 3)
+
+    def test_debug_settings(self):
+        self.app.debug = True
+        api = restplus.Api(self.app, prefix='/api', json_backend=self.backend)
+
+        @api.route('/person/', endpoint='person')
+        class Person(restplus.Resource):
+            def get(self):
+                return {'name': 'John', 'age': 42}
+
+        with self.app.test_client() as client:
+            response = client.get('/api/person/')
+            expected = json.dumps({'name': 'John', 'age': 42}, indent=4, sort_keys=True) + '\n'
+            self.assertEqual(response.data.decode('utf8'), expected)
+
+    def test_restful_json_config(self):
+        self.app.config['RESTFUL_JSON'] = {'separators': (',', ':'), 'sort_keys': True}
+        api = restplus.Api(self.app, prefix='/api', json_backend=self.backend)
+
+        @api.route('/person/', endpoint='person')
+        class Person(restplus.Resource):
+            def get(self):
+                return {'name': 'John', 'age': 42}
+
+        with self.app.test_client() as client:
+            self.assertEqual(client.get('/api/person/').data, b'{"age":42,"name":"John"}')
+
+    def test_without_restful_module_settings(self):
+        # Flask-Restful 0.3.4+ only reads the RESTFUL_JSON configuration
+        settings = getattr(json_representation, 'settings', None)
+        if settings is not None:
+            del json_representation.settings
+        try:
+            api = restplus.Api(self.app, prefix='/api', json_backend=self.backend)
+
+            @api.route('/person/', endpoint='person')
+            class Person(restplus.Resource):
+                def get(self):
+                    return {'name': 'John'}
+
+            with self.app.test_client() as client:
+                self.assertEqual(client.get('/api/person/').data, b'{"name": "John"}')
+        finally:
+            if settings is not None:
+                json_representation.settings = settings
+
+    def test_custom_representation_kept(self):
+        api = restplus.Api(self.app, prefix='/api', json_backend=self.backend)
+
+        @api.representation('application/json')
+        def output(data, code, headers=None):
+            return self.app.response_class('custom', code, headers)
+
+        @api.route('/person/', endpoint='person')
+        class Person(restplus.Resource):
+            def get(self):
+                return {'name': 'John'}
+
+        with self.app.test_client() as client:
+            self.assertEqual(client.get('/api/person/').data, b'custom')
+
+    def test_specs(self):
+        api = restplus.Api(self.app, prefix='/api', json_backend=self.backend)
+
+        @api.route('/person/', endpoint='person')
+        class Person(restplus.Resource):
+            def get(self):
+                pass
+
+        specs = self.get_specs()
+        self.assertIn('/person/', specs['paths'])
+        self.assertGreater(self.counting.dumped, 0)
+
+        with self.context():
+            self.assertEqual(''.join(api.iter_specs()), api.specs_payload.data.decode('utf8'))
+
+    def test_encoded_responses(self):
+        api = restplus.Api(self.app, prefix='/api', json_backend=self.backend)
+        person = api.model('Person', {'name': restplus.fields.String})
+
+        @api.route('/person/', endpoint='person')
+        class Person(restplus.Resource):
+            @api.marshal_with(person, encode=True)
+            def get(self):
+                return {'name': 'John'}
+
+        @api.route('/people/', endpoint='people')
+        class People(restplus.Resource):
+            @api.marshal_list_with(person, encode=True)
+            def get(self):
+                return [{'name': 'John'}, {'name': 'Jane'}]
+
+        with self.app.test_client() as client:
+            response = client.get('/api/person/')
+            self.assertEqual(json.loads(response.data.decode('utf8')), {'name': 'John'})
+            self.assertEqual(self.counting.dumped, 1)
+
+            response = client.get('/api/people/')
+            self.assertEqual(json.loads(response.data.decode('utf8')), [{'name': 'John'}, {'name': 'Jane'}])
+            self.assertEqual(self.counting.dumped, 2)
+
+            # Decoded then encoded again for another media type
+            response = client.get('/api/people/', headers={'Accept': 'application/x-ndjson'})
+            self.assertEqual(response.data.decode('utf8').splitlines(), ['{"name": "John"}', '{"name": "Jane"}'])
+            self.assertEqual(self.counting.loaded, 1)
+
+    def test_streamed_lists(self):
+        api = restplus.Api(self.app, prefix='/api', json_backend=self.backend)
+        person = api.model('Person', {'name': restplus.fields.String})
+
+        @api.route('/people/', endpoint='people')
+        class People(restplus.Resource):
+            @api.marshal_list_with(person, stream=True)
+            def get(self):
+                return ({'name': name} for name in ('John', 'Jane'))
+
+        with self.app.test_client() as client:
+            response = client.get('/api/people/')
+            self.assertEqual(json.loads(response.data.decode('utf8')), [{'name': 'John'}, {'name': 'Jane'}])
+            self.assertEqual(self.counting.dumped, 2)
+
+            response = client.get('/api/people/', headers={'Accept': 'application/x-ndjson'})
+            self.assertEqual(len(response.data.decode('utf8').splitlines()), 2)
+            self.assertEqual(self.counting.dumped, 4)
+
+    def test_parser(self):
+        api = restplus.Api(self.app, prefix='/api', json_backend=self.backend)
+        parser = api.parser()
+        parser.add_argument('name', location='json')
+        self.assertIs(parser.json_backend, self.backend)
+
+        @api.route('/person/', endpoint='person')
+        class Person(restplus.Resource):
+            def post(self):
+                return parser.parse_args()
+
+        with self.app.test_client() as client:
+            response = client.post('/api/person/', data='{"name": "John"}', content_type='application/json')
+            self.assertEqual(json.loads(response.data.decode('utf8')), {'name': 'John'})
+            self.assertEqual(self.counting.loaded, 1)
+
+            response = client.post('/api/person/', data='{"name":', content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+            response = client.post('/api/person/', data='name=John')
+            self.assertEqual(json.loads(response.data.decode('utf8')), {'name': None})
+            self.assertEqual(self.counting.loaded, 2)
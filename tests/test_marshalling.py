@@ -0,0 +1,673 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import operator
+import sys
+
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from functools import partial
+
+import six
+
+from flask.ext import restful
+from flask.ext.restful import fields as restful_fields
+
+from flask_restplus import fields, marshalling
+from flask_restplus.mask import parse as parse_mask
+from flask_restplus.model import ApiModel
+
+from . import TestCase
+
+#: Wether plain dictionnaries keep the insertion order
+ORDERED_DICTS = sys.version_info >= (3, 7)
+
+
+def _generic_callable_attributes():
+    try:
+        return restful_fields.get_value(operator.itemgetter(0), ['value']) == 'value'
+    except Exception:
+        return False
+
+
+#: Wether the installed Flask-Restful accepts any callable as field attribute
+GENERIC_CALLABLE_ATTRIBUTES = _generic_callable_attributes()
+
+#: The type marshalled by default
+DEFAULT_TYPE = dict if ORDERED_DICTS else OrderedDict
+
+
+def model(name, specs):
+    model = ApiModel(specs)
+    model.__apidoc__ = {'name': name}
+    return model
+
+
+class Object(object):
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+class TitleString(fields.String):
+    def format(self, value):
+        return super(TitleString, self).format(value).title()
+
+
+class Constant(fields.Raw):
+    def output(self, key, obj):
+        return 'constant'
+
+
+class MarshallingParityTestCase(TestCase):
+    '''The compiled marshallers should always give the same output than the generic ``marshal``'''
+    def assertParity(self, data, fields, envelope=None):
+        try:
+            expected = restful.marshal(data, fields, envelope)
+        except Exception as e:
+            with self.assertRaises(e.__class__) as cm:
+                marshalling.marshal(data, fields, envelope)
+            self.assertEqual(str(cm.exception), str(e))
+            with self.assertRaises(e.__class__):
+                marshalling.encode(data, fields, envelope)
+            return
+        result = marshalling.marshal(data, fields, envelope, ordered=True)
+        self.assertEqual(result, expected)
+        self.assertEqual(type(result), type(expected))
+        self.assertEqual(repr(result), repr(expected))
+        plain = marshalling.marshal(data, fields, envelope)
+        self.assertEqual(plain, expected)
+        try:
+            encoded = json.dumps(expected)
+        except TypeError:
+            with self.assertRaises(TypeError):
+                marshalling.encode(data, fields, envelope)
+        else:
+            self.assertEqual(marshalling.encode(data, fields, envelope), encoded)
+            if ORDERED_DICTS:
+                self.assertEqual(json.dumps(plain), encoded)
+        return result
+
+    def test_simple_fields(self):
+        person = model('Person', {
+            'name': fields.String,
+            'age': fields.Integer(default=18),
+            'height': fields.Float,
+            'active': fields.Boolean,
+            'raw': fields.Raw,
+            'restful': restful_fields.String(default='default'),
+        })
+        self.assertParity({'name': 'John', 'age': '42', 'height': '1.8', 'active': 1, 'raw': [1, 2]}, person)
+        self.assertParity({'name': 42, 'active': '', 'restful': 'value'}, person)
+        self.assertParity({}, person)
+        self.assertParity(Object(name='John', age=42.5, active=[], raw={'a': 'b'}), person)
+        self.assertParity(Object(), person)
+        self.assertParity(None, person)
+
+    def test_indexable_objects(self):
+        person = model('Person', {'name': fields.String, 'items': fields.Raw, '0': fields.String})
+        self.assertParity(OrderedDict([('name', 'John')]), person)
+        self.assertParity(['a', 'b'], person)
+        self.assertParity(('a', 'b'), person)
+        self.assertParity('a string', person)
+        self.assertParity({'other': 'value'}, person)
+
+    def test_lists_of_objects(self):
+        person = model('Person', {'name': fields.String, 'age': fields.Integer})
+        self.assertParity([{'name': 'John', 'age': 42}, Object(name='Jane'), {}], person)
+        self.assertParity(({'name': 'John'}, [{'name': 'Nested list'}]), person)
+        self.assertParity([], person)
+
+    def test_envelope(self):
+        person = model('Person', {'name': fields.String})
+        self.assertParity({'name': 'John'}, person, envelope='data')
+        self.assertParity([{'name': 'John'}], person, envelope='data')
+
+    def test_attributes(self):
+        person = model('Person', {
+            'name': fields.String(attribute='full_name'),
+            'city': fields.String(attribute='address.city'),
+            'first': fields.String(attribute=0),
+            'computed': fields.String(attribute=lambda obj: 'computed'),
+        })
+        self.assertParity({'full_name': 'John Doe', 'address': {'city': 'Paris'}}, person)
+        self.assertParity(Object(full_name='John Doe', address=Object(city='Paris')), person)
+        self.assertParity({'address': None}, person)
+        self.assertParity(['first item'], person)
+
+    def test_callable_attributes(self):
+        class Initials(object):
+            def __call__(self, obj):
+                return ''.join(part[0] for part in obj.full_name.split())
+
+        def upper(name, obj):
+            return getattr(obj, name).upper()
+
+        person = model('Person', {
+            'name': fields.String(attribute=operator.attrgetter('full_name')),
+            'city': fields.String(attribute=operator.attrgetter('address.city')),
+            'initials': fields.String(attribute=Initials()),
+            'upper': fields.String(attribute=partial(upper, 'full_name')),
+        })
+        data = Object(full_name='John Doe', address=Object(city='Paris'))
+        expected = {'name': 'John Doe', 'city': 'Paris', 'initials': 'JD', 'upper': 'JOHN DOE'}
+        self.assertEqual(marshalling.marshal(data, person), expected)
+        self.assertEqual(json.loads(marshalling.encode(data, person)), expected)
+        if GENERIC_CALLABLE_ATTRIBUTES:
+            self.assertParity(data, person)
+
+    def test_datetime(self):
+        event = model('Event', {
+            'rfc822': fields.DateTime(attribute='date'),
+            'iso8601': fields.DateTime(attribute='date', dt_format='iso8601'),
+        })
+        self.assertParity({'date': datetime(2015, 1, 1, 12, 30)}, event)
+        self.assertParity({}, event)
+
+        invalid = model('Event', {'date': fields.DateTime(dt_format='unknown')})
+        self.assertParity({'date': datetime(2015, 1, 1)}, invalid)
+        self.assertParity({'date': 'not a date'}, event)
+
+    def test_not_inlined_fields(self):
+        product = model('Product', {
+            'name': TitleString,
+            'constant': Constant,
+            'fixed': fields.Fixed(decimals=2),
+            'arbitrary': fields.Arbitrary,
+            'greeting': fields.FormattedString('Hello {name}'),
+        })
+        self.assertParity({'name': 'a product', 'fixed': '3.14159', 'arbitrary': Decimal('1.5')}, product)
+
+    def test_formatting_errors(self):
+        product = model('Product', {'price': fields.Float, 'count': fields.Integer})
+        self.assertParity({'price': 'not a number'}, product)
+        self.assertParity({'count': 'not a number'}, product)
+
+        greeting = model('Greeting', {'greeting': fields.FormattedString('Hello {name}')})
+        self.assertParity({}, greeting)
+
+    def test_url(self):
+        @self.app.route('/people/<name>', endpoint='person')
+        def person_view(name):
+            return name
+
+        person = model('Person', {
+            'name': fields.String,
+            'url': fields.Url('person'),
+            'absolute': fields.Url('person', absolute=True, scheme='https'),
+        })
+        with self.context():
+            self.assertParity({'name': 'john'}, person)
+
+    def test_nested(self):
+        address = model('Address', {'city': fields.String, 'zip': fields.Integer})
+        person = model('Person', {
+            'name': fields.String,
+            'address': fields.Nested(address),
+            'nullable': fields.Nested(address, attribute='address', allow_null=True),
+            'defaulted': fields.Nested(address, attribute='address', default={'city': 'Nowhere'}),
+            'raw': fields.Nested({'city': fields.String}, attribute='address'),
+        })
+        self.assertParity({'name': 'John', 'address': {'city': 'Paris', 'zip': '75000'}}, person)
+        self.assertParity({'name': 'John'}, person)
+        self.assertParity(Object(address=Object(city='Paris')), person)
+        self.assertParity({'address': [{'city': 'Paris'}, {'city': 'Lyon'}]}, person)
+
+    def test_nested_dict(self):
+        person = model('Person', {
+            'name': fields.String,
+            'details': {
+                'age': fields.Integer,
+                'deeper': {'name': fields.String},
+            },
+        })
+        self.assertParity({'name': 'John', 'age': 42}, person)
+
+    def test_lists(self):
+        address = model('Address', {'city': fields.String})
+        person = model('Person', {
+            'tags': fields.List(fields.String),
+            'scores': fields.List(fields.Integer, attribute='values'),
+            'addresses': fields.List(fields.Nested(address)),
+            'nullable': fields.List(fields.Nested(address, allow_null=True), attribute='addresses'),
+            'defaulted': fields.List(fields.Nested(address, default={'city': 'Nowhere'}), attribute='addresses'),
+            'attribute': fields.List(fields.Nested(address, attribute='city'), attribute='addresses'),
+            'raws': fields.List(fields.Raw, attribute='tags'),
+        })
+        self.assertParity({
+            'tags': ['a', 1, None],
+            'values': ('1', 2),
+            'addresses': [{'city': 'Paris'}, None, Object(city='Lyon')],
+        }, person)
+        self.assertParity({'tags': set(['a']), 'addresses': {'city': 'Paris'}}, person)
+        self.assertParity({'tags': [{'a': 'dict'}], 'addresses': []}, person)
+        self.assertParity({}, person)
+
+    def test_self_referencing_model(self):
+        person = model('Person', {'name': fields.String})
+        person['children'] = fields.List(fields.Nested(person))
+        person['parent'] = fields.Nested(person, allow_null=True)
+
+        data = {
+            'name': 'John',
+            'children': [{'name': 'Jane', 'children': [{'name': 'Jim'}]}],
+            'parent': {'name': 'Joe'},
+        }
+        self.assertParity(data, person)
+
+    def test_empty_model(self):
+        self.assertParity({'name': 'John'}, model('Empty', {}))
+
+
+class CompiledMarshallerTestCase(TestCase):
+    def test_compiled_once(self):
+        person = model('Person', {'name': fields.String})
+        func = marshalling.compile_model(person)
+        self.assertIs(marshalling.compile_model(person), func)
+        self.assertEqual(func({'name': 'John'}), {'name': 'John'})
+
+    def test_recompiled_on_model_change(self):
+        person = model('Person', {'name': fields.String})
+        func = marshalling.compile_model(person)
+
+        person['age'] = fields.Integer
+        self.assertIsNot(marshalling.compile_model(person), func)
+        self.assertEqual(marshalling.marshal({'name': 'John', 'age': 42}, person), {'name': 'John', 'age': 42})
+
+    def test_recompiled_on_nested_model_change(self):
+        address = model('Address', {'city': fields.String})
+        person = model('Person', {'address': fields.Nested(address)})
+        marshalling.marshal({'address': {'city': 'Paris'}}, person)
+
+        address['zip'] = fields.String
+        data = marshalling.marshal({'address': {'city': 'Paris', 'zip': '75000'}}, person)
+        self.assertEqual(data, {'address': {'city': 'Paris', 'zip': '75000'}})
+
+    def test_recompiled_on_field_change(self):
+        name = fields.String(default='unknown')
+        person = model('Person', {'name': name})
+        self.assertEqual(marshalling.marshal({}, person), {'name': 'unknown'})
+
+        name.default = 'anonymous'
+        self.assertEqual(marshalling.marshal({}, person), {'name': 'anonymous'})
+
+        name.attribute = 'full_name'
+        self.assertEqual(marshalling.marshal({'full_name': 'John'}, person), {'name': 'John'})
+
+    def test_link(self):
+        address = model('Address', {'city': fields.String})
+        person = model('Person', {'address': fields.Nested(address), 'addresses': fields.List(fields.Nested(address))})
+        person['parent'] = fields.Nested(person)
+
+        func = marshalling.compile_model(person, link=True)
+        namespace = six.get_function_globals(func)
+        for name in func.__stubs__:
+            self.assertIn(namespace[name], (marshalling.compile_model(address), func))
+
+    def test_plain_dict_uses_generic_marshal(self):
+        data = marshalling.marshal({'name': 'John', 'age': 42}, {'name': fields.String})
+        self.assertEqual(data, OrderedDict([('name', 'John')]))
+
+    def test_marshal_with(self):
+        person = model('Person', {'name': fields.String})
+
+        @marshalling.marshal_with(person)
+        def get():
+            return {'name': 'John', 'age': 42}
+
+        @marshalling.marshal_with(person, envelope='data')
+        def create():
+            return {'name': 'John'}, 201, {'X-Header': 'value'}
+
+        self.assertEqual(get(), {'name': 'John'})
+        self.assertEqual(create(), ({'data': {'name': 'John'}}, 201, {'X-Header': 'value'}))
+
+
+class MarshalListTestCase(TestCase):
+    def assertListParity(self, rows, fields, envelope=None):
+        expected = restful.marshal(list(rows), fields, envelope)
+        result = marshalling.marshal_list(iter(rows), fields, envelope, ordered=True)
+        self.assertEqual(repr(result), repr(expected))
+        self.assertEqual(repr(marshalling.marshal_list(rows, fields, envelope, ordered=True)), repr(expected))
+        self.assertEqual(marshalling.marshal_list(iter(rows), fields, envelope), expected)
+
+    def test_batched_parity(self):
+        address = model('Address', {'city': fields.String})
+        person = model('Person', {
+            'name': fields.String,
+            'age': fields.Integer,
+            'address': fields.Nested(address),
+            'tags': fields.List(fields.String),
+        })
+        rows = [
+            {'name': 'John', 'age': '42', 'address': {'city': 'Paris'}, 'tags': ['a']},
+            Object(name='Jane'),
+            [{'name': 'Nested list'}],
+            None,
+        ]
+        self.assertListParity(rows, person)
+        self.assertListParity(rows, person, envelope='data')
+        self.assertListParity([], person)
+        self.assertListParity(rows[:2], {'name': fields.String})
+
+    def test_batched_errors(self):
+        person = model('Person', {'age': fields.Integer})
+        rows = [{'age': 42}, {'age': 'not a number'}]
+        with self.assertRaises(restful_fields.MarshallingException):
+            restful.marshal(rows, person)
+        with self.assertRaises(restful_fields.MarshallingException):
+            marshalling.marshal_list(iter(rows), person)
+
+    def test_any_iterable(self):
+        person = model('Person', {'name': fields.String})
+        expected = [{'name': 'John'}, {'name': 'Jane'}]
+
+        self.assertEqual(marshalling.marshal_list((row for row in expected), person), expected)
+        self.assertEqual(marshalling.marshal_list(iter(expected), {'name': fields.String}), expected)
+        name = model('Name', {'name': fields.String(attribute=lambda o: o)})
+        self.assertEqual(marshalling.marshal_list(set(['John']), name), [{'name': 'John'}])
+
+    def test_single_object(self):
+        person = model('Person', {'name': fields.String})
+        self.assertEqual(marshalling.marshal_list({'name': 'John'}, person), {'name': 'John'})
+        self.assertEqual(marshalling.marshal_list(Object(name='John'), person), {'name': 'John'})
+        self.assertEqual(marshalling.marshal_list('John', person), {'name': None})
+
+    def test_marshal_with_as_list(self):
+        person = model('Person', {'name': fields.String})
+
+        @marshalling.marshal_with(person, as_list=True)
+        def get():
+            return (row for row in [{'name': 'John'}, {'name': 'Jane'}]), 200, {}
+
+        self.assertEqual(get(), ([{'name': 'John'}, {'name': 'Jane'}], 200, {}))
+
+
+class OrderedMarshallingTestCase(TestCase):
+    def setUp(self):
+        super(OrderedMarshallingTestCase, self).setUp()
+        self.address = address = model('Address', {'city': fields.String, 'zip': fields.String})
+        self.person = model('Person', {
+            'name': fields.String,
+            'age': fields.Integer,
+            'address': fields.Nested(address),
+            'addresses': fields.List(fields.Nested(address)),
+        })
+        self.data = {'name': 'John', 'age': 42, 'address': {'city': 'Paris'}, 'addresses': [{'city': 'Lyon'}]}
+
+    def assertTypes(self, result, cls):
+        self.assertIs(type(result), cls)
+        self.assertIs(type(result['address']), cls)
+        self.assertIs(type(result['addresses'][0]), cls)
+
+    def test_default(self):
+        self.assertEqual(marshalling.ORDERED, not ORDERED_DICTS)
+        result = marshalling.marshal(self.data, self.person)
+        self.assertTypes(result, DEFAULT_TYPE)
+        self.assertIs(type(marshalling.marshal(self.data, self.person, envelope='data')), DEFAULT_TYPE)
+        self.assertTypes(marshalling.marshal_list([self.data], self.person)[0], DEFAULT_TYPE)
+        masked = marshalling.marshal(self.data, self.person, mask=parse_mask('address,addresses'))
+        self.assertTypes(masked, DEFAULT_TYPE)
+
+    def test_default_keeps_order(self):
+        result = marshalling.marshal(self.data, self.person)
+        self.assertEqual(list(result), list(self.person))
+        self.assertEqual(list(result['address']), list(self.address))
+
+    def test_plain(self):
+        result = marshalling.marshal(self.data, self.person, ordered=False)
+        self.assertTypes(result, dict)
+        self.assertIs(type(marshalling.marshal(self.data, self.person, envelope='data', ordered=False)), dict)
+        self.assertTypes(marshalling.marshal_list([self.data], self.person, ordered=False)[0], dict)
+
+    def test_ordered(self):
+        result = marshalling.marshal(self.data, self.person, ordered=True)
+        self.assertTypes(result, OrderedDict)
+        self.assertEqual(list(result), list(self.person))
+        self.assertIs(type(marshalling.marshal(self.data, self.person, envelope='data', ordered=True)), OrderedDict)
+        self.assertTypes(marshalling.marshal_list([self.data], self.person, ordered=True)[0], OrderedDict)
+        self.assertTypes(marshalling.marshal(self.data, self.person, mask=parse_mask('address,addresses'),
+                                             ordered=True), OrderedDict)
+
+    def test_ordered_linked(self):
+        func = marshalling.compile_model(self.person, link=True, ordered=True)
+        self.assertIsNot(func, marshalling.compile_model(self.person, ordered=False))
+        self.assertTypes(func(self.data), OrderedDict)
+
+    def test_marshal_with(self):
+        @marshalling.marshal_with(self.person, ordered=True)
+        def get():
+            return self.data
+
+        @marshalling.marshal_with(self.person, as_list=True, ordered=False)
+        def get_list():
+            return [self.data]
+
+        self.assertTypes(get(), OrderedDict)
+        self.assertTypes(get_list()[0], dict)
+
+
+class EncoderTestCase(TestCase):
+    def test_compiled_once(self):
+        person = model('Person', {'name': fields.String})
+        func = marshalling.compile_encoder(person)
+        self.assertIs(marshalling.compile_encoder(person), func)
+        self.assertEqual(func({'name': 'John'}), '{"name": "John"}')
+        person['age'] = fields.Integer
+        self.assertIsNot(marshalling.compile_encoder(person), func)
+        encoded = marshalling.encode({'name': 'John', 'age': 42}, person)
+        self.assertEqual(json.loads(encoded), {'name': 'John', 'age': 42})
+
+    def test_special_values(self):
+        person = model('Person', {
+            'name': fields.String,
+            'score': fields.Float,
+            'active': fields.Boolean,
+            'extra': fields.Raw(default={'key': 'value'}),
+        })
+        data = {'name': 'Zo\u00eb "Z"\n', 'score': float('nan'), 'active': 'yes'}
+        self.assertEqual(marshalling.encode(data, person), json.dumps(marshalling.marshal(data, person)))
+        data['score'] = '-1e400'
+        self.assertEqual(marshalling.encode(data, person), json.dumps(marshalling.marshal(data, person)))
+
+    def test_list(self):
+        person = model('Person', {'name': fields.String})
+        rows = [{'name': 'John'}, {'name': 'Jane'}]
+        self.assertEqual(marshalling.encode_list(iter(rows), person), json.dumps(rows))
+        self.assertEqual(marshalling.encode_list(iter(rows), person, 'data'), json.dumps({'data': rows}))
+        self.assertEqual(marshalling.encode_list([], person), '[]')
+        self.assertEqual(marshalling.encode_list({'name': 'John'}, person), '{"name": "John"}')
+
+    def test_mask(self):
+        person = model('Person', {'name': fields.String, 'age': fields.Integer})
+        data = {'name': 'John', 'age': 42}
+        self.assertEqual(marshalling.encode(data, person, mask=parse_mask('age')), '{"age": 42}')
+        self.assertEqual(marshalling.encode_list([data], person, mask=parse_mask('name')), '[{"name": "John"}]')
+
+    def test_fallback_on_custom_settings(self):
+        person = model('Person', {'name': fields.String, 'age': fields.Integer})
+        data = {'name': 'John', 'age': 42}
+        self.app.debug = True
+        with self.context():
+            self.assertEqual(marshalling.encode(data, person), '{"age": 42, "name": "John"}')
+            self.assertEqual(marshalling.encode({'age': 1}, {'age': fields.Integer}), '{"age": 1}')
+
+    def test_marshal_with_encode(self):
+        person = model('Person', {'name': fields.String})
+
+        @marshalling.marshal_with(person, encode=True)
+        def get():
+            return {'name': 'John'}, 201, {'X-Header': 'value'}
+
+        @marshalling.marshal_with(person, as_list=True, encode=True)
+        def get_list():
+            return (row for row in [{'name': 'John'}, {'name': 'Jane'}])
+
+        payload, code, headers = get()
+        self.assertEqual(payload.data, b'{"name": "John"}')
+        self.assertEqual(payload.mimetype, 'application/json')
+        self.assertEqual((code, headers), (201, {'X-Header': 'value'}))
+        self.assertEqual(payload.decode(), {'name': 'John'})
+        self.assertEqual(get_list().data, b'[{"name": "John"}, {"name": "Jane"}]')
+
+
+class MaskedMarshallingTestCase(TestCase):
+    def setUp(self):
+        super(MaskedMarshallingTestCase, self).setUp()
+        self.owner = model('Owner', {'name': fields.String, 'id': fields.Integer, 'email': fields.String})
+        self.pet = model('Pet', {
+            'name': fields.String,
+            'age': fields.Integer,
+            'owner': fields.Nested(self.owner),
+            'previous_owners': fields.List(fields.Nested(self.owner)),
+            'location': {'city': fields.String, 'country': fields.String},
+        })
+        self.data = {
+            'name': 'Rex',
+            'age': 3,
+            'owner': {'name': 'John', 'id': 1, 'email': 'john@example.com'},
+            'previous_owners': [{'name': 'Jane', 'id': 2}],
+            'city': 'Paris',
+            'country': 'France',
+        }
+
+    def test_masked(self):
+        result = marshalling.marshal(self.data, self.pet, mask=parse_mask('name,owner{id}'))
+        self.assertEqual(result, {'name': 'Rex', 'owner': {'id': 1}})
+        self.assertEqual(list(result.keys()), [name for name in self.pet if name in ('name', 'owner')])
+
+    def test_keep_model_order(self):
+        result = marshalling.marshal(self.data, self.pet, mask=parse_mask('owner,age,name'))
+        self.assertEqual(list(result.keys()), [name for name in self.pet if name in ('name', 'age', 'owner')])
+        self.assertEqual(result['owner'], {'name': 'John', 'id': 1, 'email': 'john@example.com'})
+
+    def test_nested_lists_and_dicts(self):
+        result = marshalling.marshal(self.data, self.pet, mask=parse_mask('previous_owners{name},location{city}'))
+        self.assertEqual(result, {'previous_owners': [{'name': 'Jane'}], 'location': {'city': 'Paris'}})
+
+    def test_unknown_fields_ignored(self):
+        self.assertEqual(marshalling.marshal(self.data, self.pet, mask=parse_mask('name,unknown')), {'name': 'Rex'})
+
+    def test_list(self):
+        rows = [self.data, Object(name='Felix', age=2)]
+        result = marshalling.marshal_list(iter(rows), self.pet, mask=parse_mask('name'))
+        self.assertEqual(result, [{'name': 'Rex'}, {'name': 'Felix'}])
+
+    def test_plain_fields(self):
+        specs = {'name': fields.String, 'age': fields.Integer}
+        self.assertEqual(marshalling.marshal(self.data, specs, mask=parse_mask('age')), {'age': 3})
+        self.assertEqual(marshalling.marshal_list([self.data], specs, mask=parse_mask('age')), [{'age': 3}])
+
+    def test_unrequested_fields_not_evaluated(self):
+        def boom(obj):
+            raise AssertionError('Should not be evaluated')
+
+        class Expensive(object):
+            name = 'Rex'
+
+            @property
+            def owner(self):
+                raise AssertionError('Should not be accessed')
+
+        pet = model('Pet', {'name': fields.String, 'expensive': fields.String(attribute=boom),
+                            'owner': fields.Nested(self.owner)})
+        self.assertEqual(marshalling.marshal(Expensive(), pet, mask=parse_mask('name')), {'name': 'Rex'})
+
+    def test_cached_by_mask(self):
+        func = marshalling.compile_model(self.pet, mask=parse_mask('name,age'))
+        self.assertIs(marshalling.compile_model(self.pet, mask=parse_mask('{age, name}')), func)
+        self.assertIsNot(marshalling.compile_model(self.pet), func)
+        self.assertIsNot(marshalling.compile_model(self.pet, mask=parse_mask('name')), func)
+
+    def test_recompiled_on_model_change(self):
+        mask = parse_mask('name,age')
+        marshalling.compile_model(self.pet, mask=mask)
+        self.pet['age'] = fields.String
+        self.assertEqual(marshalling.marshal(self.data, self.pet, mask=mask), {'name': 'Rex', 'age': '3'})
+
+    def test_bounded_cache(self):
+        for i in range(marshalling.MASKED_MARSHALLERS_SIZE + 10):
+            marshalling.compile_model(self.pet, mask=parse_mask('name,field_{0}'.format(i)))
+        self.assertEqual(len(self.pet._masked[1]), marshalling.MASKED_MARSHALLERS_SIZE)
+
+    def test_marshal_with_mask(self):
+        @marshalling.marshal_with(self.pet, mask_header='X-Fields', mask_param='fields')
+        def get():
+            return self.data
+
+        with self.app.test_request_context('/', headers={'X-Fields': 'name'}):
+            self.assertEqual(get(), {'name': 'Rex'})
+        with self.app.test_request_context('/?fields=age'):
+            self.assertEqual(get(), {'age': 3})
+        with self.app.test_request_context('/?fields=age', headers={'X-Fields': 'name'}):
+            self.assertEqual(get(), {'name': 'Rex'})
+        with self.app.test_request_context('/'):
+            self.assertEqual(get(), marshalling.marshal(self.data, self.pet))
+
+
+class StreamedListTestCase(TestCase):
+    def test_iter_json_list(self):
+        person = model('Person', {'name': fields.String, 'age': fields.Integer})
+        rows = [{'name': 'Person {0}'.format(i), 'age': i} for i in range(250)]
+        expected = restful.marshal(rows, person)
+
+        with self.context():
+            chunks = list(marshalling.iter_json_list((row for row in rows), person, chunk_size=100))
+            self.assertEqual(len(chunks), 5)
+            self.assertEqual(json.loads(''.join(chunks)), json.loads(json.dumps(expected)))
+
+            chunks = marshalling.iter_json_list(iter(rows), person, envelope='data')
+            self.assertEqual(json.loads(''.join(chunks)), {'data': json.loads(json.dumps(expected))})
+
+            self.assertEqual(''.join(marshalling.iter_json_list([], person)), '[]')
+            self.assertEqual(''.join(marshalling.iter_json_list([], person, envelope='data')), '{"data": []}')
+
+    def test_iter_json_list_is_lazy(self):
+        person = model('Person', {'name': fields.String})
+        consumed = []
+
+        def rows():
+            for i in range(10):
+                consumed.append(i)
+                yield {'name': 'Person {0}'.format(i)}
+
+        with self.context():
+            chunks = marshalling.iter_json_list(rows(), person, chunk_size=3)
+            self.assertEqual(next(chunks), '[')
+            self.assertEqual(consumed, [])
+            self.assertEqual(json.loads('[' + next(chunks) + ']'), [{'name': 'Person {0}'.format(i)} for i in range(3)])
+            self.assertEqual(consumed, [0, 1, 2])
+
+    def test_iter_ndjson_list(self):
+        person = model('Person', {'name': fields.String})
+        rows = [{'name': 'Person {0}'.format(i)} for i in range(5)]
+
+        with self.context():
+            lines = list(marshalling.iter_ndjson_list(iter(rows), person, chunk_size=2))
+            self.assertEqual(len(lines), 5)
+            self.assertTrue(all(line.endswith('\n') and line.count('\n') == 1 for line in lines))
+            self.assertEqual([json.loads(line) for line in lines], rows)
+            self.assertEqual(list(marshalling.iter_ndjson_list([], person)), [])
+
+    def test_marshal_with_stream(self):
+        person = model('Person', {'name': fields.String})
+
+        @marshalling.marshal_with(person, stream=True)
+        def get():
+            return (row for row in [{'name': 'John'}, {'name': 'Jane'}]), 201, {'X-Header': 'value'}
+
+        @marshalling.marshal_with(person, stream=True)
+        def get_one():
+            return {'name': 'John'}
+
+        with self.context():
+            response = get()
+            self.assertTrue(response.is_streamed)
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.headers['X-Header'], 'value')
+            self.assertEqual(response.content_type, 'application/json')
+            self.assertEqual(json.loads(response.get_data(as_text=True)), [{'name': 'John'}, {'name': 'Jane'}])
+
+            self.assertEqual(get_one(), {'name': 'John'})
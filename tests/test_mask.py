@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import unittest
+
+from flask_restplus import fields, mask
+from flask_restplus.exceptions import MaskError
+
+
+class ParseTestCase(unittest.TestCase):
+    def test_simple(self):
+        self.assertEqual(mask.parse('name,age'), {'name': True, 'age': True})
+
+    def test_enclosed(self):
+        self.assertEqual(mask.parse('{name, age}'), {'name': True, 'age': True})
+
+    def test_nested(self):
+        parsed = mask.parse('name,owner{name,id},pets{name,tags{label}}')
+        self.assertEqual(parsed, {
+            'name': True,
+            'owner': {'name': True, 'id': True},
+            'pets': {'name': True, 'tags': {'label': True}},
+        })
+        self.assertIsInstance(parsed['owner'], mask.Mask)
+
+    def test_merge_duplicates(self):
+        self.assertEqual(mask.parse('owner,owner{id},owner{name}'), {'owner': {'id': True, 'name': True}})
+        self.assertEqual(mask.parse('owner{id},owner'), {'owner': {'id': True}})
+
+    def test_canonical(self):
+        self.assertEqual(str(mask.parse('{owner{name, id}, age}')), 'age,owner{id,name}')
+
+    def test_cached(self):
+        self.assertIs(mask.parse('name,age'), mask.parse('name,age'))
+
+    def test_empty(self):
+        self.assertEqual(mask.parse(''), {})
+        self.assertEqual(mask.parse('{}'), {})
+
+    def test_malformed(self):
+        for value in ('name,', ',name', 'name,,age', '{name', 'name}', 'owner{}', '{owner{name}',
+                      'name age', 'owner{name}{id}', '{name}}'):
+            with self.assertRaises(MaskError):
+                mask.parse(value)
+
+    def test_missing_comma_after_nested(self):
+        for value in ('owner{id}name', 'owner{id} name', '{owner{id}name}'):
+            with self.assertRaises(MaskError) as cm:
+                mask.parse(value)
+            self.assertEqual(cm.exception.msg, 'Missing comma before "name"')
+
+    def test_apply(self):
+        specs = {
+            'name': fields.String,
+            'age': fields.Integer,
+            'owner': {'name': fields.String, 'id': fields.Integer},
+        }
+        self.assertEqual(mask.parse('name,owner{id}').apply(specs), {
+            'name': fields.String,
+            'owner': {'id': fields.Integer},
+        })
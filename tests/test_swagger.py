@@ -1,11 +1,17 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import gzip
+import hashlib
+import io
 import json
 
+import six
+
+from copy import deepcopy
 from textwrap import dedent
 
-from flask import url_for, Blueprint
+from flask import url_for, Blueprint, Flask
 from flask.ext import restplus
 from werkzeug.datastructures import FileStorage
 
@@ -22,10 +28,13 @@ class SwaggerTestCase(TestCase):
         self.app.register_blueprint(blueprint)
         return api
 
-    def get_specs(self, prefix='', app=None, status=200):
+    def get_specs(self, prefix='', app=None, status=200, namespace=None):
         '''Get a Swagger specification for a RestPlus API'''
         with self.app.test_client() as client:
-            response = client.get('{0}/swagger.json'.format(prefix))
+            if namespace:
+                response = client.get('{0}/swagger/{1}.json'.format(prefix, namespace))
+            else:
+                response = client.get('{0}/swagger.json'.format(prefix))
             self.assertEquals(response.status_code, status)
             self.assertEquals(response.content_type, 'application/json')
             return json.loads(response.data.decode('utf8'))
@@ -37,7 +46,7 @@ class SwaggerTestCase(TestCase):
         data = self.get_specs('')
         self.assertEqual(data['swagger'], '2.0')
         self.assertEqual(data['basePath'], '/')
-        self.assertEqual(data['produces'], ['application/json'])
+        self.assertEqual(data['produces'], ['application/json', 'application/x-ndjson'])
         self.assertEqual(data['consumes'], ['application/json'])
         self.assertEqual(data['paths'], {})
         self.assertIn('info', data)
@@ -49,7 +58,7 @@ class SwaggerTestCase(TestCase):
         data = self.get_specs('/api')
         self.assertEqual(data['swagger'], '2.0')
         self.assertEqual(data['basePath'], '/api')
-        self.assertEqual(data['produces'], ['application/json'])
+        self.assertEqual(data['produces'], ['application/json', 'application/x-ndjson'])
         self.assertEqual(data['consumes'], ['application/json'])
         self.assertEqual(data['paths'], {})
         self.assertIn('info', data)
@@ -63,9 +72,7 @@ class SwaggerTestCase(TestCase):
         api.representations['application/xml'] = output_xml
 
         data = self.get_specs()
-        self.assertEqual(len(data['produces']), 2)
-        self.assertIn('application/json', data['produces'])
-        self.assertIn('application/xml', data['produces'])
+        self.assertEqual(data['produces'], ['application/json', 'application/x-ndjson', 'application/xml'])
 
     def test_specs_endpoint_info(self):
         api = restplus.Api(version='1.0',
@@ -83,7 +90,7 @@ class SwaggerTestCase(TestCase):
         data = self.get_specs()
         self.assertEqual(data['swagger'], '2.0')
         self.assertEqual(data['basePath'], '/')
-        self.assertEqual(data['produces'], ['application/json'])
+        self.assertEqual(data['produces'], ['application/json', 'application/x-ndjson'])
         self.assertEqual(data['paths'], {})
 
         self.assertIn('info', data)
@@ -118,7 +125,7 @@ class SwaggerTestCase(TestCase):
 
         self.assertEqual(data['swagger'], '2.0')
         self.assertEqual(data['basePath'], '/')
-        self.assertEqual(data['produces'], ['application/json'])
+        self.assertEqual(data['produces'], ['application/json', 'application/x-ndjson'])
         self.assertEqual(data['paths'], {})
 
         self.assertIn('info', data)
@@ -151,6 +158,396 @@ class SwaggerTestCase(TestCase):
         self.assertIn('securityDefinitions', data)
         self.assertEqual(data['securityDefinitions'], authorizations)
 
+    def test_specs_are_cached(self):
+        api = self.build_api()
+
+        with self.context():
+            self.assertIs(api.specs_payload, api.specs_payload)
+            self.assertEqual(api.specs, api.specs)
+
+    def test_specs_cache_invalidated_on_add_resource(self):
+        api = self.build_api()
+
+        data = self.get_specs()
+        self.assertEqual(data['paths'], {})
+
+        @api.route('/test/', endpoint='test')
+        class TestResource(restplus.Resource):
+            def get(self):
+                return {}
+
+        data = self.get_specs()
+        self.assertIn('/test/', data['paths'])
+
+    def test_specs_cache_invalidated_on_namespace(self):
+        api = self.build_api()
+
+        data = self.get_specs()
+        self.assertEqual([tag['name'] for tag in data['tags']], ['default'])
+
+        api.namespace('ns', 'Test namespace')
+
+        data = self.get_specs()
+        self.assertEqual([tag['name'] for tag in data['tags']], ['default', 'ns'])
+
+    def test_specs_cache_invalidated_on_model(self):
+        api = self.build_api()
+
+        @api.route('/test/', endpoint='test')
+        class TestResource(restplus.Resource):
+            @api.doc(model='Person')
+            def get(self):
+                return {}
+
+        api.model('Person', {'name': restplus.fields.String})
+        data = self.get_specs()
+        self.assertEqual(list(data['definitions']['Person']['properties'].keys()), ['name'])
+
+        api.model('Person', {'name': restplus.fields.String, 'age': restplus.fields.Integer})
+        data = self.get_specs()
+        self.assertEqual(set(data['definitions']['Person']['properties'].keys()), set(['name', 'age']))
+
+    def test_specs_etag(self):
+        self.build_api()
+
+        with self.app.test_client() as client:
+            response = client.get('/swagger.json')
+            self.assertEqual(response.status_code, 200)
+            etag = response.headers['ETag']
+            self.assertEqual(etag, '"{0}"'.format(hashlib.sha1(response.data).hexdigest()))
+
+            response = client.get('/swagger.json', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.headers['ETag'], etag)
+            self.assertEqual(response.data, b'')
+
+    def test_specs_etag_is_stable(self):
+        self.build_api()
+        with self.app.test_client() as client:
+            etag = client.get('/swagger.json').headers['ETag']
+
+        self.app = Flask(__name__)
+        self.build_api()
+        with self.app.test_client() as client:
+            self.assertEqual(client.get('/swagger.json').headers['ETag'], etag)
+
+    def test_specs_etag_changes_on_registration(self):
+        api = self.build_api()
+
+        with self.app.test_client() as client:
+            etag = client.get('/swagger.json').headers['ETag']
+
+            @api.route('/test/', endpoint='test')
+            class TestResource(restplus.Resource):
+                def get(self):
+                    return {}
+
+            response = client.get('/swagger.json', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_specs_gzip(self):
+        self.build_api()
+
+        with self.app.test_client() as client:
+            raw = client.get('/swagger.json')
+            self.assertNotIn('Content-Encoding', raw.headers)
+            self.assertIn('Accept-Encoding', raw.headers['Vary'])
+
+            response = client.get('/swagger.json', headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content_type, 'application/json')
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response.headers['Vary'])
+            self.assertNotEqual(response.headers['ETag'], raw.headers['ETag'])
+            self.assertEqual(gzip.GzipFile(fileobj=io.BytesIO(response.data)).read(), raw.data)
+
+            response = client.get('/swagger.json', headers={
+                'Accept-Encoding': 'gzip',
+                'If-None-Match': response.headers['ETag'],
+            })
+            self.assertEqual(response.status_code, 304)
+
+    def test_specs_identity_when_compression_refused(self):
+        self.build_api()
+
+        with self.app.test_client() as client:
+            response = client.get('/swagger.json', headers={'Accept-Encoding': 'gzip;q=0'})
+            self.assertNotIn('Content-Encoding', response.headers)
+            self.assertEqual(json.loads(response.data.decode('utf8'))['swagger'], '2.0')
+
+    def test_namespace_specs(self):
+        api = self.build_api()
+        ns = api.namespace('ns', 'Test namespace')
+        other = api.namespace('other', 'Other namespace')
+
+        api.model('Leaf', {'name': restplus.fields.String})
+        branch = api.model('Branch', {'leaf': restplus.fields.Nested(api.models['Leaf'])})
+        api.model('Unrelated', {'name': restplus.fields.String})
+
+        @ns.route('/test/', endpoint='test')
+        class TestResource(restplus.Resource):
+            @api.marshal_with(branch)
+            def get(self):
+                return {}
+
+        @other.route('/other/', endpoint='other')
+        class OtherResource(restplus.Resource):
+            @api.doc(model='Unrelated')
+            def get(self):
+                return {}
+
+        data = self.get_specs(namespace='ns')
+        self.assertEqual(list(data['paths'].keys()), ['/ns/test/'])
+        self.assertEqual([tag['name'] for tag in data['tags']], ['ns'])
+        self.assertEqual(set(data['definitions'].keys()), set(['Branch', 'Leaf']))
+
+        data = self.get_specs()
+        self.assertEqual(set(data['paths'].keys()), set(['/ns/test/', '/other/other/']))
+        self.assertEqual(set(data['definitions'].keys()), set(['Branch', 'Leaf', 'Unrelated']))
+
+        with self.context():
+            self.assertEqual(ns.specs_url, 'http://localhost/swagger/ns.json')
+
+    def test_unknown_namespace_specs(self):
+        self.build_api()
+
+        with self.app.test_client() as client:
+            response = client.get('/swagger/unknown.json')
+            self.assertEqual(response.status_code, 404)
+
+    def test_namespace_specs_invalidation(self):
+        api = self.build_api()
+        ns = api.namespace('ns', 'Test namespace')
+        other = api.namespace('other', 'Other namespace')
+
+        with self.context():
+            ns_specs = api.specs_payload_for(ns)
+            other_specs = api.specs_payload_for(other)
+            api.specs
+
+            @ns.route('/test/', endpoint='test')
+            class TestResource(restplus.Resource):
+                def get(self):
+                    return {}
+
+            self.assertIs(api.specs_payload_for(other), other_specs)
+            self.assertIsNot(api.specs_payload_for(ns), ns_specs)
+            self.assertIn('/ns/test/', api.specs_for(ns)['paths'])
+            self.assertIn('/ns/test/', api.specs['paths'])
+
+            other_specs = api.specs_payload_for(other)
+            api.model('Person', {'name': restplus.fields.String})
+            self.assertIsNot(api.specs_payload_for(other), other_specs)
+
+    def test_modified_specs_do_not_alter_the_cache(self):
+        api = self.build_api()
+        person = api.model('Person', {'name': restplus.fields.String})
+
+        @api.route('/test/', endpoint='test')
+        class TestResource(restplus.Resource):
+            @api.marshal_with(person)
+            def get(self):
+                return {}
+
+        with self.context():
+            api.specs['paths']['/test/']['get']['tags'].append('other')
+            api.specs['definitions']['Person']['properties'].clear()
+            specs = api.swagger.as_dict()
+            specs['paths']['/test/']['get']['tags'] = ['other']
+            specs['definitions']['Person']['required'] = ['name']
+
+            for specs in api.specs, api.swagger.as_dict():
+                self.assertEqual(specs['paths']['/test/']['get']['tags'], ['default'])
+                self.assertEqual(specs['definitions']['Person'], {'properties': {'name': {'type': 'string'}}})
+
+            api.invalidate_specs()
+            self.assertEqual(api.specs['paths']['/test/']['get']['tags'], ['default'])
+            self.assertEqual(api.specs['definitions']['Person'], {'properties': {'name': {'type': 'string'}}})
+        self.assertEqual(self.get_specs()['paths']['/test/']['get']['tags'], ['default'])
+
+    def test_specs_are_assembled_incrementally(self):
+        api = self.build_api()
+        api.model('Person', {'name': restplus.fields.String})
+
+        @api.route('/first/', endpoint='first')
+        class FirstResource(restplus.Resource):
+            @api.doc(model='Person')
+            def get(self):
+                return {}
+
+        with self.context():
+            data = api.swagger.build()
+            first = data['paths']['/first/']
+            person = data['definitions']['Person']
+
+            @api.route('/second/', endpoint='second')
+            class SecondResource(restplus.Resource):
+                @api.doc(model='Person')
+                def get(self):
+                    return {}
+
+            data = api.swagger.build()
+            self.assertIn('/second/', data['paths'])
+            self.assertIs(data['paths']['/first/'], first)
+            self.assertIs(data['definitions']['Person'], person)
+
+    def test_incremental_specs_invalidation(self):
+        api = self.build_api()
+        api.model('Person', {'name': restplus.fields.String})
+
+        @api.route('/test/', endpoint='test')
+        class TestResource(restplus.Resource):
+            @api.doc(model='Person')
+            def get(self):
+                return {}
+
+        with self.context():
+            data = api.specs
+
+            api.doc(description='Some description')(TestResource)
+            self.assertIsNot(api.specs['paths']['/test/'], data['paths']['/test/'])
+            self.assertEqual(api.specs['paths']['/test/']['get']['description'], 'Some description')
+
+            # Decorate the function itself: an unbound method does not accept attributes on Python 2
+            api.doc(description='Method description')(six.get_unbound_function(TestResource.get))
+            self.assertIn('Method description', api.specs['paths']['/test/']['get']['description'])
+
+            api.model('Person', {'name': restplus.fields.String, 'age': restplus.fields.Integer})
+            self.assertIn('age', api.specs['definitions']['Person']['properties'])
+
+    def assert_serves_model_changes(self, api):
+        person = api.model('Person', {'name': restplus.fields.String()})
+
+        @api.route('/test/', endpoint='test')
+        class TestResource(restplus.Resource):
+            @api.marshal_with(person)
+            def get(self):
+                return {}
+
+        data = self.get_specs()
+        self.assertEqual(list(data['definitions']['Person']['properties']), ['name'])
+
+        person['age'] = restplus.fields.Integer()
+        data = self.get_specs()
+        self.assertEqual(set(data['definitions']['Person']['properties']), set(['name', 'age']))
+
+        person['name'].description = 'The person name'
+        person['age'].required = True
+        data = self.get_specs()
+        self.assertEqual(data['definitions']['Person']['properties']['name']['description'], 'The person name')
+        self.assertEqual(data['definitions']['Person']['required'], ['age'])
+
+        nickname = restplus.fields.String(description='A nickname')
+        person['nicknames'] = restplus.fields.List(nickname)
+        data = self.get_specs()
+        self.assertEqual(data['definitions']['Person']['properties']['nicknames']['items']['description'], 'A nickname')
+
+        nickname.description = 'An alias'
+        data = self.get_specs()
+        self.assertEqual(data['definitions']['Person']['properties']['nicknames']['items']['description'], 'An alias')
+
+    def test_modified_model_specs(self):
+        self.assert_serves_model_changes(self.build_api())
+
+    def test_modified_model_streamed_specs(self):
+        self.assert_serves_model_changes(self.build_api(stream_specs=True))
+
+    def test_streamed_specs(self):
+        authorizations = {'apikey': {'type': 'apiKey', 'in': 'header', 'name': 'X-API'}}
+        api = self.build_api(stream_specs=True, authorizations=authorizations)
+        ns = api.namespace('ns', 'Test namespace')
+        api.model('Leaf', {'name': restplus.fields.String})
+        branch = api.model('Branch', {'leaf': restplus.fields.Nested(api.models['Leaf'])})
+
+        @ns.route('/test/', endpoint='test')
+        class TestResource(restplus.Resource):
+            @api.marshal_with(branch)
+            def get(self):
+                return {}
+
+        @api.route('/other/', endpoint='other')
+        class OtherResource(restplus.Resource):
+            def get(self):
+                return {}
+
+        @api.route('/hidden/', endpoint='hidden', doc=False)
+        class HiddenResource(restplus.Resource):
+            def get(self):
+                return {}
+
+        with self.app.test_client() as client:
+            response = client.get('/swagger.json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content_type, 'application/json')
+            self.assertTrue(response.is_streamed)
+            self.assertNotIn('Content-Length', response.headers)
+            streamed = response.data
+
+            response = client.get('/swagger/ns.json')
+            ns_streamed = response.data
+
+        streamed = json.loads(streamed.decode('utf8'))
+        data = json.loads(ns_streamed.decode('utf8'))
+        with self.context():
+            self.assertEqual(streamed, api.specs)
+            self.assertEqual(data, api.specs_for(ns))
+
+        self.assertEqual(list(data['paths'].keys()), ['/ns/test/'])
+        self.assertEqual(set(data['definitions'].keys()), set(['Branch', 'Leaf']))
+
+    def test_streamed_specs_not_cached(self):
+        api = self.build_api(stream_specs=True)
+        person = api.model('Person', {'name': restplus.fields.String})
+
+        @api.route('/test/', endpoint='test')
+        class TestResource(restplus.Resource):
+            @api.marshal_with(person)
+            def get(self):
+                return {}
+
+        data = self.get_specs()
+        self.assertIn('Person', data['definitions'])
+        self.assertEqual(api.swagger._paths, {})
+        self.assertEqual(api.swagger._definitions, {})
+
+        # Fragments cached by a buffered build are reused
+        with self.context():
+            api.specs
+        definition = api.swagger._definitions['Person']
+        self.assertEqual(self.get_specs(), data)
+        self.assertIs(api.swagger._definitions['Person'], definition)
+
+    def test_streamed_specs_serialize_each_resource_once(self):
+        api = self.build_api(stream_specs=True)
+        person = api.model('Person', {'name': restplus.fields.String})
+
+        for idx in range(3):
+            @api.route('/test/{0}/'.format(idx), endpoint='test-{0}'.format(idx))
+            class TestResource(restplus.Resource):
+                @api.marshal_with(person)
+                def get(self):
+                    return {}
+
+        serialized = []
+        serialize_resource = api.swagger.serialize_resource
+
+        def counting_serialize_resource(ns, resource, url):
+            serialized.append(url)
+            return serialize_resource(ns, resource, url)
+
+        api.swagger.serialize_resource = counting_serialize_resource
+        data = self.get_specs()
+        self.assertEqual(sorted(serialized), ['/test/0/', '/test/1/', '/test/2/'])
+        self.assertEqual(list(data['definitions']), ['Person'])
+
+    def test_streamed_specs_without_definitions(self):
+        self.build_api(stream_specs=True)
+
+        data = self.get_specs()
+        self.assertEqual(data['paths'], {})
+        self.assertNotIn('definitions', data)
+
     def test_minimal_documentation(self):
         api = self.build_api(prefix='/api')
         ns = api.namespace('ns', 'Test namespace')
@@ -1908,3 +2305,97 @@ class SwaggerTestCase(TestCase):
         self.assertIn('get', path)
         self.assertNotIn('post', path)
         self.assertNotIn('put', path)
+
+    def test_specs_generation_does_not_alter_apidoc(self):
+        api = self.build_api()
+        parser = api.parser()
+        parser.add_argument('q', type=str, help='A query')
+
+        @api.route('/test/<int:id>', endpoint='test')
+        @api.doc(params={'id': 'An ID'}, get={'description': 'Get it'})
+        class TestResource(restplus.Resource):
+            @api.doc(parser=parser)
+            def get(self, id):
+                '''GET operation'''
+                return {}
+
+            @api.doc(params={'other': 'Another param'})
+            def post(self, id):
+                return {}
+
+        class_doc = deepcopy(TestResource.__apidoc__)
+        get_doc = dict(TestResource.get.__apidoc__)
+        post_doc = deepcopy(TestResource.post.__apidoc__)
+
+        with self.context():
+            first = restplus.Swagger(api).as_dict()
+            second = restplus.Swagger(api).as_dict()
+
+        self.assertEqual(first, second)
+        self.assertEqual(TestResource.__apidoc__, class_doc)
+        self.assertNotIn('name', TestResource.__apidoc__)
+        self.assertEqual(TestResource.get.__apidoc__, get_doc)
+        self.assertEqual(TestResource.post.__apidoc__, post_doc)
+
+    def test_self_referencing_model(self):
+        api = self.build_api()
+
+        node = api.model('Node', {'name': restplus.fields.String})
+        node['parent'] = restplus.fields.Nested(node, allow_null=True)
+        node['children'] = restplus.fields.List(restplus.fields.Nested(node))
+
+        @api.route('/nodes/', endpoint='nodes')
+        class NodeResource(restplus.Resource):
+            @api.marshal_with(node)
+            def get(self):
+                return {}
+
+        data = self.get_specs()
+
+        self.assertEqual(list(data['definitions'].keys()), ['Node'])
+        self.assertEqual(data['definitions']['Node'], {
+            'properties': {
+                'name': {'type': 'string'},
+                'parent': {'$ref': '#/definitions/Node'},
+                'children': {'type': 'array', 'items': {'$ref': '#/definitions/Node', 'required': True}},
+            }
+        })
+
+    def test_mutually_referencing_models(self):
+        api = self.build_api()
+
+        parent = api.model('Parent', {'name': restplus.fields.String})
+        child = api.model('Child', {
+            'name': restplus.fields.String,
+            'parent': restplus.fields.Nested(parent),
+        })
+        parent['children'] = restplus.fields.List(restplus.fields.Nested(child))
+
+        @api.route('/children/', endpoint='children')
+        class ChildResource(restplus.Resource):
+            @api.marshal_with(child)
+            def get(self):
+                return {}
+
+        data = self.get_specs()
+
+        self.assertEqual(set(data['definitions'].keys()), set(['Parent', 'Child']))
+        self.assertEqual(data['definitions']['Parent']['properties']['children']['items']['$ref'],
+            '#/definitions/Child')
+
+    def test_deep_models_chain(self):
+        api = self.build_api()
+
+        model = api.model('Model0', {'name': restplus.fields.String})
+        for i in range(1, 3000):
+            model = api.model('Model{0}'.format(i), {'nested': restplus.fields.Nested(model)})
+
+        @api.route('/deep/', endpoint='deep')
+        class DeepResource(restplus.Resource):
+            @api.marshal_with(model)
+            def get(self):
+                return {}
+
+        data = self.get_specs()
+
+        self.assertEqual(len(data['definitions']), 3000)
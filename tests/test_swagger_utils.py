@@ -1,12 +1,15 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import gc
 import unittest
 
 from flask import Flask
+from flask.ext.restful import fields as restful_fields
 from werkzeug.datastructures import FileStorage
 
 from flask_restplus import fields, reqparse, Api, SpecsError
+from flask_restplus import swagger
 from flask_restplus.swagger import extract_path, extract_path_params, field_to_property, parser_to_params
 
 from . import TestCase
@@ -416,6 +419,167 @@ class FieldToPropertyTestCase(TestCase):
         prop = field_to_property(fields.List(Person))
         self.assertEqual(prop, {'type': 'array', 'items': {'$ref': '#/definitions/Person'}})
 
+    def test_list_field_follows_container_changes(self):
+        container = fields.String(description='A description')
+        field = fields.List(container)
+        self.assertEqual(field_to_property(field)['items'], {'type': 'string', 'description': 'A description'})
+
+        container.description = 'Another description'
+        self.assertEqual(field_to_property(field)['items'], {'type': 'string', 'description': 'Another description'})
+
+    def test_property_is_cached(self):
+        field = fields.String(description='A description')
+
+        prop = field_to_property(field)
+        self.assertEqual(prop, {'type': 'string', 'description': 'A description'})
+        self.assertEqual(field._swagger_property, prop)
+
+        prop['required'] = True
+        self.assertEqual(field_to_property(field), {'type': 'string', 'description': 'A description'})
+        self.assertIsNot(field_to_property(field), field_to_property(field))
+
+    def test_identical_properties_are_shared(self):
+        first = fields.String(description='A description')
+        second = fields.String(description='A description')
+        other = fields.String(description='Another description')
+
+        self.assertEqual(field_to_property(first), field_to_property(second))
+        self.assertIs(first._swagger_property, second._swagger_property)
+        field_to_property(other)
+        self.assertIsNot(other._swagger_property, first._swagger_property)
+
+        second.description = 'Another description'
+        self.assertEqual(field_to_property(second), {'type': 'string', 'description': 'Another description'})
+        self.assertEqual(field_to_property(first), {'type': 'string', 'description': 'A description'})
+
+    def test_shared_properties_are_released(self):
+        field = fields.String(description='A released description')
+        field_to_property(field)
+        key = repr(field._swagger_property)
+        self.assertIn(key, swagger._SHARED_PROPERTIES)
+
+        del field
+        gc.collect()
+        self.assertNotIn(key, swagger._SHARED_PROPERTIES)
+
+    def test_properties_with_equal_values_of_different_types_are_not_shared(self):
+        first = fields.Raw(default=1)
+        second = fields.Raw(default=True)
+        self.assertEqual(field_to_property(first), {'type': 'object', 'default': 1})
+        self.assertIs(field_to_property(second)['default'], True)
+
+    def test_cache_invalidated_on_documented_attribute_change(self):
+        field = fields.Integer(description='A description')
+        self.assertEqual(field_to_property(field), {'type': 'integer', 'description': 'A description'})
+
+        field.description = 'Another description'
+        field.minimum = 0
+        self.assertEqual(field_to_property(field), {
+            'type': 'integer',
+            'description': 'Another description',
+            'minimum': 0,
+        })
+
+    def test_cache_invalidated_by_as_list(self):
+        api = Api(self.app)
+        nested_fields = api.model('NestedModel', {'name': fields.String})
+        field = fields.Nested(nested_fields)
+        self.assertEqual(field_to_property(field), {'$ref': '#/definitions/NestedModel', 'required': True})
+
+        api.as_list(field)
+        self.assertEqual(field_to_property(field), {'type': 'array', 'items': {'$ref': '#/definitions/NestedModel'}})
+
+    def test_dynamic_field_is_not_cached(self):
+        translations = {'description': 'A description'}
+
+        class Dynamic(fields.String):
+            dynamic = True
+
+            @property
+            def description(self):
+                return translations['description']
+
+            @description.setter
+            def description(self, value):
+                pass
+
+        field = Dynamic()
+        self.assertEqual(field_to_property(field), {'type': 'string', 'description': 'A description'})
+
+        translations['description'] = 'Une description'
+        self.assertEqual(field_to_property(field), {'type': 'string', 'description': 'Une description'})
+        self.assertIsNone(field._swagger_property)
+
+
+class RegisterFieldTestCase(unittest.TestCase):
+    def setUp(self):
+        self.converters = dict(swagger.CONVERTERS)
+
+    def tearDown(self):
+        swagger.CONVERTERS.clear()
+        swagger.CONVERTERS.update(self.converters)
+        swagger._RESOLVED_CONVERTERS.clear()
+
+    def test_register_static_property(self):
+        class UUID(restful_fields.Raw):
+            pass
+
+        swagger.register_field(UUID, {'type': 'string', 'format': 'uuid'})
+
+        self.assertEqual(field_to_property(UUID()), {'type': 'string', 'format': 'uuid'})
+        self.assertEqual(field_to_property(UUID), {'type': 'string', 'format': 'uuid'})
+
+    def test_register_converter_as_decorator(self):
+        class Money(object):
+            def __init__(self, currency):
+                self.currency = currency
+
+        @swagger.register_field(Money)
+        def money_to_property(field):
+            return {'type': 'number', 'format': field.currency}
+
+        self.assertEqual(field_to_property(Money('EUR')), {'type': 'number', 'format': 'EUR'})
+
+    def test_resolution_follows_the_mro(self):
+        class Base(fields.String):
+            pass
+
+        class Child(Base):
+            pass
+
+        self.assertEqual(swagger.resolve_converter(Child), (fields.String, {'type': 'string'}))
+        self.assertIs(swagger._RESOLVED_CONVERTERS[Child], swagger.resolve_converter(Child))
+
+        swagger.register_field(Base, {'type': 'string', 'format': 'base'})
+
+        self.assertEqual(swagger.resolve_converter(Child), (Base, {'type': 'string', 'format': 'base'}))
+        self.assertEqual(field_to_property(Child()), {'type': 'string', 'format': 'base'})
+
+    def test_registration_invalidates_cached_properties(self):
+        class Custom(fields.Raw):
+            pass
+
+        field = Custom(description='A description')
+        self.assertEqual(field_to_property(field), {'type': 'object', 'description': 'A description'})
+
+        swagger.register_field(Custom, {'type': 'string'})
+
+        self.assertEqual(field_to_property(field), {'type': 'string', 'description': 'A description'})
+
+    def test_registered_class_takes_precedence_over_model(self):
+        app = Flask(__name__)
+        api = Api(app)
+
+        @api.model(type='string', format='date')
+        class Date(fields.Raw):
+            pass
+
+        self.assertEqual(field_to_property(Date()), {'type': 'string', 'format': 'date'})
+
+        swagger.register_field(Date, {'type': 'string', 'format': 'date-time'})
+
+        self.assertEqual(field_to_property(Date()), {'type': 'string', 'format': 'date-time'})
+
 
 class ParserToParamsTestCase(unittest.TestCase):
     def test_empty_parser(self):
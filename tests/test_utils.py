@@ -3,6 +3,8 @@ from __future__ import unicode_literals
 
 import unittest
 
+from copy import copy, deepcopy
+
 from flask.ext.restplus import utils
 
 
@@ -72,6 +74,80 @@ class MergeTestCase(unittest.TestCase):
         }
         self.assertEqual(utils.merge(a, b), b)
 
+    def test_inputs_are_not_modified(self):
+        a = {'nested': {'a': 'a only', 'ab': 'overwritten'}}
+        b = {'nested': {'b': 'b only', 'ab': 'keep'}}
+        a_copy, b_copy = deepcopy(a), deepcopy(b)
+
+        result = utils.merge(a, b)
+        result['other'] = 'value'
+        result['nested']['other'] = 'value'
+
+        self.assertEqual(a, a_copy)
+        self.assertEqual(b, b_copy)
+
+    def test_unchanged_subtrees_are_shared(self):
+        a = {'only_a': {'a': 'nested'}, 'both': {'a': 'value'}}
+        b = {'only_b': {'b': 'nested'}, 'both': {'b': 'value'}}
+
+        result = utils.merge(a, b)
+
+        self.assertIsNot(result, a)
+        self.assertIs(result['only_a'], a['only_a'])
+        self.assertIs(result['only_b'], b['only_b'])
+        self.assertIsNot(result['both'], a['both'])
+        self.assertEqual(result['both'], {'a': 'value', 'b': 'value'})
+
+    def test_merge_with_non_dict(self):
+        self.assertEqual(utils.merge({'a': 'value'}, False), False)
+        self.assertEqual(utils.merge(False, {}), False)
+        self.assertEqual(utils.merge(False, {'a': 'value'}), {'a': 'value'})
+
+    def test_readonly(self):
+        a = {'nested': {'a': 'value'}}
+        b = {'nested': {'b': 'value'}, 'other': 'value'}
+
+        result = utils.merge(a, b, readonly=True)
+
+        self.assertIsInstance(result, utils.ReadOnlyDict)
+        self.assertIsInstance(result['nested'], utils.ReadOnlyDict)
+        self.assertEqual(result, {'nested': {'a': 'value', 'b': 'value'}, 'other': 'value'})
+        with self.assertRaises(TypeError):
+            result['other'] = 'new value'
+        with self.assertRaises(TypeError):
+            result['nested'].update(c='value')
+
+    def test_readonly_input_can_be_merged(self):
+        a = utils.merge({}, {'nested': {'a': 'value'}}, readonly=True)
+
+        result = utils.merge(a, {'nested': {'b': 'value'}})
+
+        self.assertNotIsInstance(result, utils.ReadOnlyDict)
+        result['other'] = 'value'
+        self.assertEqual(deepcopy(a), {'nested': {'a': 'value'}})
+
+
+class ReadOnlyDictTestCase(unittest.TestCase):
+    def test_mutations_are_forbidden(self):
+        data = utils.ReadOnlyDict(a='value')
+        for mutate in (
+                lambda: data.__setitem__('a', 'other'),
+                lambda: data.__delitem__('a'),
+                lambda: data.update(b='value'),
+                lambda: data.setdefault('b', 'value'),
+                lambda: data.pop('a'),
+                data.popitem,
+                data.clear):
+            with self.assertRaises(TypeError):
+                mutate()
+        self.assertEqual(data, {'a': 'value'})
+
+    def test_copy(self):
+        data = utils.ReadOnlyDict(a={'nested': 'value'})
+        self.assertEqual(copy(data), data)
+        self.assertEqual(deepcopy(data), data)
+        self.assertIsInstance(deepcopy(data), utils.ReadOnlyDict)
+
 
 class CamelToDashTestCase(unittest.TestCase):
     def test_no_transform(self):